@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de hellofresh2mealiemenu sans toucher à la production
+
+Lance un faux serveur Mealie (pagination /api/recipes, meal plans
+GET/POST/PUT/DELETE, latence configurable) et une fausse page menu
+HelloFresh, génère des catalogues synthétiques de recettes françaises puis
+mesure le temps et la mémoire de chaque étape (scraping, chargement du
+catalogue, matching, suppression, création, import) et de main() (premier
+run puis run inchangé), ainsi que le temps de démarrage du script dans un
+nouvel interpréteur. Avec --replay, un
+vrai run enregistré par ./run.sh --record est aussi mesuré, sans réseau.
+
+Usage:
+    python3 benchmark.py
+    python3 benchmark.py --sizes 1000,10000,100000 --latency 30
+    python3 benchmark.py --skip-scrape --json bench.json
+    python3 benchmark.py --sizes 1000 --replay fixtures/semaine
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# =============================================================================
+# CATALOGUES SYNTHÉTIQUES
+# =============================================================================
+
+PROTEINS = [
+    "Poulet", "Bœuf", "Saumon", "Cabillaud", "Porc", "Dinde", "Agneau", "Crevettes",
+    "Tofu", "Halloumi", "Lentilles", "Pois chiches", "Canard", "Merlu", "Falafels",
+]
+STYLES = [
+    "croustillant", "rôti", "mijoté", "grillé", "pané", "laqué", "épicé", "fondant",
+    "à la plancha", "au four", "en croûte", "façon tajine", "à l'asiatique",
+]
+SAUCES = [
+    "sauce miel-moutarde", "sauce crémeuse aux champignons", "pesto de basilic",
+    "sauce tomate maison", "sauce au poivre", "curry de coco", "beurre citronné",
+    "sauce teriyaki", "crème d'ail", "sauce au bleu", "chimichurri", "sauce yaourt-menthe",
+]
+SIDES = [
+    "et purée de patate douce", "et riz basmati", "et pommes de terre grenaille",
+    "et légumes rôtis", "et boulgour aux herbes", "et salade croquante",
+    "et tagliatelles fraîches", "et semoule parfumée", "et haricots verts",
+    "et gratin de courgettes", "et écrasé de pommes de terre", "et quinoa aux agrumes",
+]
+
+def make_catalog(size, seed=42):
+    """
+    Générer un catalogue de recettes Mealie synthétique
+
+    Returns:
+        Liste de résumés de recettes au format de l'API Mealie
+    """
+    rng = random.Random(seed)
+    base_date = datetime(2024, 1, 1)
+    recipes = []
+
+    for i in range(size):
+        name = f"{rng.choice(PROTEINS)} {rng.choice(STYLES)}, {rng.choice(SAUCES)} {rng.choice(SIDES)}"
+        # Les vrais catalogues ont des doublons de nom : on en garde quelques-uns
+        if rng.random() > 0.02:
+            name = f"{name} #{i}"
+        updated = base_date + timedelta(minutes=i)
+        recipes.append({
+            'id': f"00000000-0000-4000-8000-{i:012d}",
+            'slug': f"recette-{i}",
+            'name': name,
+            'description': "Recette générée pour les benchmarks. " * 3,
+            'recipeYield': "2 portions",
+            'totalTime': "35 minutes",
+            'tags': [{'name': rng.choice(STYLES)}],
+            'recipeCategory': [{'name': "Plat principal"}],
+            'dateAdded': updated.strftime('%Y-%m-%d'),
+            'updatedAt': updated.isoformat(),
+        })
+
+    return recipes
+
+def make_menu(catalog, count=8, unknown=2, seed=7):
+    """
+    Générer le menu HelloFresh d'une semaine à partir du catalogue
+
+    Les titres reprennent des recettes du catalogue avec de légères
+    variations, plus quelques recettes absentes de Mealie et une offerte.
+    """
+    rng = random.Random(seed)
+    menu = []
+
+    for i, recipe in enumerate(rng.sample(catalog, min(count, len(catalog)))):
+        name, _, headline = recipe['name'].partition(", ")
+        headline = headline.split(" #")[0]
+        menu.append({'id': f"hf-{seed}-{i}", 'name': name, 'headline': headline, 'free': False})
+
+    for i in range(unknown):
+        menu.append({'id': f"hf-{seed}-unknown-{i}", 'name': "Risotto crémeux",
+                     'headline': f"aux asperges vertes et parmesan n°{i}", 'free': False})
+
+    menu.append({'id': f"hf-{seed}-free", 'name': "Cookies", 'headline': "au chocolat", 'free': True})
+    return menu
+
+# =============================================================================
+# FAUX SERVEURS MEALIE / HELLOFRESH
+# =============================================================================
+
+MENU_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>Menu</title></head>
+<body>
+<img src="/img/banner.png" width="1200" height="400">
+<section id="weekly-menu">{cards}</section>
+<script>fetch('/gw/menu?week={week}').then(r => r.json());</script>
+</body></html>"""
+
+MENU_CARD = """<div data-recipe-id="{id}">
+  <a href="/recipes/{id}"><img src="/img/{id}.png"></a>
+  {free}
+  <span data-test-id="product-name">{name}</span>
+  <span data-test-id="product-headline-screen-reader-text">{headline}</span>
+</div>"""
+
+class BenchmarkState:
+    """État partagé du faux serveur (catalogue, meal plans, compteurs)"""
+
+    def __init__(self, catalog, menu, latency=0.0):
+        self.catalog = catalog
+        self.menu = menu
+        self.latency = latency
+        self.mealplans = {}
+        self.next_plan_id = 1
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    def count(self, key):
+        with self.lock:
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+class BenchmarkHandler(BaseHTTPRequestHandler):
+    """Routes du faux Mealie (/api/...) et de la fausse page HelloFresh"""
+
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _route(self, method):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        state = self.state
+
+        if url.path.startswith("/api/"):
+            state.count(f"{method} {url.path.split('/')[2]}")
+            if state.latency:
+                time.sleep(state.latency)
+
+        if url.path == "/api/recipes" and method == "GET":
+            return self._recipes(query)
+        if url.path == "/api/recipes/create/url" and method == "POST":
+            return self._import_recipe(self._read_json())
+        if url.path.startswith("/api/recipes/") and method == "GET":
+            slug = url.path.rsplit("/", 1)[1]
+            recipe = next((recipe for recipe in state.catalog if recipe['slug'] == slug), None)
+            return self._send(200 if recipe else 404, recipe or {"detail": "Not found"})
+        if url.path == "/api/households/mealplans":
+            if method == "GET":
+                return self._list_mealplans(query)
+            if method == "POST":
+                return self._create_mealplan(self._read_json())
+        if url.path.startswith("/api/households/mealplans/"):
+            plan_id = url.path.rsplit("/", 1)[1]
+            if method == "DELETE":
+                with state.lock:
+                    found = state.mealplans.pop(plan_id, None)
+                return self._send(200 if found else 404, {})
+            if method == "PUT":
+                data = self._read_json()
+                with state.lock:
+                    if plan_id not in state.mealplans:
+                        return self._send(404, {})
+                    state.mealplans[plan_id].update(data)
+                    return self._send(200, state.mealplans[plan_id])
+
+        if method == "GET":
+            return self._hellofresh(url, query)
+
+        self._send(404, {"detail": "Not found"})
+
+    def _recipes(self, query):
+        page = int(query.get("page", 1))
+        per_page = int(query.get("perPage", 50))
+        items = self.state.catalog
+
+        # Filtre minimal utilisé par la synchro incrémentale
+        query_filter = query.get("queryFilter", "")
+        if query_filter.startswith("updatedAt >= "):
+            since = query_filter.split('"')[1]
+            items = [recipe for recipe in items if recipe['updatedAt'] >= since]
+        if query.get("orderBy") == "updatedAt":
+            items = sorted(items, key=lambda recipe: recipe['updatedAt'],
+                           reverse=query.get("orderDirection") == "desc")
+
+        start = (page - 1) * per_page
+        self._send(200, {
+            "page": page,
+            "per_page": per_page,
+            "total": len(items),
+            "total_pages": max(1, math.ceil(len(items) / per_page)),
+            "items": items[start:start + per_page],
+        })
+
+    def _import_recipe(self, data):
+        """Create-from-URL : la recette du menu pointée par l'URL rejoint le catalogue"""
+        state = self.state
+        menu_id = data.get('url', '').rsplit("/", 1)[-1]
+        item = next((item for item in state.menu if item['id'] == menu_id), None)
+        if not item:
+            return self._send(400, {"detail": "URL non reconnue"})
+        with state.lock:
+            i = len(state.catalog)
+            recipe = {
+                'id': f"00000000-0000-4000-9000-{i:012d}",
+                'slug': f"import-{i}",
+                'name': item['name'],
+                'updatedAt': datetime.now().isoformat(),
+            }
+            state.catalog.append(recipe)
+        self._send(201, recipe['slug'])
+
+    def _list_mealplans(self, query):
+        start, end = query.get("start_date", ""), query.get("end_date", "9999")
+        with self.state.lock:
+            items = [plan for plan in self.state.mealplans.values() if start <= plan['date'] <= end]
+        self._send(200, {"page": 1, "per_page": 100, "total": len(items), "items": items})
+
+    def _create_mealplan(self, data):
+        with self.state.lock:
+            plan_id = str(self.state.next_plan_id)
+            self.state.next_plan_id += 1
+            plan = dict(data, id=plan_id)
+            self.state.mealplans[plan_id] = plan
+        self._send(201, plan)
+
+    def _hellofresh(self, url, query):
+        state = self.state
+        if url.path == "/magic":
+            return self._send(302, b"", "text/html", {"Location": "/my-account/overview"})
+        if url.path == "/my-account/overview":
+            return self._send(200, b"<html><body>Mon compte</body></html>", "text/html")
+        if url.path == "/my-account/deliveries/menu":
+            cards = "".join(
+                MENU_CARD.format(id=item['id'], name=item['name'], headline=item['headline'],
+                                 free="<span>Offert</span>" if item['free'] else "")
+                for item in state.menu
+            )
+            page = MENU_PAGE.format(cards=cards, week=query.get("week", ""))
+            return self._send(200, page.encode(), "text/html; charset=utf-8")
+        if url.path == "/gw/menu":
+            items = [{"recipe": {"id": item['id'], "name": item['name'], "headline": item['headline'],
+                                 "websiteUrl": f"http://{self.headers['Host']}/recipes/{item['id']}"}}
+                     for item in state.menu]
+            return self._send(200, {"week": query.get("week"), "items": items})
+        if url.path.startswith("/img/"):
+            # Image lourde et lente : c'est ce que le mode "lean" évite
+            time.sleep(0.05)
+            return self._send(200, b"\0" * 200_000, "image/png")
+        self._send(404, {"detail": "Not found"})
+
+    def do_GET(self):
+        self._route("GET")
+
+    def do_POST(self):
+        self._route("POST")
+
+    def do_PUT(self):
+        self._route("PUT")
+
+    def do_DELETE(self):
+        self._route("DELETE")
+
+def start_server(state):
+    """Démarrer le faux serveur sur un port libre (thread en arrière-plan)"""
+    handler = type("Handler", (BenchmarkHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# =============================================================================
+# MESURES
+# =============================================================================
+
+# tracemalloc ralentit nettement le code Python : --no-memory pour des durées propres
+TRACE_MEMORY = True
+
+def measure(label, func, *args, **kwargs):
+    """
+    Exécuter une fonction (sortie masquée) en mesurant durée et pic mémoire Python
+
+    Returns:
+        (résultat, {'stage', 'seconds', 'peak_mb'})
+    """
+    if TRACE_MEMORY:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if TRACE_MEMORY else 0
+        if TRACE_MEMORY:
+            tracemalloc.stop()
+    return result, {'stage': label, 'seconds': elapsed,
+                    'peak_mb': peak / 1024 / 1024 if TRACE_MEMORY else None}
+
+def write_config(work_dir, server_url, options):
+    """Écrire un config.yaml pointant vers le faux serveur"""
+    config = {
+        'debug_mode': False,
+        'hellofresh_subscription_id': "123456",
+        'hellofresh_magic_link': f"{server_url}/magic",
+        'hellofresh_url': server_url,
+        'mealie_url': server_url,
+        'mealie_token': "benchmark",
+        'catalog_cache_path': os.path.join(work_dir, "catalog.sqlite"),
+        'auth_state_path': os.path.join(work_dir, "auth.json"),
+        'debug_artifacts': "none",
+        'debug_artifacts_dir': os.path.join(work_dir, "debug_artifacts"),
+    }
+    config.update(options)
+
+    import yaml
+    path = os.path.join(work_dir, "config.yaml")
+    with open(path, 'w') as f:
+        yaml.safe_dump(config, f, allow_unicode=True)
+    return path
+
+def load_module(config_path):
+    """Importer le script principal avec la config de benchmark"""
+    os.environ['HELLOFRESH2MEALIE_CONFIG'] = config_path
+    sys.path.insert(0, SCRIPT_DIR)
+    import hellofresh2mealiemenu
+    hellofresh2mealiemenu.load_config()
+    return hellofresh2mealiemenu
+
+# Nombre de lancements par mesure de démarrage (on garde la médiane)
+STARTUP_RUNS = 5
+
+def measure_startup(config_path):
+    """
+    Durée de démarrage d'un nouvel interpréteur (médiane de STARTUP_RUNS)
+
+    Mesure `--help` (aucune config, aucun module lourd) et l'import seul
+    du script, chacun dans un processus séparé comme un lancement cron.
+    """
+    script = os.path.join(SCRIPT_DIR, "hellofresh2mealiemenu.py")
+    commands = [
+        ("startup (python seul)", [sys.executable, "-c", "pass"]),
+        ("startup (--help)", [sys.executable, script, "--help"]),
+        ("startup (import)", [sys.executable, "-c", "import hellofresh2mealiemenu"]),
+    ]
+    env = dict(os.environ, HELLOFRESH2MEALIE_CONFIG=config_path)
+
+    results = []
+    for label, command in commands:
+        durations = []
+        for _ in range(STARTUP_RUNS):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=SCRIPT_DIR, env=env, check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            durations.append(time.perf_counter() - start)
+        results.append({'stage': label, 'seconds': sorted(durations)[len(durations) // 2],
+                        'peak_mb': None, 'catalog_size': 0})
+    return results
+
+def reset_state(work_dir):
+    """Repartir d'un état froid : pas de cache catalogue/matching, pas de session"""
+    for name in ("catalog.sqlite", "auth.json"):
+        path = os.path.join(work_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+def benchmark_size(module, state, size, args, work_dir):
+    """Mesurer toutes les étapes pour une taille de catalogue"""
+    results = []
+    state.catalog = make_catalog(size)
+    state.menu = make_menu(state.catalog)
+    state.mealplans.clear()
+    state.requests.clear()
+    reset_state(work_dir)
+
+    monday = datetime.now() + timedelta(days=(7 - datetime.now().weekday()) % 7 or 7)
+    sunday = monday + timedelta(days=6)
+
+    # Scraping
+    titles = [f"{item['name']} {item['headline']}" for item in state.menu if not item['free']]
+    scrape = not args.skip_scrape
+    if scrape:
+        scraped, result = measure("scrape", module.get_current_week_recipes_with_magic_link,
+                                  module.HELLOFRESH_MAGIC_LINK, module.SUBSCRIPTION_ID, 0)
+        if scraped:
+            titles = scraped
+        else:
+            result['note'] = "navigateur indisponible"
+            scrape = False
+        results.append(result)
+
+    # Catalogue : complet (cache vide) puis incrémental (cache chaud)
+    catalog, result = measure("catalog (froid)", module.get_all_mealie_recipes)
+    results.append(result)
+    _, result = measure("catalog (chaud)", module.get_all_mealie_recipes)
+    results.append(result)
+
+    # Matching : index sans cache de décisions, puis exhaustif sur les petits catalogues
+    module.MATCH_CACHE = False
+    matches, result = measure("match (index)", module.match_titles, titles, catalog)
+    results.append(result)
+    if size <= args.exhaustive_max:
+        module.MATCHING_MODE = "exhaustive"
+        _, result = measure("match (exhaustif)", module.match_titles, titles, catalog)
+        results.append(result)
+        module.MATCHING_MODE = "index"
+    module.MATCH_CACHE = True
+    module.match_titles(titles, catalog)
+    _, result = measure("match (cache)", module.match_titles, titles, catalog)
+    results.append(result)
+
+    recipe_ids = [match[1] for _, match in matches if match and match[2] >= module.MATCHING_THRESHOLD]
+
+    # Écritures
+    _, result = measure("create", module.create_meal_plan, list(recipe_ids), monday)
+    results.append(result)
+    _, result = measure("delete", module.delete_week_mealplans, monday, sunday)
+    results.append(result)
+    _, result = measure("reconcile (vide)", module.reconcile_meal_plan, list(recipe_ids), monday, sunday)
+    results.append(result)
+    _, result = measure("reconcile (à jour)", module.reconcile_meal_plan, list(recipe_ids), monday, sunday)
+    results.append(result)
+
+    # Bout en bout
+    reset_state(work_dir)
+    if scrape:
+        _, result = measure("main()", module.main)
+    else:
+        _, result = measure("main()", module.main, hf_recipes=titles)
+        result['note'] = "sans scraping"
+    results.append(result)
+
+    # Même menu, même catalogue : le journal d'exécution évite matching et écritures
+    _, result = measure("main() (inchangé)", module.main, hf_recipes=titles)
+    results.append(result)
+
+    # Import des recettes sans correspondance (create-from-URL du faux Mealie),
+    # en dernier : il ajoute des recettes au catalogue du serveur
+    for item in state.menu:
+        module.remember_recipe_source(f"{item['name']} {item['headline']}", item['name'],
+                                      f"{module.HELLOFRESH_URL}/recipes/{item['id']}")
+    unmatched = [title for title, match in matches if not match or match[2] < module.MATCHING_THRESHOLD]
+    imported, result = measure("import", module.import_unmatched_recipes, unmatched, catalog)
+    result['note'] = f"{len(imported)}/{len(unmatched)} recettes"
+    results.append(result)
+
+    for result in results:
+        result['catalog_size'] = size
+
+    return results
+
+def benchmark_replay(module, directory, args):
+    """
+    Mesurer un vrai run enregistré avec --record, rejoué sans réseau
+
+    Sans navigateur, le matching et main() partent des titres du menu
+    enregistrés dans manifest.json.
+    """
+    results = []
+    module.start_fixtures("replay", directory)
+    try:
+        menus = module._fixture_manifest.get('menus', {})
+        week_offset = int(next(iter(menus), 0))
+        titles = menus.get(str(week_offset), [])
+
+        scrape = not args.skip_scrape
+        if scrape:
+            scraped, result = measure("scrape (rejeu)", module.get_current_week_recipes_with_magic_link,
+                                      module.HELLOFRESH_MAGIC_LINK, module.SUBSCRIPTION_ID, week_offset)
+            if scraped:
+                titles = scraped
+            else:
+                result['note'] = "navigateur indisponible"
+                scrape = False
+            results.append(result)
+
+        catalog, result = measure("catalog (rejeu)", module.get_all_mealie_recipes)
+        results.append(result)
+        _, result = measure("match (rejeu)", module.match_titles, titles, catalog)
+        results.append(result)
+
+        if scrape:
+            _, result = measure("main() (rejeu)", module.main, week_offset=week_offset)
+        else:
+            _, result = measure("main() (rejeu)", module.main, week_offset=week_offset, hf_recipes=titles)
+            result['note'] = "sans scraping"
+        results.append(result)
+    finally:
+        module.stop_fixtures()
+
+    for result in results:
+        result['catalog_size'] = len(catalog)
+
+    return results
+
+def print_report(results, state_requests):
+    """Afficher le tableau des mesures"""
+    print(f"{'catalogue':>10}  {'étape':<22} {'durée':>10} {'pic mém.':>10}")
+    print("-" * 58)
+    for result in results:
+        note = f"  ({result['note']})" if result.get('note') else ""
+        peak = f"{result['peak_mb']:>8.1f}Mo" if result['peak_mb'] is not None else f"{'-':>10}"
+        print(f"{result['catalog_size']:>10}  {result['stage']:<22} "
+              f"{result['seconds'] * 1000:>8.1f}ms {peak}{note}")
+    print()
+    print("Requêtes Mealie (dernier catalogue) : " +
+          ", ".join(f"{key}={value}" for key, value in sorted(state_requests.items())))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks locaux de hellofresh2mealiemenu')
+    parser.add_argument('--sizes', default="1000,10000,100000",
+                        help='Tailles de catalogue synthétique, séparées par des virgules')
+    parser.add_argument('--latency', type=float, default=20,
+                        help='Latence ajoutée à chaque requête Mealie (ms)')
+    parser.add_argument('--skip-scrape', action='store_true',
+                        help='Ne pas lancer Chromium (titres du menu pris directement)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='Ne pas mesurer la mémoire (tracemalloc fausse les durées)')
+    parser.add_argument('--exhaustive-max', type=int, default=1000,
+                        help='Taille de catalogue maximale pour mesurer le matching exhaustif')
+    parser.add_argument('--json', help='Écrire les mesures dans ce fichier JSON')
+    parser.add_argument('--replay', metavar='DOSSIER',
+                        help='Mesurer aussi un run réel enregistré avec ./run.sh --record DOSSIER')
+    args = parser.parse_args()
+
+    global TRACE_MEMORY
+    TRACE_MEMORY = not args.no_memory
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    state = BenchmarkState([], [], latency=args.latency / 1000)
+    server = start_server(state)
+    server_url = f"http://127.0.0.1:{server.server_port}"
+    work_dir = tempfile.mkdtemp(prefix="hf2m-bench-")
+
+    try:
+        config_path = write_config(work_dir, server_url, {})
+        results = measure_startup(config_path)
+        _, startup = measure("import + config", load_module, config_path)
+        module = sys.modules['hellofresh2mealiemenu']
+
+        results.append(dict(startup, catalog_size=0))
+        for size in sizes:
+            print(f"⏱️  Catalogue de {size} recettes...", file=sys.stderr)
+            results.extend(benchmark_size(module, state, size, args, work_dir))
+        if args.replay:
+            print(f"⏱️  Rejeu de {args.replay}...", file=sys.stderr)
+            results.extend(benchmark_replay(module, args.replay, args))
+
+        print_report(results, state.requests)
+
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump({'date': datetime.now().isoformat(), 'latency_ms': args.latency,
+                           'results': results}, f, indent=2)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -2,23 +2,68 @@
 """
 Interface graphique macOS pour hellofresh2mealiemenu
 Permet de coller le magic link et lancer le script facilement
+
+Au lancement, l'interface démarre le démon (./run.sh --daemon) s'il ne
+tourne pas déjà, et l'arrête en quittant : chaque clic passe par un
+navigateur et un catalogue déjà chauds. Le script tourne dans un processus
+séparé (le client, qui retombe sur run.sh si le démon est indisponible).
+Un thread lit sa sortie et la pousse dans une file ; la
+boucle Tk vide cette file par lots toutes les LOG_POLL_MS millisecondes :
+aucun widget n'est touché hors du thread principal.
 """
 
 import tkinter as tk
 from tkinter import ttk, messagebox
 import subprocess
 import os
+import queue
+import signal
+import sys
 import threading
+import time
+
+from hellofresh2mealie_client import daemon_address, daemon_ready
 
-# Chemin du script
+# Chemin du script : le client passe par le démon s'il tourne, sinon par run.sh
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-SCRIPT_PATH = os.path.join(SCRIPT_DIR, "run.sh")
+CLIENT_PATH = os.path.join(SCRIPT_DIR, "hellofresh2mealie_client.py")
+RUN_SCRIPT = os.path.join(SCRIPT_DIR, "run.sh")
+
+# Démon lancé par l'interface : sa sortie, et l'attente maximale de son
+# préchauffage avant le premier clic (le premier lancement installe le venv)
+DAEMON_LOG = os.path.join(SCRIPT_DIR, "daemon.log")
+DAEMON_START_SECONDS = 180
+
+# Vidage de la file de logs : période (ms) et nombre maximum de lignes par passage
+LOG_POLL_MS = 100
+LOG_BATCH_LINES = 500
+
+# Lignes d'avancement du script (--progress) : "@@stage <phase> start|done <s>"
+PROGRESS_MARKER = "@@stage "
+
+# Libellés des phases du script
+STAGE_LABELS = {
+    "browser_launch": "Navigateur",
+    "auth": "Connexion",
+    "menu_navigation": "Menu",
+    "card_extraction": "Lecture des recettes",
+    "scrape": "HelloFresh",
+    "catalog": "Catalogue Mealie",
+    "matching": "Matching",
+    "import": "Import Mealie",
+    "reconcile": "Écriture Mealie",
+    "delete": "Suppression",
+    "create": "Écriture Mealie",
+}
+
+# Délai laissé au script pour fermer le navigateur après Annuler (s)
+CANCEL_GRACE_SECONDS = 5
 
 class HelloFreshGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("HelloFresh → Mealie")
-        self.root.geometry("600x400")
+        self.root.geometry("600x480")
         self.root.resizable(False, False)
 
         # Style macOS
@@ -69,17 +114,29 @@ class HelloFreshGUI:
             self.week_vars[value] = var
             ttk.Checkbutton(week_frame, text=text, variable=var).pack(anchor=tk.W, pady=2)
 
-        # Bouton de lancement
+        # Boutons de lancement et d'annulation
         self.run_button = ttk.Button(main_frame, text="▶️  Lancer le script",
                                      command=self.run_script)
-        self.run_button.grid(row=5, column=0, columnspan=2, pady=(10, 10))
+        self.run_button.grid(row=5, column=0, sticky=tk.E, padx=(0, 5), pady=(10, 10))
+
+        self.cancel_button = ttk.Button(main_frame, text="⏹  Annuler",
+                                        command=self.cancel_script, state='disabled')
+        self.cancel_button.grid(row=5, column=1, sticky=tk.W, padx=(5, 0), pady=(10, 10))
+
+        # Avancement : étape en cours et étapes terminées avec leur durée
+        self.progress_bar = ttk.Progressbar(main_frame, mode='indeterminate')
+        self.progress_bar.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E))
+
+        self.stage_var = tk.StringVar(value="")
+        ttk.Label(main_frame, textvariable=self.stage_var, font=('Helvetica', 10),
+                  wraplength=560).grid(row=7, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
 
         # Zone de log
         ttk.Label(main_frame, text="Logs:", font=('Helvetica', 11, 'bold')).grid(
-            row=6, column=0, sticky=tk.W, pady=(10, 5))
+            row=8, column=0, sticky=tk.W, pady=(10, 5))
 
         log_frame = ttk.Frame(main_frame)
-        log_frame.grid(row=7, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
+        log_frame.grid(row=9, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S))
 
         scrollbar = ttk.Scrollbar(log_frame)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
@@ -95,16 +152,112 @@ class HelloFreshGUI:
         root.columnconfigure(0, weight=1)
         root.rowconfigure(0, weight=1)
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(7, weight=1)
+        main_frame.rowconfigure(9, weight=1)
+
+        # Événements du thread de lecture : ("log", ligne), ("stage", ...), ("done", code)
+        self.events = queue.Queue()
+        self.process = None
+        self.cancelled = False
+        self.stages = {}
+        self.running_stages = []
+        self.root.after(LOG_POLL_MS, self._drain_events)
+
+        # Démon chaud pour tous les clics ; arrêté à la fermeture de la fenêtre
+        self.daemon = None
+        self.start_daemon()
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)
+
+    def start_daemon(self):
+        """Lancer le démon en arrière-plan, sauf s'il tourne déjà (lancé à la main)"""
+        host, port = daemon_address()
+        if daemon_ready(host, port, timeout=0.5):
+            return
+        try:
+            with open(DAEMON_LOG, 'a') as output:
+                self.daemon = subprocess.Popen(
+                    [RUN_SCRIPT, "--daemon"],
+                    stdout=output,
+                    stderr=subprocess.STDOUT,
+                    cwd=SCRIPT_DIR,
+                    start_new_session=True
+                )
+        except OSError as e:
+            self.log(f"⚠️  Démon non lancé ({e}) : chaque exécution démarrera le script")
+
+    def wait_for_daemon(self):
+        """Attendre la fin du préchauffage du démon lancé par l'interface (depuis le thread du script)"""
+        if self.daemon is None or self.daemon.poll() is not None:
+            return
+        host, port = daemon_address()
+        if daemon_ready(host, port):
+            return
+
+        self.log("⏳ Préchauffage du démon (navigateur, catalogue Mealie)...")
+        deadline = time.monotonic() + DAEMON_START_SECONDS
+        while time.monotonic() < deadline and self.daemon.poll() is None:
+            if daemon_ready(host, port):
+                return
+            time.sleep(0.2)
+        self.log(f"⚠️  Démon indisponible (voir {DAEMON_LOG}), exécution sans démon")
+
+    def quit(self):
+        """Fermer la fenêtre : Ctrl+C au démon lancé par l'interface (navigateur fermé proprement)"""
+        if self.daemon is not None and self.daemon.poll() is None:
+            try:
+                os.killpg(self.daemon.pid, signal.SIGINT)
+            except ProcessLookupError:
+                pass
+        self.root.destroy()
 
     def log(self, message):
-        """Ajouter un message au log"""
-        self.log_text.insert(tk.END, message + "\n")
-        self.log_text.see(tk.END)
-        self.log_text.update()
+        """Ajouter un message au log (depuis n'importe quel thread)"""
+        self.events.put(("log", message))
+
+    def _drain_events(self):
+        """Boucle Tk : afficher les événements en attente, par lots"""
+        lines = []
+        try:
+            for _ in range(LOG_BATCH_LINES):
+                kind, *data = self.events.get_nowait()
+                if kind == "log":
+                    lines.append(data[0])
+                    continue
+                # Ne pas retarder les logs déjà lus derrière un changement d'état
+                self._insert_lines(lines)
+                lines = []
+                if kind == "stage":
+                    self._update_stage(*data)
+                elif kind == "done":
+                    self._finish(*data)
+        except queue.Empty:
+            pass
+
+        self._insert_lines(lines)
+        self.root.after(LOG_POLL_MS, self._drain_events)
+
+    def _insert_lines(self, lines):
+        """Une seule insertion (et un seul défilement) pour tout le lot"""
+        if lines:
+            self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+            self.log_text.see(tk.END)
+
+    def _update_stage(self, name, state, seconds=None):
+        """Mettre à jour l'avancement à partir d'une ligne @@stage"""
+        label = STAGE_LABELS.get(name, name)
+        if state == "start":
+            self.running_stages.append(label)
+        else:
+            if label in self.running_stages:
+                self.running_stages.remove(label)
+            self.stages[label] = self.stages.get(label, 0.0) + float(seconds or 0)
+
+        done = " · ".join(f"✅ {stage} {total:.1f}s" for stage, total in self.stages.items()
+                          if stage not in self.running_stages)
+        current = " · ".join(f"⏳ {stage}" for stage in self.running_stages)
+        self.stage_var.set(" · ".join(part for part in (done, current) if part))
 
     def run_script(self):
-        """Lancer le script run.sh avec le magic link"""
+        """Lancer le script (via le démon ou run.sh) avec le magic link"""
         magic_link = self.magic_link_var.get().strip()
 
         if not magic_link:
@@ -127,7 +280,13 @@ class HelloFreshGUI:
 
         # Désactiver le bouton pendant l'exécution
         self.run_button.config(state='disabled', text="⏳ En cours...")
+        self.cancel_button.config(state='normal')
         self.log_text.delete(1.0, tk.END)
+        self.stages = {}
+        self.running_stages = []
+        self.stage_var.set("")
+        self.cancelled = False
+        self.progress_bar.start(15)
 
         # Lancer dans un thread séparé
         thread = threading.Thread(target=self._run_script_thread, args=(magic_link, selected_weeks))
@@ -135,8 +294,10 @@ class HelloFreshGUI:
         thread.start()
 
     def _run_script_thread(self, magic_link, selected_weeks):
-        """Exécuter le script dans un thread séparé"""
+        """Exécuter le script dans un thread séparé (aucun accès aux widgets ici)"""
+        return_code = None
         try:
+            self.wait_for_daemon()
             self.log(f"🚀 Lancement du script...\n")
 
             # Afficher les semaines sélectionnées
@@ -147,43 +308,81 @@ class HelloFreshGUI:
             # Construire la commande avec --weeks si plusieurs semaines
             if len(selected_weeks) > 1:
                 weeks_arg = ",".join(map(str, sorted(selected_weeks)))
-                cmd = [SCRIPT_PATH, "-m", magic_link, "--weeks", weeks_arg]
+                cmd = [sys.executable, CLIENT_PATH, "-m", magic_link, "--weeks", weeks_arg]
             else:
                 # Une seule semaine, utiliser -w
-                cmd = [SCRIPT_PATH, "-m", magic_link, "-w", str(selected_weeks[0])]
+                cmd = [sys.executable, CLIENT_PATH, "-m", magic_link, "-w", str(selected_weeks[0])]
+            cmd.append("--progress")
 
-            # Lancer le processus
-            process = subprocess.Popen(
+            # Lancer le processus dans son propre groupe : Annuler atteint
+            # aussi run.sh, le driver Playwright et Chromium
+            self.process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.STDOUT,
                 universal_newlines=True,
-                cwd=SCRIPT_DIR
+                cwd=SCRIPT_DIR,
+                start_new_session=True
             )
 
             # Lire la sortie en temps réel
-            for line in process.stdout:
-                self.log(line.rstrip())
+            for line in self.process.stdout:
+                line = line.rstrip()
+                if line.startswith(PROGRESS_MARKER):
+                    self.events.put(("stage", *line[len(PROGRESS_MARKER):].split()))
+                else:
+                    self.log(line)
 
             # Attendre la fin
-            return_code = process.wait()
-
-            if return_code == 0:
-                self.log("\n✅ Script terminé avec succès !")
-                self.root.after(0, lambda: messagebox.showinfo("Succès",
-                    "Le meal plan a été créé dans Mealie ! 🎉"))
-            else:
-                self.log(f"\n❌ Le script a échoué avec le code {return_code}")
-                self.root.after(0, lambda: messagebox.showerror("Erreur",
-                    f"Le script a échoué. Vérifiez les logs."))
+            return_code = self.process.wait()
 
         except Exception as e:
             self.log(f"\n❌ Erreur: {str(e)}")
-            self.root.after(0, lambda: messagebox.showerror("Erreur", str(e)))
 
         finally:
-            # Réactiver le bouton
-            self.root.after(0, lambda: self.run_button.config(state='normal', text="▶️  Lancer le script"))
+            self.events.put(("done", return_code))
+
+    def cancel_script(self):
+        """Arrêter le script : SIGTERM (navigateur fermé proprement), puis SIGKILL"""
+        process = self.process
+        if process is None or process.poll() is not None:
+            return
+
+        self.cancelled = True
+        self.cancel_button.config(state='disabled')
+        self.log("\n⏹  Annulation...")
+        try:
+            os.killpg(process.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            return
+
+        def force_kill():
+            if process.poll() is None:
+                try:
+                    os.killpg(process.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+        self.root.after(CANCEL_GRACE_SECONDS * 1000, force_kill)
+
+    def _finish(self, return_code):
+        """Fin du script : bilan, boutons et barre d'avancement réinitialisés"""
+        self.process = None
+        self.progress_bar.stop()
+        self.running_stages = []
+        self.cancel_button.config(state='disabled')
+        self.run_button.config(state='normal', text="▶️  Lancer le script")
+
+        if self.cancelled:
+            self._insert_lines(["⚠️  Script annulé"])
+        elif return_code == 0:
+            self._insert_lines(["", "✅ Script terminé avec succès !"])
+            messagebox.showinfo("Succès", "Le meal plan a été créé dans Mealie ! 🎉")
+        elif return_code is not None:
+            self._insert_lines(["", f"❌ Le script a échoué avec le code {return_code}"])
+            messagebox.showerror("Erreur", "Le script a échoué. Vérifiez les logs.")
+        else:
+            messagebox.showerror("Erreur", "Le script n'a pas pu être lancé. Vérifiez les logs.")
 
 def main():
     root = tk.Tk()
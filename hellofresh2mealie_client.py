@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Client léger du mode démon de hellofresh2mealiemenu
+
+Envoie la demande de planning au démon (./run.sh --daemon) et affiche ses
+logs au fil de l'eau. Si le démon ne tourne pas, lance run.sh avec les
+mêmes arguments : utilisable tel quel depuis cron ou gui_mac.py.
+
+N'utilise que la bibliothèque standard, pour démarrer instantanément.
+"""
+
+import argparse
+import json
+import os
+import signal
+import sys
+import urllib.error
+import urllib.request
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RUN_SCRIPT = os.path.join(SCRIPT_DIR, "run.sh")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Dernière ligne envoyée par le démon : code de sortie de la demande
+EXIT_MARKER = "@@exit "
+
+def daemon_address():
+    """
+    Adresse du démon (daemon_host / daemon_port dans config.yaml)
+
+    Lecture ligne à ligne des deux clés de premier niveau, pour ne pas
+    dépendre de PyYAML hors du venv.
+    """
+    config_path = os.environ.get('HELLOFRESH2MEALIE_CONFIG', os.path.join(SCRIPT_DIR, 'config.yaml'))
+    host, port = DEFAULT_HOST, DEFAULT_PORT
+
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip() or line[0].isspace():
+                    continue
+                key, _, value = line.partition(':')
+                value = value.split('#')[0].strip().strip('"\'')
+                if key == 'daemon_host' and value:
+                    host = value
+                elif key == 'daemon_port' and value:
+                    port = int(value)
+    except (OSError, ValueError):
+        pass
+
+    return host, port
+
+def daemon_url(host, port, path):
+    """URL d'une route du démon (adresse IPv6 comme ::1 entre crochets)"""
+    if ':' in host and not host.startswith('['):
+        host = f"[{host}]"
+    return f"http://{host}:{port}{path}"
+
+def daemon_ready(host, port, timeout=1):
+    """Vrai si le démon répond (il n'écoute qu'une fois préchauffé)"""
+    try:
+        with urllib.request.urlopen(daemon_url(host, port, "/health"), timeout=timeout) as response:
+            return response.status == 200
+    except (urllib.error.URLError, OSError):
+        return False
+
+def cancel_daemon_request(host, port):
+    """Demander au démon d'annuler la demande en cours (bouton Annuler de gui_mac.py)"""
+    try:
+        urllib.request.urlopen(urllib.request.Request(daemon_url(host, port, "/cancel"), data=b""), timeout=5).close()
+    except (urllib.error.URLError, ConnectionError):
+        pass
+
+def run_without_daemon():
+    """Démon absent : exécution classique via run.sh (mêmes arguments)"""
+    os.execv(RUN_SCRIPT, [RUN_SCRIPT] + sys.argv[1:])
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Envoie une demande de meal plan au démon hellofresh2mealiemenu (ou lance run.sh)'
+    )
+    parser.add_argument('-m', '--magic-link', type=str, help='Lien magique HelloFresh reçu par email')
+    parser.add_argument('-w', '--week', type=int, default=0,
+                        help='Décalage de semaines (0=actuelle, 1=prochaine, etc.)')
+    parser.add_argument('--weeks', type=str,
+                        help='Liste de semaines à planifier séparées par des virgules (ex: 0,1,2)')
+    parser.add_argument('--sequential', action='store_true',
+                        help='Avec --weeks : traiter les semaines une par une au lieu du pipeline')
+    parser.add_argument('--refresh-catalog', action='store_true',
+                        help='Forcer le rechargement complet du catalogue Mealie')
+    parser.add_argument('--progress', action='store_true',
+                        help='Afficher le début et la fin de chaque étape (lignes @@stage)')
+    args = parser.parse_args()
+
+    if args.weeks:
+        weeks = [int(w.strip()) for w in args.weeks.split(',')]
+    else:
+        weeks = [args.week]
+
+    request = {
+        'magic_link': args.magic_link,
+        'weeks': weeks,
+        'refresh_catalog': args.refresh_catalog,
+        'sequential': args.sequential,
+        'progress': args.progress,
+    }
+
+    host, port = daemon_address()
+    http_request = urllib.request.Request(
+        daemon_url(host, port, "/plan"),
+        data=json.dumps(request).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+    )
+
+    try:
+        response = urllib.request.urlopen(http_request, timeout=600)
+    except urllib.error.HTTPError as e:
+        print(f"❌ Démon: erreur {e.code} ({e.read().decode('utf-8', 'replace').strip()})")
+        sys.exit(1)
+    except (urllib.error.URLError, ConnectionError):
+        run_without_daemon()
+
+    # SIGTERM : annuler côté démon puis s'arrêter sans attendre la fin
+    def cancel(signum, frame):
+        cancel_daemon_request(host, port)
+        print("⚠️  Annulé", flush=True)
+        os._exit(130)
+    signal.signal(signal.SIGTERM, cancel)
+
+    code = 1
+    with response:
+        for raw_line in response:
+            line = raw_line.decode('utf-8').rstrip('\n')
+            if line.startswith(EXIT_MARKER):
+                code = int(line[len(EXIT_MARKER):])
+                continue
+            print(line, flush=True)
+
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
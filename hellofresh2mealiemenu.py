@@ -6,460 +6,4396 @@ Script pour créer automatiquement un meal plan dans Mealie
 Version Playwright - Full headless, compatible cron
 """
 
-import requests
 import json
+import io
+import re
 import random
-import yaml
 import os
 import sys
+import unicodedata
+import sqlite3
+import hashlib
+import shutil
+import signal
 import argparse
 from datetime import datetime, timedelta
-from difflib import SequenceMatcher
 import time
-from playwright.sync_api import sync_playwright
+import threading
+import queue
+import functools
+import bisect
+import heapq
+import itertools
+import ipaddress
+from collections import namedtuple, deque, Counter
+from contextlib import contextmanager, redirect_stdout
+
+# Les modules lourds (Playwright, requests, NumPy, difflib) ne sont importés
+# que par l'étape qui s'en sert : un run qui ne scrape pas ne charge pas
+# Playwright, `--help` ne charge rien.
+
+# NumPy est optionnel : seulement nécessaire pour matching_mode: "tfidf"
+# (importé par load_numpy())
+np = None
+
+def load_numpy():
+    """Importer NumPy à la demande ; False s'il n'est pas installé"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return False
+        np = numpy
+    return True
 
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
 
-# Charger la config depuis config.yaml (dans le même dossier que le script)
+# La config est lue par load_config() (appelé par le point d'entrée), pas à
+# l'import : `--help` ou l'import du module ne touchent pas au disque.
+# HELLOFRESH2MEALIE_CONFIG permet d'utiliser un autre fichier (benchmarks, tests)
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-CONFIG_PATH = os.path.join(SCRIPT_DIR, "config.yaml")
+CONFIG_PATH = os.environ.get('HELLOFRESH2MEALIE_CONFIG', os.path.join(SCRIPT_DIR, "config.yaml"))
 
-try:
-    with open(CONFIG_PATH, 'r') as f:
-        config = yaml.safe_load(f)
+# Budget de latence (secondes) de chaque étape du scraping : connexion par
+# magic link, chargement d'un onglet menu
+DEFAULT_LATENCY_BUDGETS = {'auth': 30, 'menu': 45}
 
-    # Mode debug
-    DEBUG_MODE = config.get('debug_mode', False)
+# Jours acceptés dans days_to_plan, dans l'ordre de datetime.weekday()
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
 
-    # HelloFresh
-    HELLOFRESH_MAGIC_LINK = config.get('hellofresh_magic_link')
-    SUBSCRIPTION_ID = config['hellofresh_subscription_id']
+# Clés sans valeur par défaut
+REQUIRED_CONFIG_KEYS = ('hellofresh_subscription_id', 'mealie_url', 'mealie_token')
 
-    # Mealie
-    MEALIE_URL = config['mealie_url']
-    MEALIE_TOKEN = config['mealie_token']
+class ConfigError(Exception):
+    """config.yaml introuvable ou incomplet"""
 
-    # Planning
-    ENTRY_TYPE = config.get('entry_type', 'dinner')
-    MATCHING_THRESHOLD = config.get('matching_threshold', 0.6)
-    DAYS_TO_PLAN = config.get('days_to_plan', ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"])
-    
-except FileNotFoundError:
-    print(f"❌ Fichier {CONFIG_PATH} introuvable")
-    print(f"   Copie default-config.yaml vers config.yaml et remplis tes identifiants")
-    exit(1)
-except KeyError as e:
-    print(f"❌ Clé manquante dans config.yaml: {e}")
-    exit(1)
+def parse_config(config):
+    """
+    Variables de configuration du module à partir du contenu de config.yaml
+
+    Raises:
+        ConfigError: jour inconnu ou en double dans days_to_plan
+    """
+    debug_mode = config.get('debug_mode', False)
+
+    days_to_plan = [str(day).lower() for day in
+                    config.get('days_to_plan', ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"])]
+    for day in days_to_plan:
+        if day not in WEEKDAYS:
+            raise ConfigError(f"days_to_plan : jour inconnu '{day}' ({', '.join(WEEKDAYS)})")
+    if len(set(days_to_plan)) != len(days_to_plan):
+        raise ConfigError("days_to_plan : un même jour est listé deux fois")
+
+    return {
+        # Mode debug
+        'DEBUG_MODE': debug_mode,
+
+        # Métriques de chaque exécution (une ligne JSON par run, textfile Prometheus optionnel)
+        'METRICS_FILE': config.get('metrics_file', 'metrics.jsonl'),
+        'METRICS_FILE_MAX_MB': config.get('metrics_file_max_mb', 5),
+        'METRICS_PROMETHEUS_FILE': config.get('metrics_prometheus_file'),
+
+        # HelloFresh
+        'HELLOFRESH_MAGIC_LINK': config.get('hellofresh_magic_link'),
+        'SUBSCRIPTION_ID': config.get('hellofresh_subscription_id'),
+        'HELLOFRESH_URL': config.get('hellofresh_url', 'https://www.hellofresh.fr').rstrip('/'),
+        'SCRAPING_MODE': config.get('scraping_mode', 'lean'),
+        'DEBUG_ARTIFACTS': config.get('debug_artifacts', 'full' if debug_mode else 'on_failure'),
+        'DEBUG_ARTIFACTS_KEEP': config.get('debug_artifacts_keep', 5),
+        'DEBUG_ARTIFACTS_DIR': os.path.join(SCRIPT_DIR, config.get('debug_artifacts_dir', 'debug_artifacts')),
+        'AUTH_STATE': config.get('auth_state', True),
+        'AUTH_STATE_PATH': os.path.join(SCRIPT_DIR, config.get('auth_state_path', 'hellofresh_auth.json')),
+        'LATENCY_BUDGETS': dict(DEFAULT_LATENCY_BUDGETS, **(config.get('latency_budgets') or {})),
+
+        # Mealie
+        'MEALIE_URL': config.get('mealie_url'),
+        'MEALIE_TOKEN': config.get('mealie_token'),
+        'MEALIE_PARALLELISM': config.get('mealie_parallelism', 4),
+        'MEALIE_MAX_RETRIES': config.get('mealie_max_retries', 3),
+
+        # Cache local du catalogue Mealie
+        'CATALOG_CACHE': config.get('catalog_cache', True),
+        'CATALOG_CACHE_PATH': os.path.join(SCRIPT_DIR, config.get('catalog_cache_path', 'mealie_catalog.sqlite')),
+        'CATALOG_FULL_REFRESH_HOURS': config.get('catalog_full_refresh_hours', 24),
+        'CATALOG_FETCH_PARALLELISM': config.get('catalog_fetch_parallelism', 8),
+
+        # Planning
+        'ENTRY_TYPE': config.get('entry_type', 'dinner'),
+        'MATCHING_THRESHOLD': config.get('matching_threshold', 0.6),
+        'MATCHING_MODE': config.get('matching_mode', 'index'),
+        'MATCHING_CANDIDATES': config.get('matching_candidates', 50),
+        'MATCHING_RERANK': config.get('matching_rerank', True),
+        'MATCH_CACHE': config.get('match_cache', True),
+        'MATCH_CACHE_SIZE': config.get('match_cache_size', 2000),
+        'MATCH_OVERRIDES': config.get('match_overrides') or {},
+        'MATCHING_ASSIGNMENT': config.get('matching_assignment', 'joint'),
+        'ASSIGNMENT_CANDIDATES': config.get('assignment_candidates', 5),
+        'IMPORT_UNMATCHED': config.get('import_unmatched', False),
+        'IMPORT_PARALLELISM': config.get('import_parallelism', 2),
+        'DAYS_TO_PLAN': days_to_plan,
+        'MEALPLAN_SYNC': config.get('mealplan_sync', 'reconcile'),
+        'PIPELINE_QUEUE_SIZE': config.get('pipeline_queue_size', 2),
+        'RUN_JOURNAL': config.get('run_journal', True),
+
+        # Mode démon (./run.sh --daemon)
+        'DAEMON_HOST': config.get('daemon_host', '127.0.0.1'),
+        'DAEMON_PORT': config.get('daemon_port', 8765),
+
+        # Mode batch (./run.sh --batch)
+        'BATCH_WORKERS': config.get('batch_workers', 2),
+    }
+
+# Valeurs par défaut tant que load_config() n'a pas été appelé. Chaque
+# variable est déclarée ici (lisible par pyflakes et les éditeurs) ;
+# load_config() et apply_profile_config() les remplacent via set_config()
+_defaults = parse_config({})
+DEBUG_MODE = _defaults['DEBUG_MODE']
+METRICS_FILE = _defaults['METRICS_FILE']
+METRICS_FILE_MAX_MB = _defaults['METRICS_FILE_MAX_MB']
+METRICS_PROMETHEUS_FILE = _defaults['METRICS_PROMETHEUS_FILE']
+HELLOFRESH_MAGIC_LINK = _defaults['HELLOFRESH_MAGIC_LINK']
+SUBSCRIPTION_ID = _defaults['SUBSCRIPTION_ID']
+HELLOFRESH_URL = _defaults['HELLOFRESH_URL']
+SCRAPING_MODE = _defaults['SCRAPING_MODE']
+DEBUG_ARTIFACTS = _defaults['DEBUG_ARTIFACTS']
+DEBUG_ARTIFACTS_KEEP = _defaults['DEBUG_ARTIFACTS_KEEP']
+DEBUG_ARTIFACTS_DIR = _defaults['DEBUG_ARTIFACTS_DIR']
+AUTH_STATE = _defaults['AUTH_STATE']
+AUTH_STATE_PATH = _defaults['AUTH_STATE_PATH']
+LATENCY_BUDGETS = _defaults['LATENCY_BUDGETS']
+MEALIE_URL = _defaults['MEALIE_URL']
+MEALIE_TOKEN = _defaults['MEALIE_TOKEN']
+MEALIE_PARALLELISM = _defaults['MEALIE_PARALLELISM']
+MEALIE_MAX_RETRIES = _defaults['MEALIE_MAX_RETRIES']
+CATALOG_CACHE = _defaults['CATALOG_CACHE']
+CATALOG_CACHE_PATH = _defaults['CATALOG_CACHE_PATH']
+CATALOG_FULL_REFRESH_HOURS = _defaults['CATALOG_FULL_REFRESH_HOURS']
+CATALOG_FETCH_PARALLELISM = _defaults['CATALOG_FETCH_PARALLELISM']
+ENTRY_TYPE = _defaults['ENTRY_TYPE']
+MATCHING_THRESHOLD = _defaults['MATCHING_THRESHOLD']
+MATCHING_MODE = _defaults['MATCHING_MODE']
+MATCHING_CANDIDATES = _defaults['MATCHING_CANDIDATES']
+MATCHING_RERANK = _defaults['MATCHING_RERANK']
+MATCH_CACHE = _defaults['MATCH_CACHE']
+MATCH_CACHE_SIZE = _defaults['MATCH_CACHE_SIZE']
+MATCH_OVERRIDES = _defaults['MATCH_OVERRIDES']
+MATCHING_ASSIGNMENT = _defaults['MATCHING_ASSIGNMENT']
+ASSIGNMENT_CANDIDATES = _defaults['ASSIGNMENT_CANDIDATES']
+IMPORT_UNMATCHED = _defaults['IMPORT_UNMATCHED']
+IMPORT_PARALLELISM = _defaults['IMPORT_PARALLELISM']
+DAYS_TO_PLAN = _defaults['DAYS_TO_PLAN']
+MEALPLAN_SYNC = _defaults['MEALPLAN_SYNC']
+PIPELINE_QUEUE_SIZE = _defaults['PIPELINE_QUEUE_SIZE']
+RUN_JOURNAL = _defaults['RUN_JOURNAL']
+DAEMON_HOST = _defaults['DAEMON_HOST']
+DAEMON_PORT = _defaults['DAEMON_PORT']
+BATCH_WORKERS = _defaults['BATCH_WORKERS']
+
+def set_config(values):
+    """Remplacer les variables de configuration du module (clés de parse_config uniquement)"""
+    unknown = set(values) - set(_defaults)
+    if unknown:
+        raise ValueError(f"Variables de configuration inconnues: {', '.join(sorted(unknown))}")
+    globals().update(values)
+
+def current_config():
+    """Valeurs actuelles des variables de configuration (mêmes clés que parse_config)"""
+    return {name: globals()[name] for name in _defaults}
+
+# Fichier de config déjà chargé (load_config ne le relit pas) et son contenu brut
+_loaded_config_path = None
+_raw_config = {}
+
+def missing_config_keys(config):
+    """Clés obligatoires absentes de `config`"""
+    return [key for key in REQUIRED_CONFIG_KEYS if key not in config]
+
+def load_config(path=None):
+    """
+    Lire config.yaml et remplir les variables de configuration du module
+
+    Le résultat est mis en cache : un second appel sur le même fichier ne
+    relit rien (mode démon, pipeline, imports depuis le benchmark).
+
+    Avec une liste `profiles` (mode batch), les clés obligatoires peuvent
+    n'être définies que dans chaque profil (voir load_profiles).
+
+    Raises:
+        ConfigError: fichier introuvable, illisible ou clé obligatoire manquante
+    """
+    global CONFIG_PATH, _loaded_config_path, _raw_config
+
+    path = path or os.environ.get('HELLOFRESH2MEALIE_CONFIG', os.path.join(SCRIPT_DIR, "config.yaml"))
+    if path == _loaded_config_path:
+        return
+
+    import yaml
+
+    try:
+        with open(path, 'r') as f:
+            config = yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        raise ConfigError(f"Fichier {path} introuvable\n"
+                          f"   Copie default-config.yaml vers config.yaml et remplis tes identifiants")
+    except yaml.YAMLError as e:
+        raise ConfigError(f"config.yaml illisible: {e}")
+
+    missing = missing_config_keys(config)
+    if missing and not config.get('profiles'):
+        raise ConfigError(f"Clé manquante dans config.yaml: '{missing[0]}'")
+
+    set_config(parse_config(config))
+    CONFIG_PATH = path
+    _loaded_config_path = path
+    _raw_config = config
 
 # =============================================================================
 # FONCTIONS UTILITAIRES
 # =============================================================================
 
-def log(message, level="info"):
-    """Afficher un message seulement en mode debug"""
-    if DEBUG_MODE or level in ["error", "always"]:
-        print(message)
+def log(message, level="info"):
+    """Afficher un message seulement en mode debug"""
+    if DEBUG_MODE or level in ["error", "always"]:
+        print(message)
+
+# Date figée sur celle de l'enregistrement en mode rejeu (None sinon)
+_frozen_now = None
+
+def current_time():
+    """Date et heure courantes, pour le calcul des semaines à planifier"""
+    return _frozen_now or datetime.now()
+
+# Annulation demandée (SIGTERM, POST /cancel du démon) : vérifiée entre
+# deux semaines et avant chaque étape
+_cancel_requested = threading.Event()
+
+class Cancelled(KeyboardInterrupt):
+    """Exécution annulée (bouton Annuler de gui_mac.py)"""
+
+def check_cancelled():
+    """Lever Cancelled si une annulation a été demandée"""
+    if _cancel_requested.is_set():
+        raise Cancelled()
+
+# Préfixe des lignes d'avancement (--progress) : "@@stage <phase> start|done <s>"
+PROGRESS_MARKER = "@@stage "
+
+# Bornes de l'histogramme des scores de matching
+SCORE_BUCKETS = (0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+class RunMetrics:
+    """
+    Durées, compteurs et histogramme des scores d'une exécution
+
+    Les phases (lancement du navigateur, authentification, navigation,
+    extraction des cartes, catalogue, matching, suppression, création...)
+    sont cumulées si elles se répètent (plusieurs semaines). Utilisable
+    depuis les threads du client Mealie.
+
+    Avec `progress` (--progress, gui_mac.py), le début et la fin de chaque
+    phase sont aussi affichés sous forme de lignes PROGRESS_MARKER.
+    """
+
+    def __init__(self, profile=None, progress=False):
+        self.profile = profile
+        self.progress = progress
+        self.started_at = time.time()
+        self.phases = {}
+        self.counters = {}
+        self.score_buckets = [0] * len(SCORE_BUCKETS)
+        self.score_count = 0
+        self.score_sum = 0.0
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Chronométrer un bloc et l'ajouter à la phase `name`"""
+        if self.progress:
+            print(f"{PROGRESS_MARKER}{name} start", flush=True)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+            if self.progress:
+                print(f"{PROGRESS_MARKER}{name} done {elapsed:.2f}", flush=True)
+
+    def count(self, name, value=1):
+        """Incrémenter un compteur (requêtes, octets, recettes...)"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe_score(self, score):
+        """Ajouter un score de matching à l'histogramme"""
+        with self.lock:
+            for i, bound in enumerate(SCORE_BUCKETS):
+                if score <= bound:
+                    self.score_buckets[i] += 1
+                    break
+            self.score_count += 1
+            self.score_sum += score
+
+    def as_dict(self):
+        data = {
+            'timestamp': datetime.fromtimestamp(self.started_at).isoformat(timespec='seconds'),
+            'duration_seconds': round(time.time() - self.started_at, 3),
+            'phases': {name: round(value, 3) for name, value in self.phases.items()},
+            'counters': dict(self.counters),
+            'match_scores': {
+                'buckets': {str(bound): count for bound, count in zip(SCORE_BUCKETS, self.score_buckets)},
+                'count': self.score_count,
+                'sum': round(self.score_sum, 3),
+            },
+        }
+        if self.profile:
+            data['profile'] = self.profile
+        return data
+
+    def write(self):
+        """Ajouter la ligne JSON du run et mettre à jour le textfile Prometheus"""
+        data = self.as_dict()
+
+        if METRICS_FILE:
+            path = os.path.join(SCRIPT_DIR, METRICS_FILE)
+            self._rotate(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+        if METRICS_PROMETHEUS_FILE:
+            self._write_prometheus(os.path.join(SCRIPT_DIR, METRICS_PROMETHEUS_FILE), data)
+
+    def _rotate(self, path):
+        """Au-delà de METRICS_FILE_MAX_MB, renommer le fichier en .1 (l'ancien .1 est remplacé)"""
+        if not METRICS_FILE_MAX_MB:
+            return
+        try:
+            if os.path.getsize(path) >= METRICS_FILE_MAX_MB * 1024 * 1024:
+                os.replace(path, f"{path}.1")
+        except FileNotFoundError:
+            pass
+
+    def _write_prometheus(self, path, data):
+        """Écrire les métriques au format textfile (node_exporter), de manière atomique"""
+        lines = [
+            "# HELP hellofresh2mealie_last_run_timestamp_seconds Début du dernier run",
+            "# TYPE hellofresh2mealie_last_run_timestamp_seconds gauge",
+            f"hellofresh2mealie_last_run_timestamp_seconds {self.started_at:.0f}",
+            "# HELP hellofresh2mealie_run_seconds Durée totale du dernier run",
+            "# TYPE hellofresh2mealie_run_seconds gauge",
+            f"hellofresh2mealie_run_seconds {data['duration_seconds']}",
+            "# HELP hellofresh2mealie_phase_seconds Durée de chaque phase du dernier run",
+            "# TYPE hellofresh2mealie_phase_seconds gauge",
+        ]
+        lines += [f'hellofresh2mealie_phase_seconds{{phase="{name}"}} {value}'
+                  for name, value in sorted(data['phases'].items())]
+        lines += [
+            "# HELP hellofresh2mealie_run_total Compteurs du dernier run (requêtes, octets, recettes)",
+            "# TYPE hellofresh2mealie_run_total gauge",
+        ]
+        lines += [f'hellofresh2mealie_run_total{{counter="{name}"}} {value}'
+                  for name, value in sorted(data['counters'].items())]
+        lines += [
+            "# HELP hellofresh2mealie_match_score Scores de matching du dernier run",
+            "# TYPE hellofresh2mealie_match_score histogram",
+        ]
+        cumulative = 0
+        for bound, count in zip(SCORE_BUCKETS, self.score_buckets):
+            cumulative += count
+            lines.append(f'hellofresh2mealie_match_score_bucket{{le="{bound}"}} {cumulative}')
+        lines += [
+            f'hellofresh2mealie_match_score_bucket{{le="+Inf"}} {self.score_count}',
+            f"hellofresh2mealie_match_score_sum {self.score_sum:.3f}",
+            f"hellofresh2mealie_match_score_count {self.score_count}",
+        ]
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+
+# Métriques de l'exécution en cours
+METRICS = RunMetrics()
+
+def timed_phase(name):
+    """Décorateur : chronométrer chaque appel de la fonction dans la phase `name`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# =============================================================================
+# FONCTIONS HELLOFRESH
+# =============================================================================
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+def hellofresh_week(week_offset):
+    """Semaine HelloFresh (format 2025-W45) et libellé pour un décalage donné"""
+    target_date = current_time() + timedelta(weeks=week_offset)
+    year = target_date.isocalendar()[0]
+    week_num = target_date.isocalendar()[1]
+    week = f"{year}-W{week_num:02d}"
+
+    week_label = "actuelle" if week_offset == 0 else f"{'prochaine' if week_offset == 1 else f'+{week_offset}'}" if week_offset > 0 else f"{week_offset}"
+    return week, week_label
+
+class BudgetExceeded(Exception):
+    """Attente du navigateur au-delà du budget de latence de son étape"""
+
+class LatencyBudget:
+    """
+    Budget de latence d'une étape du scraping (latency_budgets)
+
+    Toutes les attentes de l'étape puisent dans le même budget : chaque
+    timeout Playwright est le temps qui reste, et un dépassement est signalé
+    avec l'étape, le budget et ce qui était attendu.
+    """
+
+    def __init__(self, stage, label=None, budgets=None):
+        self.stage = stage
+        self.label = label
+        budgets = LATENCY_BUDGETS if budgets is None else budgets
+        self.seconds = budgets.get(stage, DEFAULT_LATENCY_BUDGETS.get(stage, 60))
+        self.deadline = time.monotonic() + self.seconds
+
+    def remaining_ms(self):
+        """Temps restant en millisecondes (au moins 1 : 0 veut dire « sans limite » pour Playwright)"""
+        return max(1, int((self.deadline - time.monotonic()) * 1000))
+
+    def expired(self):
+        return time.monotonic() >= self.deadline
+
+    def exceeded(self, waiting_for):
+        """Compter le dépassement et construire l'exception à lever"""
+        METRICS.count("budget_exceeded")
+        where = f" {self.label}" if self.label else ""
+        return BudgetExceeded(f"Budget {self.stage}{where} dépassé ({self.seconds:g}s) : {waiting_for}")
+
+# Ressources inutiles pour lire le menu (mode "lean")
+BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+BLOCKED_URL_PARTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "facebook.net", "facebook.com/tr", "hotjar.com", "segment.io", "segment.com",
+    "optimizely.com", "datadoghq", "sentry.io", "braze.com", "criteo",
+    "tiktok.com", "pinterest.com", "bing.com", "snapchat.com",
+)
+
+def block_heavy_resources(route):
+    """Handler de routage : annuler images, médias, polices et trackers"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(part in request.url for part in BLOCKED_URL_PARTS):
+        route.abort()
+    else:
+        route.continue_()
+
+def find_recipe_records(data, records):
+    """
+    Parcourir une réponse JSON et collecter les objets qui ressemblent à des recettes
+
+    Args:
+        data: JSON décodé
+        records: Dictionnaire {recipe_id: {'name', 'headline', 'url'}} complété sur place
+    """
+    if isinstance(data, dict):
+        recipe_id = data.get('id')
+        name = data.get('name')
+        if isinstance(recipe_id, str) and isinstance(name, str) and 'headline' in data:
+            records.setdefault(recipe_id, {
+                'name': name.strip(),
+                'headline': (data.get('headline') or '').strip(),
+                'url': data.get('websiteUrl'),
+            })
+        for value in data.values():
+            find_recipe_records(value, records)
+    elif isinstance(data, list):
+        for value in data:
+            find_recipe_records(value, records)
+
+def read_menu_responses(responses, records=None):
+    """Décoder les réponses JSON capturées et en extraire les recettes (complète `records`)"""
+    records = {} if records is None else records
+    for response in responses:
+        try:
+            if 'json' not in response.headers.get('content-type', ''):
+                continue
+            find_recipe_records(response.json(), records)
+        except Exception:
+            continue
+    return records
+
+# Lien de la fiche recette d'une carte du menu (URL absolue ou null)
+CARD_LINK_JS = "card => { const a = card.querySelector('a[href]') || card.closest('a[href]'); return a ? a.href : null; }"
+
+# Fiches des recettes lues pendant le scraping : titre → (nom, URL), pour
+# l'import des recettes sans correspondance (import_unmatched)
+_recipe_sources = {}
+
+def remember_recipe_source(title, name, url):
+    if url:
+        _recipe_sources[title] = (name, url)
+
+# Lecture de toutes les cartes du menu dans la page (null si #weekly-menu est absente)
+MENU_CARDS_JS = f"""() => {{
+    const menu = document.querySelector('#weekly-menu');
+    if (!menu) return null;
+    return Array.from(menu.querySelectorAll('[data-recipe-id]')).map(card => {{
+        const text = selector => {{
+            const element = card.querySelector(selector);
+            return element ? element.innerText.trim() : '';
+        }};
+        return {{
+            id: card.getAttribute('data-recipe-id'),
+            title: text("[data-test-id='product-name']"),
+            subtitle: text("[data-test-id='product-headline-screen-reader-text']"),
+            free: Array.from(card.querySelectorAll('span')).some(span => /offert/i.test(span.textContent)),
+            link: ({CARD_LINK_JS})(card),
+        }};
+    }});
+}}"""
+
+# Identifiants des cartes du menu affichées (null si #weekly-menu est absente)
+MENU_CARD_IDS_JS = """() => {
+    const menu = document.querySelector('#weekly-menu');
+    return menu ? Array.from(menu.querySelectorAll('[data-recipe-id]'), card => card.getAttribute('data-recipe-id')) : null;
+}"""
+
+# Attente du menu : intervalle entre deux vérifications (millisecondes), et
+# nombre de vérifications consécutives pendant lesquelles le nombre de cartes
+# ne doit plus changer
+MENU_POLL_MS = 100
+MENU_STABLE_POLLS = 5
+
+def wait_for_menu(page, budget, responses=()):
+    """
+    Attendre que l'onglet menu soit prêt à être lu
+
+    Le menu est prêt quand le nombre de cartes de #weekly-menu n'a pas
+    changé pendant MENU_STABLE_POLLS vérifications consécutives, que les
+    données JSON des cartes déjà affichées soient arrivées (mode "lean") ou
+    non : des cartes rendues plus tard n'auraient pas encore de JSON à
+    attendre. Une section vide et stable (semaine sans livraison) est
+    rendue de la même façon, sans attendre la fin du budget. Une page
+    renvoyée vers la connexion (session refusée) est rendue aussitôt.
+
+    Args:
+        budget: LatencyBudget de l'onglet
+        responses: Réponses XHR/fetch capturées, complétées pendant l'attente
+
+    Returns:
+        Recettes lues dans les réponses JSON ({} hors mode "lean")
+
+    Raises:
+        BudgetExceeded: menu toujours pas prêt à la fin du budget
+    """
+    records = {}
+    read = 0
+    count, stable_polls = None, 0
+    polls = 0
+
+    while True:
+        check_cancelled()
+
+        # Réponses arrivées depuis la dernière vérification
+        read_menu_responses(responses[read:], records)
+        read = len(responses)
+
+        try:
+            ids = page.evaluate(MENU_CARD_IDS_JS)
+        except Exception:
+            # Page en cours de navigation : contexte JavaScript pas encore prêt
+            ids = None
+
+        polls += 1
+        if not ids and session_rejected(page):
+            return records
+        if ids is not None:
+            if len(ids) == count:
+                stable_polls += 1
+            else:
+                count, stable_polls = len(ids), 1
+            if stable_polls >= MENU_STABLE_POLLS:
+                return records
+
+        # Onglet lu tard (mode batch, semaines suivantes) : le laisser
+        # prouver sa stabilité une fois avant de conclure au dépassement
+        if budget.expired() and polls >= MENU_STABLE_POLLS:
+            if ids is None:
+                raise budget.exceeded(f"section #weekly-menu absente ({page.url})")
+            if not ids:
+                raise budget.exceeded("aucune carte dans #weekly-menu (semaine sans livraison ?)")
+            raise budget.exceeded(f"{len(ids)} cartes dans #weekly-menu, toujours en chargement")
+
+        page.wait_for_timeout(min(MENU_POLL_MS, budget.remaining_ms()))
+
+def extract_menu_cards(page):
+    """
+    Lire toutes les cartes du menu en un seul aller-retour avec le navigateur
+
+    Returns:
+        Liste de {'id', 'title', 'subtitle', 'free', 'link'}, ou None si la
+        section #weekly-menu est absente
+    """
+    return page.evaluate(MENU_CARDS_JS)
+
+def titles_from_cards(cards):
+    """Titres (titre + sous-titre) des cartes lues par extract_menu_cards, hors recettes offertes"""
+    log(f"   Trouvé {len(cards)} recettes")
+
+    titles = []
+    for card in cards:
+        if card['free'] or not card['title']:
+            continue
+        full_title = f"{card['title']} {card['subtitle']}".strip()
+        remember_recipe_source(full_title, card['title'], card['link'])
+        titles.append(full_title)
+    return titles
+
+def titles_from_menu_data(cards, records):
+    """
+    Construire les titres à partir des données JSON du menu
+
+    Les cartes de #weekly-menu indiquent quelles recettes sont dans la box ;
+    le titre et le sous-titre viennent des réponses JSON capturées.
+
+    Returns:
+        Liste des titres, ou None si une carte n'a pas de données JSON
+    """
+    titles = []
+    for card in cards:
+        if card['free']:
+            continue
+        record = records.get(card['id'])
+        if not record or not record['name']:
+            return None
+        title = f"{record['name']} {record['headline']}".strip()
+        remember_recipe_source(title, record['name'], card.get('link') or record['url'])
+        titles.append(title)
+    return titles
+
+# Requêtes dont la réponse n'annonce pas sa taille (chunked, compressée) :
+# le corps est mesuré quand la requête se termine
+_unsized_requests = set()
+
+def count_browser_response(response):
+    """Handler de réponse : nombre de requêtes et octets reçus par le navigateur"""
+    METRICS.count("browser_responses")
+    length = response.headers.get('content-length')
+    if length is None:
+        _unsized_requests.add(response.request)
+        return
+    try:
+        METRICS.count("browser_bytes", int(length))
+    except ValueError:
+        pass
+
+def count_browser_body(request):
+    """Handler de fin de requête : taille reçue du corps d'une réponse sans content-length"""
+    if request not in _unsized_requests:
+        return
+    _unsized_requests.discard(request)
+    try:
+        METRICS.count("browser_bytes", request.sizes()['responseBodySize'])
+    except Exception:
+        pass
+
+def forget_browser_request(request):
+    """Handler d'échec de requête : plus de corps à mesurer"""
+    _unsized_requests.discard(request)
+
+def has_saved_auth_state(path=None, enabled=None):
+    """Vrai si une session HelloFresh sauvegardée est disponible (`enabled` : auth_state, par défaut celui du module)"""
+    if FIXTURE_MODE == "replay":
+        # Rejeu : la session enregistrée était-elle déjà authentifiée ?
+        return _fixture_manifest.get('saved_state', False)
+    enabled = AUTH_STATE if enabled is None else enabled
+    return enabled and os.path.exists(path or AUTH_STATE_PATH)
+
+def save_auth_state(context, path=None):
+    """Sauvegarder cookies/localStorage du contexte (fichier lisible par le seul utilisateur)"""
+    path = path or AUTH_STATE_PATH
+    state = context.storage_state()
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(state, f)
+    os.chmod(path, 0o600)
+    log(f"   Session HelloFresh sauvegardée: {path}")
+
+def session_rejected(page):
+    """Vrai si HelloFresh a renvoyé vers la connexion au lieu du compte"""
+    return '/my-account/' not in page.url or '/login' in page.url
+
+def extract_menu_titles(page):
+    """
+    Extraire les titres des recettes de la page menu, carte par carte
+
+    Solution de secours si la lecture en un aller-retour (extract_menu_cards)
+    échoue : plusieurs appels Playwright par carte.
+
+    Returns:
+        Liste des titres, ou None si la section #weekly-menu est absente
+    """
+    titles = []
+    weekly_menu_section = page.query_selector("#weekly-menu")
+
+    if not weekly_menu_section:
+        return None
+
+    recipe_cards = weekly_menu_section.query_selector_all("[data-recipe-id]")
+    log(f"   Trouvé {len(recipe_cards)} recettes")
+
+    for card in recipe_cards:
+        try:
+            # Ignorer les recettes offertes
+            is_free = card.query_selector("span:has-text('Offert')")
+            if is_free:
+                continue
+
+            # Récupérer le titre principal
+            title_elem = card.query_selector("[data-test-id='product-name']")
+            if not title_elem:
+                continue
+
+            title = title_elem.inner_text().strip()
+
+            # Récupérer le sous-titre
+            subtitle_elem = card.query_selector("[data-test-id='product-headline-screen-reader-text']")
+            if subtitle_elem:
+                subtitle = subtitle_elem.inner_text().strip()
+                full_title = f"{title} {subtitle}"
+            else:
+                full_title = title
+
+            if full_title:
+                # Toujours lu, comme dans titles_from_cards : en mode batch,
+                # import_unmatched peut n'être activé que dans un profil
+                remember_recipe_source(full_title, title, card.evaluate(CARD_LINK_JS))
+                titles.append(full_title)
+        except Exception as e:
+            log(f"   ⚠️  Carte illisible: {e}")
+            continue
+
+    return titles
+
+class DebugArtifacts:
+    """
+    Captures de debug du navigateur (screenshots, HTML, trace Playwright)
+
+    Niveaux :
+        - "none"       : aucune capture
+        - "on_failure" : screenshot + HTML uniquement quand une étape échoue
+        - "full"       : screenshot + HTML à chaque étape et trace Playwright
+
+    Chaque exécution a son propre dossier dans DEBUG_ARTIFACTS_DIR, créé
+    seulement à la première capture et suffixé par `label` (nom du foyer en
+    mode batch) ; seuls les `keep` derniers dossiers sont conservés.
+    """
+
+    def __init__(self, level=None, keep=None, base_dir=None, label=None):
+        self.level = level or DEBUG_ARTIFACTS
+        self.keep = keep if keep is not None else DEBUG_ARTIFACTS_KEEP
+        self.base_dir = base_dir or DEBUG_ARTIFACTS_DIR
+        self.label = label
+        self.run_dir = None
+        self.tracing = False
+
+    def _ensure_run_dir(self):
+        """Créer le dossier de l'exécution et supprimer les plus anciens"""
+        if self.run_dir:
+            return self.run_dir
+
+        os.makedirs(self.base_dir, exist_ok=True)
+        run_name = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        if self.label:
+            run_name += "-" + re.sub(r'[^A-Za-z0-9_-]+', '_', self.label)
+        self.run_dir = os.path.join(self.base_dir, run_name)
+        os.makedirs(self.run_dir, exist_ok=True)
+
+        runs = sorted(
+            entry for entry in os.listdir(self.base_dir)
+            if os.path.isdir(os.path.join(self.base_dir, entry))
+        )
+        for old_run in runs[:max(0, len(runs) - max(1, self.keep))]:
+            shutil.rmtree(os.path.join(self.base_dir, old_run), ignore_errors=True)
+
+        return self.run_dir
+
+    def _capture(self, page, name, level):
+        try:
+            run_dir = self._ensure_run_dir()
+            screenshot_path = os.path.join(run_dir, f"{name}.png")
+            page.screenshot(path=screenshot_path, full_page=True)
+            with open(os.path.join(run_dir, f"{name}.html"), 'w', encoding='utf-8') as f:
+                f.write(page.content())
+            log(f"   Capture sauvegardée: {screenshot_path}", level)
+            log(f"   URL actuelle: {page.url}", level)
+        except Exception as e:
+            log(f"   ⚠️  Capture impossible ({name}): {e}", level)
+
+    def step(self, page, name):
+        """Capturer une étape réussie (niveau "full" uniquement)"""
+        if self.level == "full":
+            self._capture(page, name, "info")
+
+    def failure(self, page, name):
+        """Capturer une étape en échec (sauf niveau "none")"""
+        if self.level in ("on_failure", "full"):
+            self._capture(page, name, "error")
+
+    def start_trace(self, context):
+        """Démarrer la trace Playwright du contexte (niveau "full")"""
+        if self.level != "full":
+            return
+        try:
+            context.tracing.start(screenshots=True, snapshots=True)
+            self.tracing = True
+        except Exception as e:
+            log(f"   ⚠️  Trace Playwright impossible: {e}")
+
+    def stop_trace(self, context):
+        """Arrêter la trace et l'enregistrer dans le dossier de l'exécution"""
+        if not self.tracing:
+            return
+        self.tracing = False
+        try:
+            trace_path = os.path.join(self._ensure_run_dir(), "trace.zip")
+            context.tracing.stop(path=trace_path)
+            log(f"   Trace Playwright sauvegardée: {trace_path}")
+        except Exception as e:
+            log(f"   ⚠️  Trace Playwright non sauvegardée: {e}")
+
+def launch_browser():
+    """
+    Lancer Playwright et Chromium (headless sauf si DEBUG)
+
+    Returns:
+        (playwright, browser) : fermer le navigateur puis arrêter playwright
+    """
+    from playwright.sync_api import sync_playwright
+
+    playwright = sync_playwright().start()
+    try:
+        browser = playwright.chromium.launch(headless=not DEBUG_MODE)
+    except Exception:
+        playwright.stop()
+        raise
+    return playwright, browser
+
+class HelloFreshSession:
+    """
+    Session navigateur HelloFresh authentifiée une seule fois
+
+    Le navigateur est lancé et le magic link ouvert une seule fois ; les
+    menus de plusieurs semaines sont ensuite chargés en parallèle dans des
+    onglets du même contexte.
+
+    Avec `browser`, la session n'ouvre qu'un contexte isolé dans un
+    navigateur déjà lancé (mode batch : un Chromium pour tous les foyers).
+    `settings` (résultat de parse_config) fournit la configuration du
+    foyer : URL, mode de scraping, session sauvegardée, budgets et captures ;
+    sans lui, celle du module. `name` distingue les dossiers de captures.
+
+    Usage:
+        with HelloFreshSession(magic_link, sub_id) as session:
+            recipes = session.get_weeks_recipes([0, 1, 2])
+    """
+
+    def __init__(self, magic_link, sub_id, browser=None, settings=None, name=None):
+        self.magic_link = magic_link
+        self.sub_id = sub_id
+        self.playwright = None
+        self.browser = browser
+        self.shared_browser = browser is not None
+        self.settings = settings or current_config()
+        self.auth_state_path = self.settings['AUTH_STATE_PATH']
+        self.context = None
+        self.uses_saved_state = False
+        self.artifacts = DebugArtifacts(self.settings['DEBUG_ARTIFACTS'], self.settings['DEBUG_ARTIFACTS_KEEP'],
+                                        self.settings['DEBUG_ARTIFACTS_DIR'], label=name)
+        # Budget de latence de chaque onglet menu, démarré à sa navigation
+        self.menu_budgets = {}
+
+    def __enter__(self):
+        try:
+            with METRICS.phase("browser_launch"):
+                self._launch()
+        except Exception:
+            self.close()
+            raise
+        return self
+
+    def _launch(self):
+        """Lancer Chromium et créer le contexte navigateur"""
+        if not self.shared_browser:
+            self.playwright, self.browser = launch_browser()
+
+        if FIXTURE_MODE == "replay":
+            # Toutes les réponses viennent du HAR enregistré, aucune requête réseau
+            self.uses_saved_state = has_saved_auth_state()
+            self.context = self.browser.new_context(user_agent=USER_AGENT)
+            self.context.route_from_har(fixture_path(FIXTURE_HAR), not_found="abort")
+        else:
+            self._new_context()
+
+        if self.settings['SCRAPING_MODE'] == "lean" and FIXTURE_MODE != "replay":
+            self.context.route("**/*", block_heavy_resources)
+
+        # Compter les réponses reçues par le navigateur et leur taille
+        self.context.on("response", count_browser_response)
+        self.context.on("requestfinished", count_browser_body)
+        self.context.on("requestfailed", forget_browser_request)
+
+        self.artifacts.start_trace(self.context)
+
+    def _new_context(self):
+        """Contexte navigateur (session sauvegardée si possible, HAR en mode --record)"""
+        options = {'user_agent': USER_AGENT}
+        if FIXTURE_MODE == "record":
+            options.update(record_har_path=fixture_path(FIXTURE_HAR), record_har_content="embed")
+
+        # Réutiliser la session sauvegardée lors d'une connexion précédente
+        self.uses_saved_state = has_saved_auth_state(self.auth_state_path, self.settings['AUTH_STATE'])
+        if self.uses_saved_state:
+            try:
+                self.context = self.browser.new_context(storage_state=self.auth_state_path, **options)
+            except Exception as e:
+                log(f"   ⚠️  Session sauvegardée illisible ({e})")
+                self.uses_saved_state = False
+        if not self.uses_saved_state:
+            self.context = self.browser.new_context(**options)
+
+        if FIXTURE_MODE == "record":
+            _fixture_manifest.update(saved_state=self.uses_saved_state,
+                                     magic_link_sha256=magic_link_digest(self.magic_link))
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self.context:
+            self.artifacts.stop_trace(self.context)
+            # Fermeture explicite : le HAR de --record n'est écrit qu'ici
+            self.context.close()
+            self.context = None
+        if self.browser and not self.shared_browser:
+            self.browser.close()
+        self.browser = None
+        if self.playwright:
+            self.playwright.stop()
+            self.playwright = None
+
+    def login(self):
+        """
+        Ouvrir le magic link pour authentifier le contexte navigateur
+
+        Returns:
+            True si la page du compte a été atteinte
+        """
+        log("🔐 Connexion à HelloFresh via magic link...", "always")
+
+        if not self.magic_link:
+            log("❌ Session HelloFresh expirée et aucun magic link fourni", "error")
+            return False
+
+        page = self.context.new_page()
+        budget = LatencyBudget("auth", budgets=self.settings['LATENCY_BUDGETS'])
+
+        try:
+            # Aller directement sur le lien magique
+            log("   Navigation vers le lien magique...")
+            try:
+                page.goto(self.magic_link, wait_until="commit", timeout=budget.remaining_ms())
+            except Exception as e:
+                if not budget.expired():
+                    raise
+                log(f"   ⏱️  {budget.exceeded('ouverture du magic link')} ({e})", "error")
+                self.artifacts.failure(page, "step1_magic_link_timeout")
+                return False
+
+            # Capture 1: Après clic sur magic link
+            self.artifacts.step(page, "step1_after_magic_link")
+            log(f"   URL après magic link: {page.url}")
+
+            # Le lien magique devrait nous authentifier et rediriger vers le menu
+            log("   Authentification en cours...")
+
+            # Attendre d'être sur la page du compte (redirections comprises),
+            # sans délai fixe : rendu dès que l'URL du compte est chargée
+            try:
+                page.wait_for_url("**/my-account/**", wait_until="domcontentloaded",
+                                  timeout=budget.remaining_ms())
+                log("   ✅ Authentification réussie")
+
+                # Capture 2: Après authentification
+                self.artifacts.step(page, "step2_after_auth")
+            except Exception:
+                # Vérifier si on est déjà sur la bonne page
+                if '/my-account/' not in page.url:
+                    if budget.expired():
+                        log(f"   ⏱️  {budget.exceeded(f'redirection vers le compte, page actuelle {page.url}')}", "error")
+                    log("   ⚠️  Redirection inattendue, tentative de navigation vers le menu...", "always")
+                    self.artifacts.failure(page, "step2_redirect_issue")
+
+            authenticated = '/my-account/' in page.url
+            # Le contexte porte maintenant la session (réutilisée par le mode démon)
+            self.uses_saved_state = authenticated
+            if authenticated and self.settings['AUTH_STATE']:
+                try:
+                    save_auth_state(self.context, self.auth_state_path)
+                except Exception as e:
+                    log(f"   ⚠️  Impossible de sauvegarder la session: {e}", "error")
+            return authenticated
+        finally:
+            page.close()
+
+    def get_weeks_recipes(self, week_offsets):
+        """
+        Récupérer les recettes de plusieurs semaines en parallèle
+
+        Args:
+            week_offsets: Décalages en semaines (0=semaine actuelle, 1=semaine prochaine...)
+
+        Returns:
+            Dictionnaire {week_offset: [titres]} (liste vide en cas d'erreur)
+        """
+        return dict(self.iter_weeks_recipes(week_offsets))
+
+    def iter_weeks_recipes(self, week_offsets):
+        """
+        Comme get_weeks_recipes, mais renvoie chaque semaine dès qu'elle est lue
+
+        Tous les onglets chargent en parallèle ; la semaine N est rendue
+        pendant que les suivantes continuent de charger.
+
+        Yields:
+            (week_offset, [titres])
+        """
+        return self.read_weeks(week_offsets, self.open_weeks(week_offsets))
+
+    def open_weeks(self, week_offsets):
+        """
+        S'authentifier si besoin et lancer le chargement des menus
+
+        Les onglets continuent de charger après le retour : le mode batch
+        ouvre ainsi les menus de tous les foyers avant d'en lire un.
+
+        Returns:
+            (pages, responses) de _open_menu_pages, ou None si l'authentification a échoué
+        """
+        check_cancelled()
+        if self.uses_saved_state:
+            log("🔐 Réutilisation de la session HelloFresh sauvegardée...", "always")
+        else:
+            with METRICS.phase("auth"):
+                self.login()
+
+        with METRICS.phase("menu_navigation"):
+            pages, responses = self._open_menu_pages(week_offsets)
+
+        # Session sauvegardée refusée : repasser par le magic link
+        if self.uses_saved_state and pages:
+            first_week, first_page = next(iter(pages.items()))
+            with METRICS.phase("auth"):
+                try:
+                    first_page.wait_for_load_state("domcontentloaded",
+                                                   timeout=self.menu_budgets[first_week].remaining_ms())
+                except Exception:
+                    pass
+                rejected = session_rejected(first_page)
+            if rejected:
+                log("   ⚠️  Session sauvegardée refusée, connexion via magic link", "always")
+                for page in pages.values():
+                    page.close()
+                self.context.clear_cookies()
+                self.uses_saved_state = False
+                with METRICS.phase("auth"):
+                    authenticated = self.login()
+                if not authenticated:
+                    return None
+                with METRICS.phase("menu_navigation"):
+                    pages, responses = self._open_menu_pages(week_offsets)
+
+        return pages, responses
+
+    def read_weeks(self, week_offsets, opened):
+        """
+        Lire les onglets ouverts par open_weeks, semaine par semaine
+
+        Yields:
+            (week_offset, [titres]) ; listes vides si l'authentification a échoué
+        """
+        if opened is None:
+            for week_offset in week_offsets:
+                yield week_offset, []
+            return
+
+        pages, responses = opened
+        try:
+            for week_offset, page in pages.items():
+                check_cancelled()
+                titles = self._read_menu_page(page, week_offset, responses[week_offset])
+                page.close()
+                if FIXTURE_MODE == "record":
+                    # Titres lus, pour rejouer le matching même sans navigateur
+                    _fixture_manifest.setdefault('menus', {})[str(week_offset)] = titles
+                yield week_offset, titles
+        finally:
+            # Annulation : ne pas laisser d'onglets ouverts (navigateur du démon)
+            for page in pages.values():
+                if not page.is_closed():
+                    page.close()
+
+    def _open_menu_pages(self, week_offsets):
+        """
+        Ouvrir un onglet par semaine et lancer les navigations vers les menus
+
+        Returns:
+            (pages, responses) : onglets et réponses capturées par semaine
+        """
+        # Lancer toutes les navigations avant d'en attendre une : le
+        # navigateur charge les onglets en même temps
+        pages = {}
+        responses = {}
+        for week_offset in week_offsets:
+            week, week_label = hellofresh_week(week_offset)
+            log(f"📋 Récupération des recettes semaine {week_label} ({week})...", "always")
+
+            menu_url = f"{self.settings['HELLOFRESH_URL']}/my-account/deliveries/menu?week={week}&subscriptionId={self.sub_id}&locale=fr-FR"
+            log(f"   Navigation vers: {menu_url}", "always")
+
+            page = self.context.new_page()
+            pages[week_offset] = page
+            budget = self.menu_budgets[week_offset] = LatencyBudget("menu", week, self.settings['LATENCY_BUDGETS'])
+
+            # Capturer les réponses XHR/fetch : ce sont elles qui alimentent les cartes du menu
+            captured = responses[week_offset] = []
+            if self.settings['SCRAPING_MODE'] == "lean":
+                page.on("response", lambda response, captured=captured:
+                        captured.append(response) if response.request.resource_type in ("xhr", "fetch") else None)
+
+            try:
+                page.goto(menu_url, wait_until="commit", timeout=budget.remaining_ms())
+            except Exception as e:
+                log(f"❌ Erreur semaine {week}: {e}", "error")
+
+        return pages, responses
+
+    def _read_menu_page(self, page, week_offset, responses=()):
+        """
+        Attendre le chargement d'un onglet menu et en extraire les titres
+
+        L'attente s'arrête dès que le menu est prêt (wait_for_menu), dans la
+        limite du budget "menu". En mode "lean", les titres viennent des
+        réponses JSON du menu ; le parcours du DOM carte par carte reste la
+        solution de secours.
+        """
+        week, _ = hellofresh_week(week_offset)
+        budget = self.menu_budgets.get(week_offset) or LatencyBudget("menu", week, self.settings['LATENCY_BUDGETS'])
+
+        try:
+            with METRICS.phase("menu_navigation"):
+                try:
+                    records = wait_for_menu(page, budget, responses)
+                except BudgetExceeded as e:
+                    log(f"❌ {e}", "error")
+                    self.artifacts.failure(page, f"menu_timeout_{week}")
+                    return []
+
+            # Capture 3: Page du menu
+            self.artifacts.step(page, f"step3_menu_page_{week}")
+            log(f"   URL actuelle: {page.url}")
+
+            with METRICS.phase("card_extraction"):
+                titles = None
+                try:
+                    cards = extract_menu_cards(page)
+                except Exception as e:
+                    log(f"   ⚠️  Lecture groupée des cartes impossible ({e}), lecture carte par carte")
+                    titles = extract_menu_titles(page)
+                else:
+                    if cards and records:
+                        titles = titles_from_menu_data(cards, records)
+                        if titles is not None:
+                            log(f"   {len(cards)} recettes lues depuis les données JSON du menu")
+
+                    if cards is not None and titles is None:
+                        titles = titles_from_cards(cards)
+
+            if titles is None:
+                log(f"❌ Section #weekly-menu non trouvée ({week})", "error")
+                self.artifacts.failure(page, f"menu_not_found_{week}")
+                return []
+
+            log(f"✅ {len(titles)} recettes trouvées ({week})\n")
+
+            return titles
+
+        except Exception as e:
+            log(f"❌ Erreur: {e}", "error")
+            self.artifacts.failure(page, f"error_{week}")
+            return []
+
+# Session navigateur gardée ouverte par le mode démon (None sinon)
+_warm_session = None
+
+@contextmanager
+def hellofresh_session(magic_link, sub_id):
+    """Session du démon si elle existe (avec le nouveau magic link), sinon une session jetable"""
+    if _warm_session is not None:
+        if magic_link:
+            _warm_session.magic_link = magic_link
+        yield _warm_session
+        return
+
+    with HelloFreshSession(magic_link, sub_id) as session:
+        yield session
+
+@timed_phase("scrape")
+def get_weeks_recipes_with_magic_link(magic_link, sub_id, week_offsets):
+    """
+    Récupérer les recettes de plusieurs semaines avec une seule session navigateur
+
+    Returns:
+        Dictionnaire {week_offset: [titres]}
+    """
+    try:
+        with hellofresh_session(magic_link, sub_id) as session:
+            return session.get_weeks_recipes(week_offsets)
+    except Exception as e:
+        log(f"❌ Erreur: {e}", "error")
+        return {week_offset: [] for week_offset in week_offsets}
+
+def iter_weeks_recipes_with_magic_link(magic_link, sub_id, week_offsets):
+    """
+    Récupérer les recettes de plusieurs semaines, chacune dès qu'elle est prête
+
+    Yields:
+        (week_offset, [titres]) ; liste vide pour les semaines en erreur
+    """
+    done = set()
+    try:
+        with hellofresh_session(magic_link, sub_id) as session:
+            for week_offset, titles in session.iter_weeks_recipes(week_offsets):
+                done.add(week_offset)
+                yield week_offset, titles
+    except Exception as e:
+        log(f"❌ Erreur: {e}", "error")
+        for week_offset in week_offsets:
+            if week_offset not in done:
+                yield week_offset, []
+
+def get_current_week_recipes_with_magic_link(magic_link, sub_id, week_offset=0):
+    """
+    Récupérer les recettes de la commande HelloFresh
+    en utilisant un lien magique (magic link) reçu par email
+
+    Args:
+        magic_link: URL du magic link HelloFresh
+        sub_id: ID de souscription
+        week_offset: Décalage en semaines (0=semaine actuelle, 1=semaine prochaine, -1=semaine dernière)
+    """
+    return get_weeks_recipes_with_magic_link(magic_link, sub_id, [week_offset])[week_offset]
+
+
+# =============================================================================
+# FONCTIONS MEALIE
+# =============================================================================
+
+# Codes HTTP pour lesquels une requête Mealie est retentée
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Méthodes rejouables sans risque : les autres (POST, PATCH) ne sont retentées
+# que si Mealie n'a pas pu les recevoir (connexion impossible, 429)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+def request_not_sent(error):
+    """Vrai si l'erreur réseau est survenue avant l'envoi de la requête (connexion jamais établie)"""
+    import requests
+    import urllib3
+
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', reason)
+    return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+# Générateur propre à l'étalement des retentatives : il ne consomme pas le
+# générateur global, semé à l'identique par --record/--replay pour la
+# répartition des recettes sur les jours
+_jitter_random = random.Random()
+
+# Résultat d'une requête d'un lot (`key` identifie la requête pour les logs)
+MealieResult = namedtuple('MealieResult', ['key', 'ok', 'status', 'data', 'error'])
+
+class MealieClient:
+    """
+    Client HTTP Mealie : session keep-alive partagée, retries et écritures parallèles
+
+    Les connexions sont réutilisées entre les requêtes (pool de la taille du
+    parallélisme) ; les réponses 429/5xx et les erreurs réseau sont retentées
+    avec un backoff exponentiel (ou le délai Retry-After du serveur). Une
+    écriture POST/PATCH n'est retentée que si Mealie ne l'a pas reçue
+    (connexion impossible, 429) : après un 502/504 ou un timeout de lecture,
+    elle a pu être appliquée, la renvoyer créerait un doublon.
+    """
+
+    def __init__(self, base_url, token, parallelism=4, max_retries=3, pool_size=None):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.parallelism = max(1, parallelism)
+        self.max_retries = max_retries
+
+        # Le pool couvre aussi les lectures parallèles du catalogue
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1,
+                                                pool_maxsize=max(self.parallelism, pool_size or 0))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def url(self, path):
+        return f"{self.base_url}{path}"
+
+    def request(self, method, path, **kwargs):
+        """
+        Envoyer une requête avec retries sur 429/5xx et erreurs réseau
+
+        Args:
+            retry_unsafe: Retenter aussi un POST/PATCH après un 5xx ou un
+                          timeout (écriture connue pour être sans effet en double)
+
+        Returns:
+            La dernière réponse obtenue (l'appelant vérifie le status_code)
+        """
+        import requests
+
+        kwargs.setdefault('timeout', 30)
+        retry_unsafe = kwargs.pop('retry_unsafe', False)
+        safe = retry_unsafe or method.upper() in IDEMPOTENT_METHODS
+
+        for attempt in range(self.max_retries + 1):
+            METRICS.count("mealie_requests")
+            try:
+                response = self.session.request(method, self.url(path), **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries or not (safe or request_not_sent(e)):
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+
+            METRICS.count("mealie_bytes", len(response.content))
+
+            retry = response.status_code in RETRY_STATUS_CODES and (safe or response.status_code == 429)
+            if not retry or attempt >= self.max_retries:
+                if _mealie_recorder:
+                    _mealie_recorder.record(response, self.base_url)
+                return response
+
+            METRICS.count("mealie_retries")
+
+            time.sleep(self._backoff(attempt, response.headers.get('Retry-After')))
+
+        return response
+
+    def _backoff(self, attempt, retry_after=None):
+        """Délai avant la prochaine tentative (en secondes)"""
+        if retry_after:
+            try:
+                return min(float(retry_after), 30)
+            except ValueError:
+                pass
+        return min(0.5 * 2 ** attempt + _jitter_random.uniform(0, 0.25), 30)
+
+    def get(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def run_batch(self, calls, parallelism=None, on_result=None):
+        """
+        Exécuter un lot de requêtes en parallèle (parallélisme borné)
+
+        Args:
+            calls: Liste de (key, method, path, kwargs)
+            parallelism: Requêtes simultanées (par défaut celui du client)
+            on_result: Appelé avec (index de l'appel, MealieResult) dès
+                       qu'une requête se termine, depuis le thread qui l'a faite
+
+        Returns:
+            Liste de MealieResult, dans l'ordre des appels
+        """
+        def execute(key, method, path, kwargs):
+            try:
+                response = self.request(method, path, **kwargs)
+            except Exception as e:
+                return MealieResult(key, False, None, None, str(e))
+
+            ok = 200 <= response.status_code < 300
+            try:
+                data = response.json() if ok and response.content else None
+            except ValueError:
+                data = None
+            return MealieResult(key, ok, response.status_code, data,
+                                None if ok else f"Erreur {response.status_code}")
+
+        def run(index):
+            result = execute(*calls[index])
+            if on_result:
+                on_result(index, result)
+            return result
+
+        if not calls:
+            return []
+
+        workers = min(parallelism or self.parallelism, len(calls))
+        if workers == 1:
+            return [run(index) for index in range(len(calls))]
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(run, range(len(calls))))
+
+_mealie_client = None
+_mealie_client_lock = threading.Lock()
+
+def get_mealie_client():
+    """Client Mealie partagé par toutes les requêtes du processus"""
+    global _mealie_client
+    with _mealie_client_lock:
+        if _mealie_client is None:
+            _mealie_client = MealieClient(MEALIE_URL, MEALIE_TOKEN,
+                                          parallelism=MEALIE_PARALLELISM,
+                                          max_retries=MEALIE_MAX_RETRIES,
+                                          pool_size=CATALOG_FETCH_PARALLELISM)
+        return _mealie_client
+
+# Taille des pages de /api/recipes
+RECIPES_PER_PAGE = 100
+
+def fetch_recipes_page(page, extra_params=None):
+    """
+    Lire une page de /api/recipes, réduite aux champs utiles au catalogue
+
+    Returns:
+        (enregistrements (id, nom, slug, date), nombre total de pages ou None)
+    """
+    params = {'page': page, 'perPage': RECIPES_PER_PAGE}
+    if extra_params:
+        params.update(extra_params)
+    response = get_mealie_client().get('/api/recipes', params=params)
+    response.raise_for_status()
+
+    data = response.json()
+    del response
+
+    items = data.get('items') or []
+    records = [(r['id'], r['name'], r.get('slug'), recipe_updated_at(r)) for r in items]
+    return records, data.get('total_pages')
+
+def iter_mealie_recipes(extra_params=None):
+    """
+    Paginer /api/recipes et renvoyer les recettes au fil de l'eau
+
+    Seuls les champs utiles au catalogue sont gardés : chaque page est
+    réduite dès sa lecture, le JSON complet des résumés n'est jamais
+    conservé (la mémoire ne dépend pas de la taille de la bibliothèque).
+
+    La première page donne le nombre total de pages ; les suivantes sont
+    lues en parallèle (au plus `catalog_fetch_parallelism` à la fois) et
+    renvoyées dans l'ordre. Sans total_pages (anciennes versions de
+    Mealie), les pages sont lues une par une jusqu'à une page incomplète.
+
+    Args:
+        extra_params: Paramètres supplémentaires (tri, filtre...)
+
+    Yields:
+        (id, nom, slug, date de modification)
+    """
+    records, total_pages = fetch_recipes_page(1, extra_params)
+    yield from records
+
+    if total_pages is None:
+        page = 1
+        while len(records) == RECIPES_PER_PAGE:
+            page += 1
+            records, _ = fetch_recipes_page(page, extra_params)
+            yield from records
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    pages = iter(range(2, total_pages + 1))
+    workers = max(1, CATALOG_FETCH_PARALLELISM)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Fenêtre glissante : au plus `workers` pages en vol, rendues dans l'ordre
+        pending = deque(executor.submit(fetch_recipes_page, page, extra_params)
+                        for page in itertools.islice(pages, workers))
+        while pending:
+            records, _ = pending.popleft().result()
+            for page in itertools.islice(pages, 1):
+                pending.append(executor.submit(fetch_recipes_page, page, extra_params))
+            yield from records
+
+def count_mealie_recipes():
+    """Nombre total de recettes dans Mealie (une seule requête minimale)"""
+    response = get_mealie_client().get('/api/recipes', params={'page': 1, 'perPage': 1})
+    response.raise_for_status()
+    return response.json().get('total')
+
+def remote_catalog_version():
+    """Version du catalogue côté Mealie (nombre de recettes, dernière modification) en une requête minimale"""
+    response = get_mealie_client().get('/api/recipes', params={
+        'page': 1, 'perPage': 1, 'orderBy': 'updatedAt', 'orderDirection': 'desc',
+    })
+    response.raise_for_status()
+    data = response.json()
+    items = data.get('items') or []
+    return data.get('total'), recipe_updated_at(items[0]) if items else None
+
+def recipe_updated_at(recipe):
+    """Date de modification d'une recette (le champ a changé de nom selon les versions de Mealie)"""
+    return recipe.get('updatedAt') or recipe.get('updateAt') or recipe.get('dateUpdated') or ""
+
+class MealieCatalog:
+    """
+    Catalogue Mealie compact : noms en minuscules (internés) et ids en
+    tableaux parallèles
+
+    S'utilise comme l'ancien dictionnaire {nom en minuscules: id} (`items()`,
+    `in`, `[nom]`), mais deux recettes au même nom sont toutes les deux
+    conservées : `[nom]` renvoie la première, les matchers voient les deux.
+    """
+
+    __slots__ = ('names', 'ids', '_positions', '_version')
+
+    def __init__(self, records=()):
+        self.names = []
+        self.ids = []
+        self._positions = None
+        self._version = None
+        for name, recipe_id in records:
+            self.append(name, recipe_id)
+
+    def append(self, name, recipe_id):
+        self.names.append(sys.intern(name.lower()))
+        self.ids.append(recipe_id)
+        self._positions = None
+        self._version = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        return zip(self.names, self.ids)
+
+    items = __iter__
+
+    def _first_positions(self):
+        """Position de la première recette de chaque nom (construit à la demande)"""
+        if self._positions is None:
+            positions = {}
+            for position, name in enumerate(self.names):
+                positions.setdefault(name, position)
+            self._positions = positions
+        return self._positions
+
+    def __contains__(self, name):
+        return name in self._first_positions()
+
+    def __getitem__(self, name):
+        return self.ids[self._first_positions()[name]]
+
+    def names_by_id(self):
+        """Dictionnaire {id: nom en minuscules}"""
+        return dict(zip(self.ids, self.names))
+
+    def version(self):
+        """Empreinte du catalogue (ids et noms des recettes), recalculée après un ajout"""
+        if self._version is None:
+            digest = hashlib.sha256()
+            for name, recipe_id in self:
+                digest.update(f"{recipe_id}\t{name}\n".encode('utf-8'))
+            self._version = digest.hexdigest()
+        return self._version
+
+class MealieCatalogCache:
+    """
+    Catalogue Mealie persistant (SQLite) synchronisé de manière incrémentale
+
+    Stocke id, nom, slug et date de modification de chaque recette. Les
+    exécutions suivantes ne téléchargent que les recettes ajoutées ou
+    modifiées depuis la dernière synchro ; un rafraîchissement complet est
+    fait périodiquement, si le nombre de recettes ne correspond plus (ce qui
+    signale une suppression), ou si une recette a été ajoutée (une
+    suppression peut s'y cacher à total égal).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS recipes ("
+            "id TEXT PRIMARY KEY, name TEXT NOT NULL, slug TEXT, updated_at TEXT)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    def last_updated_at(self):
+        return self.db.execute("SELECT MAX(updated_at) FROM recipes").fetchone()[0]
+
+    def needs_full_refresh(self):
+        """Vrai si le cache est vide ou si le dernier rafraîchissement complet est trop ancien"""
+        last_full = self.get_meta('last_full_sync')
+        if not last_full or self.count() == 0 or not self.last_updated_at():
+            return True
+        age = time.time() - float(last_full)
+        return age > CATALOG_FULL_REFRESH_HOURS * 3600
+
+    def upsert(self, records):
+        """
+        Écrire des recettes (id, nom, slug, date) au fil de l'eau
+
+        Returns:
+            Nombre de recettes écrites
+        """
+        written = 0
+
+        def counted():
+            nonlocal written
+            for record in records:
+                written += 1
+                yield record
+
+        self.db.executemany(
+            "INSERT OR REPLACE INTO recipes (id, name, slug, updated_at) VALUES (?, ?, ?, ?)",
+            counted()
+        )
+        return written
+
+    def replace_all(self, records):
+        self.db.execute("DELETE FROM recipes")
+        written = self.upsert(records)
+        now = time.time()
+        self.set_meta('last_full_sync', now)
+        self.set_meta('last_sync', now)
+        self.db.commit()
+        return written
+
+    def apply_changes(self, records):
+        written = self.upsert(records)
+        self.set_meta('last_sync', time.time())
+        self.db.commit()
+        return written
+
+    def load_catalog(self):
+        """Catalogue compact, lu ligne à ligne dans l'ordre d'insertion"""
+        return MealieCatalog(self.db.execute("SELECT name, id FROM recipes ORDER BY rowid"))
+
+    def sync(self, force_full=False):
+        """
+        Mettre à jour le cache depuis Mealie
+
+        Returns:
+            Nombre de recettes téléchargées
+        """
+        import requests
+
+        if force_full or self.needs_full_refresh():
+            log("   Rafraîchissement complet du catalogue...")
+            return self.replace_all(iter_mealie_recipes())
+
+        since = self.last_updated_at()
+        count_before = self.count()
+        try:
+            changed = self.apply_changes(iter_mealie_recipes({
+                'orderBy': 'updatedAt',
+                'orderDirection': 'asc',
+                'queryFilter': f'updatedAt >= "{since}"',
+            }))
+        except requests.exceptions.HTTPError as e:
+            # Version de Mealie sans filtre sur la date : synchro complète
+            self.db.rollback()
+            log(f"   ⚠️  Synchro incrémentale refusée ({e}), rafraîchissement complet")
+            return self.sync(force_full=True)
+        added = self.count() - count_before
+        log(f"   {changed} recette(s) ajoutée(s)/modifiée(s) depuis la dernière synchro")
+
+        # Une suppression ne laisse pas de trace dans le filtre par date :
+        # si les totaux divergent, on repart d'un catalogue complet. Une
+        # suppression accompagnée d'un ajout (recette réimportée, remplacée)
+        # peut garder les totaux égaux : tout ajout déclenche aussi un
+        # rafraîchissement complet, les ajouts étant rares.
+        total = count_mealie_recipes()
+        if total is not None and total != self.count():
+            log(f"   Catalogue désynchronisé ({self.count()} en cache, {total} dans Mealie)")
+            return changed + self.replace_all(iter_mealie_recipes())
+        if added:
+            log(f"   {added} nouvelle(s) recette(s), vérification des suppressions par rafraîchissement complet")
+            return changed + self.replace_all(iter_mealie_recipes())
+
+        return changed
+
+# Dernier catalogue chargé (depuis le cache local ou directement depuis
+# Mealie), avec sa version (origine, nombre de recettes, dernière
+# modification) : tant qu'elle ne change pas, le même objet est renvoyé et
+# les index de matching restent valables (mode démon, semaines successives)
+_loaded_catalog = None
+
+@timed_phase("catalog")
+def get_all_mealie_recipes(force_refresh=False):
+    """
+    Récupérer toutes les recettes de Mealie
+
+    Args:
+        force_refresh: Ignorer le cache local et tout retélécharger
+
+    Returns:
+        MealieCatalog (vide en cas d'erreur)
+    """
+    global _loaded_catalog
+    log("📚 Chargement des recettes Mealie...")
+    
+    try:
+        if CATALOG_CACHE:
+            try:
+                cache = MealieCatalogCache(CATALOG_CACHE_PATH)
+            except sqlite3.Error as e:
+                log(f"   ⚠️  Cache catalogue inutilisable ({e}), chargement complet", "error")
+                cache = None
+
+            if cache:
+                try:
+                    cache.sync(force_full=force_refresh)
+                    version = ('cache', cache.count(), cache.last_updated_at())
+                    if _loaded_catalog and _loaded_catalog[0] == version:
+                        all_recipes = _loaded_catalog[1]
+                    else:
+                        all_recipes = cache.load_catalog()
+                        _loaded_catalog = (version, all_recipes)
+                finally:
+                    cache.close()
+
+                log(f"✅ {len(all_recipes)} recettes dans Mealie\n")
+                return all_recipes
+
+        # Sans cache local : le catalogue en mémoire est gardé tant que
+        # Mealie annonce le même nombre de recettes et la même dernière
+        # modification (version lue avant le téléchargement : un changement
+        # pendant celui-ci sera vu à l'appel suivant)
+        try:
+            version = ('remote',) + remote_catalog_version()
+        except Exception as e:
+            log(f"   ⚠️  Version du catalogue illisible ({e}), chargement complet")
+            version = None
+        if version and _loaded_catalog and _loaded_catalog[0] == version and not force_refresh:
+            all_recipes = _loaded_catalog[1]
+            log(f"✅ {len(all_recipes)} recettes dans Mealie (catalogue en mémoire inchangé)\n")
+            return all_recipes
+
+        all_recipes = MealieCatalog((name, recipe_id) for recipe_id, name, _, _ in iter_mealie_recipes())
+        _loaded_catalog = (version, all_recipes) if version else None
+        
+        log(f"✅ {len(all_recipes)} recettes dans Mealie\n")
+        return all_recipes
+        
+    except Exception as e:
+        log(f"❌ Erreur Mealie: {e}", "error")
+        return MealieCatalog()
+
+def get_week_mealplans(start_date, end_date):
+    """
+    Lire les meal plans d'une semaine dans Mealie
+
+    Returns:
+        Liste des entrées (dictionnaires renvoyés par l'API)
+    """
+    params = {
+        'start_date': start_date.strftime('%Y-%m-%d'),
+        'end_date': end_date.strftime('%Y-%m-%d'),
+        'perPage': 100
+    }
+
+    response = get_mealie_client().get('/api/households/mealplans', params=params)
+    response.raise_for_status()
+
+    meal_plans = response.json()
+
+    if isinstance(meal_plans, dict) and 'items' in meal_plans:
+        meal_plans = meal_plans['items']
+
+    return meal_plans if isinstance(meal_plans, list) else []
+
+@timed_phase("delete")
+def delete_week_mealplans(start_date, end_date):
+    """
+    Supprimer tous les meal plans d'une semaine dans Mealie
+    """
+    log(f"🗑️  Suppression des meal plans ({start_date.strftime('%d/%m')} - {end_date.strftime('%d/%m')})...")
+    
+    try:
+        writes = delete_writes(get_week_mealplans(start_date, end_date))
+        
+        if writes:
+            deleted_count = apply_week_writes(writes)
+            log(f"   ✅ {deleted_count} meal plans supprimés\n")
+        else:
+            log("   ℹ️  Aucun meal plan à supprimer\n")
+    
+    except Exception as e:
+        log(f"   ⚠️  Erreur suppression: {str(e)}\n")
+
+@timed_phase("create")
+def create_meal_plan(recipe_ids, start_date):
+    """
+    Créer un meal plan dans Mealie (ordre randomisé)
+    """
+    log("📅 Création du meal plan...")
+    
+    created = apply_week_writes(create_writes(recipe_ids, start_date))
+    
+    log("")
+    return created
+
+def similarity(a, b):
+    """Calculer la similarité entre deux chaînes"""
+    from difflib import SequenceMatcher
+
+    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+
+def match_recipe(hf_title, mealie_recipes):
+    """
+    Trouver la recette Mealie correspondante (comparaison exhaustive)
+    """
+    best_match = None
+    best_score = 0
+    
+    for mealie_title, mealie_id in mealie_recipes.items():
+        score = similarity(hf_title, mealie_title)
+        
+        if score > best_score:
+            best_score = score
+            best_match = (mealie_title, mealie_id, score)
+    
+    if best_match and best_match[2] >= MATCHING_THRESHOLD:
+        return best_match
+    
+    return best_match if best_match else None
+
+# =============================================================================
+# MATCHING INDEXÉ
+# =============================================================================
+
+NGRAM_SIZE = 3
+
+def title_ngrams(title):
+    """Découper un titre (déjà en minuscules) en trigrammes de caractères"""
+    padded = f" {title} "
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+def rank_candidates(hf_title, names, ids, positions, k):
+    """
+    Les k meilleures recettes parmi `positions` (score SequenceMatcher)
+
+    Returns:
+        Liste de (mealie_title, mealie_id, score), score décroissant puis ordre du catalogue
+    """
+    from difflib import SequenceMatcher
+
+    hf_lower = hf_title.lower()
+    scored = [(SequenceMatcher(None, hf_lower, names[position]).ratio(), position) for position in positions]
+    best = heapq.nsmallest(k, scored, key=lambda item: (-item[0], item[1]))
+    return [(names[position], ids[position], score) for score, position in best]
+
+def length_ratio_bound(a_length, b_length):
+    """Majorant du score SequenceMatcher d'après les seules longueurs (real_quick_ratio)"""
+    total = a_length + b_length
+    return 2.0 * min(a_length, b_length) / total if total else 1.0
+
+def lcs_masks(text):
+    """Masques de bits de chaque caractère de `text`, pour lcs_length"""
+    masks = {}
+    for i, char in enumerate(text):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+def lcs_length(text, masks, other):
+    """
+    Longueur de la plus longue sous-séquence commune à `text` et `other`
+    (algorithme bit-parallèle de Hyyrö, `masks` = lcs_masks(text))
+
+    Les blocs trouvés par SequenceMatcher forment une sous-séquence commune :
+    2 * LCS / (longueurs) majore donc son ratio.
+    """
+    full = (1 << len(text)) - 1
+    row = full
+    for char in other:
+        matched = row & masks.get(char, 0)
+        row = ((row + matched) | (row - matched)) & full
+    return len(text) - bin(row).count("1")
+
+class RecipeMatcher:
+    """
+    Index inversé de trigrammes sur le catalogue Mealie
+
+    L'index est construit une seule fois (au premier titre à matcher, pour ne
+    rien payer quand tout vient du cache) ; pour chaque titre HelloFresh on
+    calcule d'abord la similarité exacte (SequenceMatcher) des `candidates`
+    recettes qui partagent le plus de trigrammes. Les autres recettes ne
+    sont comparées que si leurs majorants (longueur, lettres communes, plus
+    longue sous-séquence commune) peuvent encore battre ce score et
+    atteindre matching_threshold : toute recette retenue au-dessus du seuil
+    est celle de la comparaison exhaustive. Le mode "exhaustive" conserve
+    l'ancien comportement (comparaison avec tout le catalogue).
+    """
+
+    def __init__(self, mealie_recipes, mode=None, candidates=None):
+        self.mealie_recipes = mealie_recipes
+        self.mode = mode or MATCHING_MODE
+        self.candidates = candidates or MATCHING_CANDIDATES
+        self.names = []
+        self.ids = []
+        self.gram_counts = []
+        self.postings = {}
+        # Longueurs des noms triées, et positions dans le même ordre
+        self.sorted_lengths = []
+        self.length_order = []
+        self.indexed = False
+
+    def _build_index(self):
+        """Construire l'index trigramme → positions dans le catalogue"""
+        # Les tableaux du catalogue sont partagés, pas recopiés
+        self.names = self.mealie_recipes.names
+        self.ids = self.mealie_recipes.ids
+        self._index_from(0)
+
+        self.indexed = True
+        log(f"   Index de matching: {len(self.names)} recettes, {len(self.postings)} trigrammes")
+
+    def _index_from(self, start):
+        """Ajouter à l'index les recettes du catalogue à partir de `start`"""
+        for position in range(start, len(self.names)):
+            grams = title_ngrams(self.names[position])
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+
+        # Tri stable : à longueur égale, l'ordre du catalogue est conservé
+        self.length_order = sorted(range(len(self.names)), key=lambda position: len(self.names[position]))
+        self.sorted_lengths = [len(self.names[position]) for position in self.length_order]
+
+    def extend(self):
+        """Indexer les recettes ajoutées au catalogue depuis la construction de l'index"""
+        if self.indexed:
+            self._index_from(len(self.gram_counts))
+
+    def _candidate_positions(self, hf_grams):
+        """Sélectionner les recettes les plus proches selon les trigrammes communs"""
+        shared = {}
+        for gram in hf_grams:
+            for position in self.postings.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        if not shared:
+            return []
+
+        # Coefficient de Dice sur les trigrammes pour classer les candidats
+        hf_count = len(hf_grams)
+        ranked = sorted(
+            shared,
+            key=lambda pos: 2 * shared[pos] / (hf_count + self.gram_counts[pos]),
+            reverse=True,
+        )
+
+        # Remettre dans l'ordre du catalogue pour départager les égalités
+        # exactement comme le mode exhaustif
+        return sorted(ranked[:self.candidates])
+
+    def prepare(self):
+        """Construire l'index tout de suite (mode démon) plutôt qu'au premier titre"""
+        if self.mode != "exhaustive" and not self.indexed:
+            self._build_index()
+
+    def match(self, hf_title):
+        """
+        Trouver la recette Mealie correspondante
+
+        Returns:
+            (mealie_title, mealie_id, score) ou None si le catalogue est vide
+        """
+        if self.mode == "exhaustive":
+            return match_recipe(hf_title, self.mealie_recipes)
+
+        if not self.indexed:
+            self._build_index()
+
+        hf_lower = hf_title.lower()
+        positions = self._candidate_positions(title_ngrams(hf_lower))
+
+        # Aucun trigramme commun : on retombe sur la comparaison exhaustive
+        if not positions:
+            return match_recipe(hf_title, self.mealie_recipes)
+
+        best = self._exact_top(hf_lower, positions, 1)
+        if not best or best[0][0] <= 0:
+            return None
+
+        score, position = best[0]
+        return (self.names[position], self.ids[position], score)
+
+    def _exact_top(self, hf_lower, positions, k):
+        """
+        Les k meilleures recettes du catalogue au-dessus du seuil, exactement
+        comme la comparaison exhaustive (score décroissant puis ordre du
+        catalogue)
+
+        Les `positions` présélectionnées sont scorées d'abord ; une autre
+        recette n'est comparée que si les majorants de son score (longueur,
+        lettres communes comme quick_ratio, plus longue sous-séquence
+        commune) atteignent à la fois
+        matching_threshold et le k-ième meilleur score déjà trouvé. Sous le
+        seuil, les places restantes sont prises par les présélectionnées :
+        la décision (recette planifiée ou non) reste celle du mode exhaustif.
+
+        Returns:
+            Liste de (score, position), meilleure en premier
+        """
+        from difflib import SequenceMatcher
+
+        def key(item):
+            return (-item[0], item[1])
+
+        scored = [(SequenceMatcher(None, hf_lower, self.names[position]).ratio(), position)
+                  for position in positions]
+        top = heapq.nsmallest(k, scored, key=key)
+        floor = max(MATCHING_THRESHOLD, top[-1][0] if len(top) == k else 0.0)
+
+        # Fenêtre de longueurs dont le majorant peut atteindre `floor`
+        hf_length = len(hf_lower)
+        if floor > 0:
+            lowest = bisect.bisect_left(self.sorted_lengths, hf_length * floor / (2 - floor) - 1)
+            highest = bisect.bisect_right(self.sorted_lengths, hf_length * (2 - floor) / floor + 1)
+        else:
+            lowest, highest = 0, len(self.sorted_lengths)
+
+        seen = set(positions)
+        hf_chars = list(Counter(hf_lower).items())
+        masks = lcs_masks(hf_lower)
+
+        for i in range(lowest, highest):
+            position = self.length_order[i]
+            if position in seen:
+                continue
+            name = self.names[position]
+            total = hf_length + len(name)
+            if length_ratio_bound(hf_length, len(name)) < floor:
+                continue
+
+            # Lettres communes (multiensemble) : même majorant que quick_ratio
+            common = 0
+            for char, count in hf_chars:
+                found = name.count(char)
+                common += found if found < count else count
+            if 2.0 * common / total < floor:
+                continue
+            if 2.0 * lcs_length(hf_lower, masks, name) / total < floor:
+                continue
+
+            score = SequenceMatcher(None, hf_lower, name).ratio()
+            if len(top) < k or key((score, position)) < key(top[-1]):
+                top = heapq.nsmallest(k, top + [(score, position)], key=key)
+                if len(top) == k:
+                    floor = max(floor, top[-1][0])
+
+        return top
+
+    def match_many(self, hf_titles):
+        """Matcher plusieurs titres (même résultat que match() pour chacun)"""
+        return [self.match(hf_title) for hf_title in hf_titles]
+
+    def top_candidates(self, hf_title, k):
+        """
+        Les k meilleures recettes pour un titre (affectation conjointe)
+
+        Returns:
+            Liste de (mealie_title, mealie_id, score), meilleure en premier
+        """
+        catalog = self.mealie_recipes
+        if self.mode == "exhaustive":
+            return rank_candidates(hf_title, catalog.names, catalog.ids, range(len(catalog)), k)
+
+        self.prepare()
+        hf_lower = hf_title.lower()
+        positions = self._candidate_positions(title_ngrams(hf_lower))
+        if not positions:
+            return rank_candidates(hf_title, self.names, self.ids, range(len(self.names)), k)
+        return [(self.names[position], self.ids[position], score)
+                for score, position in self._exact_top(hf_lower, positions, k)]
+
+# =============================================================================
+# MATCHING VECTORISÉ (TF-IDF)
+# =============================================================================
+
+class TfidfCatalog:
+    """
+    Matrice TF-IDF creuse des trigrammes du catalogue, stockée par trigramme
+
+    Pour chaque trigramme du vocabulaire, `indptr[col]:indptr[col + 1]`
+    délimite les lignes du catalogue qui le contiennent (`rows`) et leur
+    poids TF-IDF normalisé (`weights`) : c'est la transposée CSC de la
+    matrice catalogue, ce qui permet de calculer le produit avec les titres
+    sans jamais construire de matrice dense.
+    """
+
+    def __init__(self, names, ids, vocabulary, idf, indptr, rows, weights, fingerprint):
+        self.names = names
+        self.ids = ids
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.indptr = indptr
+        self.rows = rows
+        self.weights = weights
+        self.fingerprint = fingerprint
+
+    @staticmethod
+    def fingerprint_of(names):
+        return hashlib.sha1("\n".join(names).encode('utf-8')).hexdigest()
+
+    @classmethod
+    def build(cls, mealie_recipes):
+        """Vectoriser le catalogue (MealieCatalog)"""
+        names = mealie_recipes.names
+        ids = mealie_recipes.ids
+
+        vocabulary = {}
+        cols = []
+        row_ptr = [0]
+        for name in names:
+            for gram in title_ngrams(name):
+                cols.append(vocabulary.setdefault(gram, len(vocabulary)))
+            row_ptr.append(len(cols))
+
+        cols = np.array(cols, dtype=np.int32)
+        row_ptr = np.array(row_ptr, dtype=np.int64)
+        row_of = np.repeat(np.arange(len(names), dtype=np.int32), np.diff(row_ptr))
+
+        # idf lissé (comme scikit-learn), tf binaire
+        df = np.bincount(cols, minlength=len(vocabulary))
+        idf = np.log((1 + len(names)) / (1 + df)) + 1
+
+        # Normalisation L2 de chaque ligne
+        values = idf[cols]
+        norms = np.sqrt(np.bincount(row_of, weights=values ** 2, minlength=len(names)))
+        values = values / norms[row_of]
+
+        # Passage au stockage par trigramme (CSC)
+        order = np.argsort(cols, kind='stable')
+        indptr = np.concatenate(([0], np.cumsum(df)))
+
+        return cls(names, ids, vocabulary, idf, indptr, row_of[order], values[order],
+                   cls.fingerprint_of(names))
+
+    def save(self, path):
+        grams = np.array(list(self.vocabulary), dtype=object)
+        with open(path, 'wb') as f:
+            np.savez(f, fingerprint=np.array(self.fingerprint), grams=grams.astype(str),
+                     idf=self.idf, indptr=self.indptr, rows=self.rows, weights=self.weights)
+
+    @classmethod
+    def load(cls, path, mealie_recipes):
+        """Recharger la matrice si elle correspond encore au catalogue (sinon None)"""
+        names = mealie_recipes.names
+        fingerprint = cls.fingerprint_of(names)
+        with np.load(path, allow_pickle=False) as data:
+            if str(data['fingerprint']) != fingerprint:
+                return None
+            vocabulary = {gram: col for col, gram in enumerate(data['grams'].tolist())}
+            return cls(names, mealie_recipes.ids, vocabulary, data['idf'],
+                       data['indptr'], data['rows'], data['weights'], fingerprint)
+
+    def similarities(self, hf_title):
+        """Cosinus TF-IDF entre un titre et toutes les recettes (vecteur de taille N)"""
+        cols = [self.vocabulary[gram] for gram in title_ngrams(hf_title.lower()) if gram in self.vocabulary]
+        if not cols:
+            return None
+
+        cols = np.array(cols)
+        query = self.idf[cols]
+        query = query / np.linalg.norm(query)
+
+        # Produit creux : somme des colonnes des trigrammes du titre
+        starts, ends = self.indptr[cols], self.indptr[cols + 1]
+        lengths = ends - starts
+        positions = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths) + np.arange(lengths.sum())
+        return np.bincount(self.rows[positions],
+                           weights=self.weights[positions] * np.repeat(query, lengths),
+                           minlength=len(self.names))
+
+# Matrices déjà calculées dans ce processus (une seule vectorisation par run multi-semaines)
+_tfidf_catalogs = {}
+
+def get_tfidf_catalog(mealie_recipes):
+    """Matrice TF-IDF du catalogue : mémoire, puis fichier à côté du cache catalogue, puis calcul"""
+    key = TfidfCatalog.fingerprint_of(mealie_recipes.names)
+    if key in _tfidf_catalogs:
+        return _tfidf_catalogs[key]
+
+    path = os.path.splitext(CATALOG_CACHE_PATH)[0] + ".tfidf.npz"
+    catalog = None
+    if CATALOG_CACHE and os.path.exists(path):
+        try:
+            catalog = TfidfCatalog.load(path, mealie_recipes)
+        except Exception as e:
+            log(f"   ⚠️  Matrice TF-IDF illisible ({e})")
+
+    if catalog is None:
+        catalog = TfidfCatalog.build(mealie_recipes)
+        log(f"   Matrice TF-IDF: {len(catalog.names)} recettes, {len(catalog.vocabulary)} trigrammes")
+        if CATALOG_CACHE:
+            try:
+                catalog.save(path)
+            except OSError as e:
+                log(f"   ⚠️  Matrice TF-IDF non sauvegardée ({e})")
+
+    _tfidf_catalogs.clear()
+    _tfidf_catalogs[key] = catalog
+    return catalog
+
+class TfidfMatcher:
+    """
+    Matching par lots : similarité cosinus TF-IDF sur trigrammes, puis
+    (optionnel) re-classement des `candidates` meilleurs avec similarity()
+
+    Avec le re-classement (par défaut), les scores restent des ratios
+    SequenceMatcher comparables à matching_threshold ; sans, le score est
+    le cosinus TF-IDF.
+    """
+
+    def __init__(self, mealie_recipes, candidates=None, rerank=None):
+        self.mealie_recipes = mealie_recipes
+        self.candidates = candidates or MATCHING_CANDIDATES
+        self.rerank = MATCHING_RERANK if rerank is None else rerank
+        self.catalog = None
+
+    def prepare(self):
+        """Vectoriser le catalogue tout de suite (mode démon) plutôt qu'au premier lot"""
+        load_numpy()
+        if self.catalog is None:
+            self.catalog = get_tfidf_catalog(self.mealie_recipes)
+
+    def match(self, hf_title):
+        return self.match_many([hf_title])[0]
+
+    def match_many(self, hf_titles):
+        """Matcher tous les titres d'un coup (catalogue vectorisé une seule fois)"""
+        from difflib import SequenceMatcher
+
+        self.prepare()
+        catalog = self.catalog
+
+        results = []
+        for hf_title in hf_titles:
+            scores = catalog.similarities(hf_title)
+            if scores is None or not len(scores):
+                results.append(match_recipe(hf_title, self.mealie_recipes) if scores is None else None)
+                continue
+
+            k = min(self.candidates, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+
+            if not self.rerank:
+                best = top[np.argmax(scores[top])]
+                results.append((catalog.names[best], catalog.ids[best], float(scores[best])))
+                continue
+
+            # Re-classement exact, dans l'ordre du catalogue pour départager les égalités
+            hf_lower = hf_title.lower()
+            best_match = None
+            best_score = 0
+            for position in sorted(top.tolist()):
+                score = SequenceMatcher(None, hf_lower, catalog.names[position]).ratio()
+                if score > best_score:
+                    best_score = score
+                    best_match = (catalog.names[position], catalog.ids[position], score)
+            results.append(best_match)
+
+        return results
+
+    def top_candidates(self, hf_title, k):
+        """
+        Les k meilleures recettes pour un titre (affectation conjointe)
+
+        Returns:
+            Liste de (mealie_title, mealie_id, score), meilleure en premier
+        """
+        self.prepare()
+        catalog = self.catalog
+
+        scores = catalog.similarities(hf_title)
+        if scores is None:
+            names, ids = self.mealie_recipes.names, self.mealie_recipes.ids
+            return rank_candidates(hf_title, names, ids, range(len(names)), k)
+        if not len(scores):
+            return []
+
+        n = min(self.candidates, len(scores))
+        top = np.argpartition(-scores, n - 1)[:n].tolist()
+
+        if self.rerank:
+            return rank_candidates(hf_title, catalog.names, catalog.ids, top, k)
+
+        best = heapq.nsmallest(k, top, key=lambda position: (-scores[position], position))
+        return [(catalog.names[p], catalog.ids[p], float(scores[p])) for p in best]
+
+# Dernier matcher construit : réutilisé (index compris) tant que le
+# catalogue et le mode ne changent pas
+_last_matcher = None
+
+def make_matcher(mealie_recipes):
+    """Matcher selon matching_mode (tfidf → index si NumPy est absent)"""
+    global _last_matcher
+    if _last_matcher and _last_matcher[0] is mealie_recipes and _last_matcher[1] == MATCHING_MODE:
+        return _last_matcher[2]
+
+    if MATCHING_MODE == "tfidf":
+        if load_numpy():
+            matcher = TfidfMatcher(mealie_recipes)
+        else:
+            log("   ⚠️  NumPy absent, matching_mode \"tfidf\" remplacé par \"index\"", "error")
+            matcher = RecipeMatcher(mealie_recipes, mode="index")
+    else:
+        matcher = RecipeMatcher(mealie_recipes)
+
+    _last_matcher = (mealie_recipes, MATCHING_MODE, matcher)
+    return matcher
+
+# =============================================================================
+# AFFECTATION CONJOINTE
+# =============================================================================
+
+def hungarian(cost):
+    """
+    Affectation de coût minimal (algorithme hongrois, O(n²·m))
+
+    Args:
+        cost: Matrice n × m (liste de listes) avec n <= m
+
+    Returns:
+        Liste : colonne affectée à chaque ligne
+    """
+    n, m = len(cost), len(cost[0])
+    inf = float('inf')
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    owner = [0] * (m + 1)
+    way = [0] * (m + 1)
+
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+
+        # Chemin augmentant de coût réduit minimal depuis la ligne i
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            delta = inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    current = cost[i0 - 1][j - 1] - u[i0] - v[j]
+                    if current < minv[j]:
+                        minv[j] = current
+                        way[j] = j0
+                    if minv[j] < delta:
+                        delta = minv[j]
+                        j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+    assignment = [0] * n
+    for j in range(1, m + 1):
+        if owner[j]:
+            assignment[owner[j] - 1] = j - 1
+    return assignment
+
+def assign_recipes(candidates):
+    """
+    Affectation un-à-un de poids maximal sur le graphe creux titres → recettes
+
+    La matrice ne contient que les recettes candidates des titres donnés
+    (jamais titres × catalogue), plus une colonne « sans recette » de
+    poids nul par titre.
+
+    Args:
+        candidates: {hf_title: [(mealie_title, mealie_id, score), ...]} : les
+                    arêtes du graphe (top-k au-dessus du seuil)
+
+    Returns:
+        {hf_title: (mealie_title, mealie_id, score) ou None si aucune recette libre}
+    """
+    titles = list(candidates)
+    recipe_ids = list(dict.fromkeys(match[1] for edges in candidates.values() for match in edges))
+    if not recipe_ids:
+        return {title: None for title in titles}
+
+    column = {recipe_id: j for j, recipe_id in enumerate(recipe_ids)}
+    edges_by_title = {title: {match[1]: match for match in edges} for title, edges in candidates.items()}
+
+    # Sans arête, une recette coûte plus cher que de laisser le titre sans recette
+    cost = []
+    for title in titles:
+        row = [1.0] * len(recipe_ids) + [0.0] * len(titles)
+        for recipe_id, match in edges_by_title[title].items():
+            row[column[recipe_id]] = -match[2]
+        cost.append(row)
+
+    result = {}
+    for title, j in zip(titles, hungarian(cost)):
+        result[title] = edges_by_title[title].get(recipe_ids[j]) if j < len(recipe_ids) else None
+    return result
+
+def conflict_components(candidates, conflicted):
+    """
+    Composantes connexes du graphe (titres reliés par une recette candidate
+    commune) qui contiennent au moins un titre en conflit
+
+    Returns:
+        Liste de listes de titres
+    """
+    parent = {title: title for title in candidates}
+
+    def find(title):
+        while parent[title] != title:
+            parent[title] = parent[parent[title]]
+            title = parent[title]
+        return title
+
+    first_title = {}
+    for title, edges in candidates.items():
+        for match in edges:
+            other = first_title.setdefault(match[1], title)
+            parent[find(title)] = find(other)
+
+    components = {}
+    for title in candidates:
+        components.setdefault(find(title), []).append(title)
+
+    conflicted = set(conflicted)
+    return [titles for titles in components.values() if conflicted.intersection(titles)]
+
+def resolve_conflicts(matches, fixed, matcher):
+    """
+    Réaffecter les titres de la semaine qui se disputent une même recette
+
+    Les choix indépendants sont gardés tant qu'ils sont un-à-un. Sinon, pour
+    les seuls groupes de titres concernés, les `assignment_candidates`
+    meilleures recettes au-dessus du seuil de chaque titre forment un graphe
+    creux sur lequel on calcule l'affectation un-à-un de score total maximal.
+
+    Args:
+        matches: {hf_title: match ou None} choix indépendants (modifié sur place)
+        fixed: Titres à la recette imposée (match_overrides), jamais réaffectés
+        matcher: Matcher du catalogue (top_candidates)
+
+    Returns:
+        Nombre de titres dont la recette a changé
+    """
+    accepted = {title: match for title, match in matches.items()
+                if match and match[2] >= MATCHING_THRESHOLD}
+
+    owners = {}
+    for title, match in accepted.items():
+        owners.setdefault(match[1], []).append(title)
+    reserved = {accepted[title][1] for title in fixed if title in accepted}
+
+    conflicted = [title for title, match in accepted.items()
+                  if title not in fixed and (len(owners[match[1]]) > 1 or match[1] in reserved)]
+    if not conflicted:
+        return 0
+
+    # Graphe construit à partir des titres en conflit : un autre titre n'y
+    # entre que s'il occupe déjà une recette candidate
+    candidates = {}
+    pending = list(conflicted)
+    while pending:
+        title = pending.pop()
+        if title in candidates:
+            continue
+        match = accepted[title]
+        edges = [candidate for candidate in matcher.top_candidates(title, ASSIGNMENT_CANDIDATES)
+                 if candidate[2] >= MATCHING_THRESHOLD and candidate[1] not in reserved]
+        # Choix venu du cache de décisions : toujours candidat
+        if match[1] not in reserved and all(candidate[1] != match[1] for candidate in edges):
+            edges.append(match)
+        candidates[title] = edges
+        for candidate in edges:
+            pending.extend(owners.get(candidate[1], ()))
+
+    changed = 0
+    for component in conflict_components(candidates, conflicted):
+        assignment = assign_recipes({title: candidates[title] for title in component})
+        for title, match in assignment.items():
+            if match == matches[title]:
+                continue
+            changed += 1
+            if match:
+                log(f"   ↪️  {title} → {match[0]} (score: {match[2]:.2f}, recette déjà prise)")
+            else:
+                log(f"   ↪️  {title} : recette déjà prise par un autre titre, aucune autre au-dessus du seuil")
+            matches[title] = match
+
+    return changed
+
+# =============================================================================
+# CACHE DES DÉCISIONS DE MATCHING
+# =============================================================================
+
+def normalize_title(title):
+    """Normaliser un titre HelloFresh pour servir de clé de cache"""
+    return " ".join(unicodedata.normalize('NFKC', title).lower().split())
+
+class MatchCache:
+    """
+    Décisions de matching persistantes : titre HelloFresh → recette Mealie
+
+    Chaque entrée garde l'id et le nom de la recette Mealie choisie, le
+    score et la version du catalogue chargé (MealieCatalog.version, qui ne
+    dépend pas du cache catalogue) au moment de la décision. Une entrée
+    n'est réutilisée que si le catalogue n'a pas changé depuis : une recette
+    ajoutée, supprimée ou renommée fait re-matcher le titre. Les entrées les
+    moins récemment utilisées sont supprimées au-delà de `max_size`.
+
+    Stocké dans le même fichier SQLite que le cache du catalogue.
+    """
+
+    def __init__(self, path, max_size=None):
+        self.path = path
+        self.max_size = max_size or MATCH_CACHE_SIZE
+        self.db = sqlite3.connect(path)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS match_cache ("
+            "title TEXT PRIMARY KEY, recipe_id TEXT NOT NULL, recipe_name TEXT NOT NULL, "
+            "score REAL NOT NULL, catalog_version TEXT, last_used REAL NOT NULL)"
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def get(self, hf_title, version):
+        """
+        Chercher une décision prise sur le même catalogue
+
+        Args:
+            version: Version du catalogue actuel (MealieCatalog.version)
+
+        Returns:
+            (mealie_title, mealie_id, score) ou None
+        """
+        key = normalize_title(hf_title)
+        row = self.db.execute(
+            "SELECT recipe_id, recipe_name, score, catalog_version FROM match_cache WHERE title = ?", (key,)
+        ).fetchone()
+        if not row:
+            return None
+
+        recipe_id, recipe_name, score, entry_version = row
+
+        # Catalogue modifié depuis la décision : une meilleure recette a pu
+        # être ajoutée, ou la recette choisie supprimée/renommée
+        if entry_version != version:
+            return None
+
+        best_match = (recipe_name, recipe_id, score)
+        self.put(hf_title, best_match, version)
+        return best_match
+
+    def put(self, hf_title, match, version):
+        """Enregistrer (ou rafraîchir) la décision pour un titre"""
+        mealie_title, mealie_id, score = match
+        self.db.execute(
+            "INSERT OR REPLACE INTO match_cache "
+            "(title, recipe_id, recipe_name, score, catalog_version, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+            (normalize_title(hf_title), mealie_id, mealie_title, score, version, time.time())
+        )
+
+    def evict(self):
+        """Supprimer les entrées les moins récemment utilisées au-delà de max_size"""
+        self.db.execute(
+            "DELETE FROM match_cache WHERE title NOT IN "
+            "(SELECT title FROM match_cache ORDER BY last_used DESC LIMIT ?)",
+            (self.max_size,)
+        )
+
+def resolve_override(hf_title, mealie_recipes, recipe_names):
+    """
+    Recette imposée pour un titre via `match_overrides` dans config.yaml
+
+    La valeur peut être le nom de la recette Mealie ou son id.
+
+    Returns:
+        (mealie_title, mealie_id, 1.0) ou None
+    """
+    overrides = {normalize_title(title): target for title, target in MATCH_OVERRIDES.items()}
+    target = overrides.get(normalize_title(hf_title))
+    if not target:
+        return None
+
+    target = str(target)
+    if target.lower() in mealie_recipes:
+        return (target.lower(), mealie_recipes[target.lower()], 1.0)
+    if target in recipe_names:
+        return (recipe_names[target], target, 1.0)
+
+    log(f"   ⚠️  Override introuvable dans Mealie: {hf_title} → {target}", "error")
+    return None
+
+@timed_phase("matching")
+def match_titles(hf_recipes, mealie_recipes):
+    """
+    Matcher les titres HelloFresh : overrides, puis cache, puis matcher
+    (index ou TF-IDF) sur tous les titres restants en un seul lot ; enfin,
+    si deux titres visent la même recette, affectation conjointe un-à-un
+    (matching_assignment: "joint")
+
+    Returns:
+        Liste de (hf_title, match) avec match = (mealie_title, mealie_id, score) ou None
+    """
+    matcher = make_matcher(mealie_recipes)
+    recipe_names = mealie_recipes.names_by_id()
+    version = mealie_recipes.version()
+
+    cache = None
+    if MATCH_CACHE:
+        try:
+            cache = MatchCache(CATALOG_CACHE_PATH)
+        except sqlite3.Error as e:
+            log(f"   ⚠️  Cache de matching inutilisable ({e})", "error")
+
+    matches = {}
+    overridden = set()
+    hits = 0
+
+    try:
+        for hf_title in hf_recipes:
+            match = resolve_override(hf_title, mealie_recipes, recipe_names)
+            if match:
+                overridden.add(hf_title)
+
+            if not match and cache:
+                match = cache.get(hf_title, version)
+                if match:
+                    hits += 1
+
+            if match:
+                matches[hf_title] = match
+
+        # Tous les titres restants sont matchés en un seul lot
+        misses = [hf_title for hf_title in dict.fromkeys(hf_recipes) if hf_title not in matches]
+        for hf_title, match in zip(misses, matcher.match_many(misses)):
+            matches[hf_title] = match
+            if match and cache:
+                cache.put(hf_title, match, version)
+
+        # Une recette Mealie par titre : pas de doublon dans le planning
+        if MATCHING_ASSIGNMENT == "joint":
+            METRICS.count("reassigned_titles", resolve_conflicts(matches, overridden, matcher))
+
+        results = []
+        for hf_title in hf_recipes:
+            match = matches.get(hf_title)
+            results.append((hf_title, match))
+            METRICS.count("hf_titles")
+            if match:
+                METRICS.observe_score(match[2])
+                if match[2] >= MATCHING_THRESHOLD:
+                    METRICS.count("matched_titles")
+
+        if cache:
+            cache.evict()
+            log(f"   Cache de matching: {hits}/{len(hf_recipes)} titre(s) trouvé(s)")
+    finally:
+        if cache:
+            cache.close()
+
+    return results
+
+# =============================================================================
+# IMPORT DES RECETTES SANS CORRESPONDANCE
+# =============================================================================
+
+# Création d'une recette depuis l'URL de sa fiche (scraper intégré à Mealie)
+IMPORT_URL_PATH = "/api/recipes/create/url"
+
+# Recettes déjà importées pendant ce run : URL → (nom, id). Vidé à chaque
+# demande du démon et à chaque foyer ; l'id n'est réutilisé que s'il est
+# encore dans le catalogue chargé (recette supprimée dans Mealie entre-temps)
+_imported_urls = {}
+
+def add_catalog_recipes(mealie_recipes, recipes):
+    """
+    Ajouter des recettes au catalogue en mémoire, sans le recharger
+
+    L'index trigrammes du matcher en cours est complété ; une matrice
+    TF-IDF est recalculée au prochain matching (empreinte des noms changée).
+    """
+    global _last_matcher
+
+    for name, recipe_id in recipes:
+        mealie_recipes.append(name, recipe_id)
+
+    if _last_matcher and _last_matcher[0] is mealie_recipes:
+        matcher = _last_matcher[2]
+        if isinstance(matcher, RecipeMatcher):
+            matcher.extend()
+        else:
+            _last_matcher = None
+
+@timed_phase("import")
+def import_unmatched_recipes(hf_titles, mealie_recipes):
+    """
+    Importer dans Mealie les recettes HelloFresh sans correspondance
+
+    Chaque fiche (URL lue sur la carte du menu) n'est importée qu'une fois :
+    une recette du catalogue portant déjà le nom HelloFresh (import d'un
+    run précédent) ou une URL déjà importée pendant ce run, et toujours au
+    catalogue, est réutilisée. Les créations partent en parallèle (`import_parallelism`),
+    puis les nouvelles recettes rejoignent le catalogue et l'index en
+    mémoire : les semaines suivantes du même run peuvent les matcher.
+
+    Returns:
+        {hf_title: (mealie_title, mealie_id)} pour les titres importés ou retrouvés
+    """
+    found = {}
+    to_import = {}
+    catalog_ids = None
+
+    for hf_title in hf_titles:
+        source = _recipe_sources.get(hf_title)
+        if not source:
+            log(f"   ⚠️  {hf_title} : lien de la fiche introuvable, import impossible")
+            continue
+
+        name, url = source
+        if name.lower() in mealie_recipes:
+            found[hf_title] = (name.lower(), mealie_recipes[name.lower()])
+            continue
+        if url in _imported_urls:
+            # Importée plus tôt dans le run : réutilisée si toujours au catalogue
+            if catalog_ids is None:
+                catalog_ids = set(mealie_recipes.ids)
+            if _imported_urls[url][1] in catalog_ids:
+                found[hf_title] = _imported_urls[url]
+                continue
+            del _imported_urls[url]
+        to_import.setdefault(url, []).append(hf_title)
+
+    if not to_import:
+        return found
+
+    log(f"📥 Import de {len(to_import)} recette(s) dans Mealie...")
+    client = get_mealie_client()
+
+    # Mealie répond avec le slug de la recette créée
+    created = client.run_batch(
+        [(url, 'POST', IMPORT_URL_PATH, {'json': {'url': url, 'includeTags': True}, 'timeout': 120})
+         for url in to_import],
+        parallelism=IMPORT_PARALLELISM,
+    )
+    slugs = {}
+    for result in created:
+        if result.ok and isinstance(result.data, str):
+            slugs[result.key] = result.data
+        else:
+            log(f"   ❌ Import de {result.key} : {result.error or 'réponse inattendue'}", "error")
+    METRICS.count("imported_recipes", len(slugs))
+
+    # Id et nom donnés par Mealie à chaque recette créée
+    fetched = client.run_batch([(url, 'GET', f"/api/recipes/{slug}", {}) for url, slug in slugs.items()])
+    recipes = []
+    for result in fetched:
+        if not result.ok or not isinstance(result.data, dict):
+            log(f"   ❌ Recette importée illisible ({result.key}) : {result.error}", "error")
+            continue
+        recipe = (result.data['name'].lower(), result.data['id'])
+        _imported_urls[result.key] = recipe
+        recipes.append(recipe)
+        for hf_title in to_import[result.key]:
+            found[hf_title] = recipe
+
+    add_catalog_recipes(mealie_recipes, recipes)
+    return found
+
+# =============================================================================
+# RÉCONCILIATION DU MEAL PLAN
+# =============================================================================
+
+def plan_dates(start_date):
+    """(jour, date) de chaque jour de DAYS_TO_PLAN dans la semaine qui commence à `start_date`"""
+    return [
+        (day_name, (start_date + timedelta(days=(WEEKDAYS.index(day_name) - start_date.weekday()) % 7)).strftime('%Y-%m-%d'))
+        for day_name in DAYS_TO_PLAN
+    ]
+
+def plan_week_changes(existing_plans, recipe_ids, start_date):
+    """
+    Calculer les écritures minimales pour obtenir le planning voulu
+
+    Seules les entrées du type ENTRY_TYPE avec une recette, sur les jours
+    planifiés, sont gérées par le script : les autres types de repas et les
+    notes manuelles ne sont jamais touchés. Une recette déjà planifiée un
+    des jours garde sa place ; les autres sont réparties au hasard sur les
+    jours libres.
+
+    Args:
+        existing_plans: Entrées Mealie de la semaine (get_week_mealplans)
+        recipe_ids: IDs des recettes matchées
+        start_date: Premier jour planifié
+
+    Returns:
+        Dictionnaire avec les listes 'keep', 'insert', 'update' et 'delete'
+    """
+    days = plan_dates(start_date)
+    dates = [date for _, date in days]
+
+    # Entrées gérées par le script, par jour
+    managed = {date: [] for date in dates}
+    for plan in existing_plans:
+        if plan.get('id') and plan.get('recipeId') and plan.get('entryType') == ENTRY_TYPE and plan.get('date') in managed:
+            managed[plan['date']].append(plan)
+
+    # Garder en place les recettes déjà planifiées cette semaine
+    remaining = list(recipe_ids)
+    desired = {}
+    for date in dates:
+        for plan in managed[date]:
+            if plan['recipeId'] in remaining:
+                desired[date] = plan['recipeId']
+                remaining.remove(plan['recipeId'])
+                break
+
+    # Répartir les autres recettes (ordre randomisé) sur les jours libres
+    random.shuffle(remaining)
+    for date in dates:
+        if date not in desired and remaining:
+            desired[date] = remaining.pop(0)
+
+    changes = {'keep': [], 'insert': [], 'update': [], 'delete': []}
+
+    for day_name, date in days:
+        recipe_id = desired.get(date)
+        plans = managed[date]
+
+        current = next((plan for plan in plans if plan['recipeId'] == recipe_id), None)
+        if current:
+            changes['keep'].append((day_name, current))
+        elif recipe_id and plans:
+            current = plans[0]
+            changes['update'].append((day_name, current, recipe_id))
+        elif recipe_id:
+            changes['insert'].append((day_name, {
+                'date': date,
+                'entryType': ENTRY_TYPE,
+                'recipeId': recipe_id
+            }))
+
+        # Doublons ou restes d'un planning précédent sur ce jour
+        for plan in plans:
+            if plan is not current:
+                changes['delete'].append((day_name, plan))
+
+    return changes
+
+def change_writes(changes):
+    """Écritures Mealie calculées par plan_week_changes (suppressions d'abord)"""
+    writes = []
+
+    for day_name, plan in changes['delete']:
+        writes.append(mealplan_write('reconcile', f"{day_name.capitalize()} (suppression)", 'DELETE',
+                                     f"/api/households/mealplans/{plan['id']}"))
+
+    for day_name, plan, recipe_id in changes['update']:
+        data = {key: value for key, value in plan.items() if key != 'recipe'}
+        data['recipeId'] = recipe_id
+        writes.append(mealplan_write('reconcile', f"{day_name.capitalize()} (mise à jour)", 'PUT',
+                                     f"/api/households/mealplans/{plan['id']}", data))
+
+    for day_name, data in changes['insert']:
+        writes.append(mealplan_write('reconcile', day_name.capitalize(), 'POST', '/api/households/mealplans', data))
+
+    return writes
+
+def planned_entries(changes):
+    """(date, id de recette) de chaque jour planifié après application des changements"""
+    entries = [(plan['date'], plan['recipeId']) for _, plan in changes['keep']]
+    entries += [(plan['date'], recipe_id) for _, plan, recipe_id in changes['update']]
+    entries += [(data['date'], data['recipeId']) for _, data in changes['insert']]
+    return sorted(entries)
+
+def log_week_changes(changes):
+    log(f"   {len(changes['keep'])} inchangée(s), {len(changes['insert'])} ajout(s), "
+        f"{len(changes['update'])} mise(s) à jour, {len(changes['delete'])} suppression(s)")
+
+@timed_phase("reconcile")
+def reconcile_meal_plan(recipe_ids, start_date, end_date):
+    """
+    Mettre à jour le meal plan d'une semaine sans tout supprimer/recréer
+
+    Returns:
+        Nombre de recettes planifiées sur la semaine
+    """
+    log("📅 Synchronisation du meal plan...")
+
+    existing_plans = get_week_mealplans(start_date, end_date)
+    changes = plan_week_changes(existing_plans, recipe_ids, start_date)
+    log_week_changes(changes)
+
+    writes = change_writes(changes)
+    if writes:
+        apply_week_writes(writes)
+    else:
+        log("   ℹ️  Planning déjà à jour, aucune écriture")
+
+    log("")
+    return len(planned_entries(changes))
+
+# =============================================================================
+# JOURNAL D'EXÉCUTION (REPRISE ET SEMAINES INCHANGÉES)
+# =============================================================================
+
+# Phases d'écriture d'une semaine, dans l'ordre d'exécution
+WRITE_PHASES = (
+    ("delete", "🗑️  Suppression des meal plans..."),
+    ("create", "📅 Création du meal plan..."),
+    ("reconcile", None),
+)
+
+# Semaines gardées dans le journal (jours)
+RUN_JOURNAL_KEEP_DAYS = 60
+
+def mealplan_write(phase, label, method, path, data=None):
+    """Une écriture Mealie planifiée (phase, libellé pour les logs, requête, statut)"""
+    return {'phase': phase, 'label': label, 'method': method, 'path': path,
+            'json': data, 'status': 'pending', 'seq': None}
+
+def delete_writes(meal_plans):
+    """Suppression de toutes les entrées d'une semaine (mode replace)"""
+    return [
+        mealplan_write('delete', f"{plan.get('date', 'unknown')} (suppression)", 'DELETE',
+                       f"/api/households/mealplans/{plan['id']}")
+        for plan in meal_plans if plan.get('id')
+    ]
+
+def create_writes(recipe_ids, start_date):
+    """Création d'une entrée par jour planifié, recettes dans un ordre randomisé (mode replace)"""
+    recipe_ids = list(recipe_ids)
+    random.shuffle(recipe_ids)
+
+    writes = []
+    for (day_name, date), recipe_id in zip(plan_dates(start_date), recipe_ids):
+        writes.append(mealplan_write('create', day_name.capitalize(), 'POST', '/api/households/mealplans', {
+            'date': date,
+            'entryType': ENTRY_TYPE,
+            'recipeId': recipe_id
+        }))
+    return writes
+
+def apply_week_writes(writes, journal=None, week=None):
+    """
+    Exécuter un lot d'écritures Mealie
+
+    Le statut de chaque écriture est mis à jour (et enregistré dans le
+    journal) dès qu'elle se termine : une exécution interrompue en plein
+    lot sait lesquelles ont été faites. Une suppression qui répond 404 est
+    considérée comme faite (déjà supprimée avant l'interruption).
+
+    Returns:
+        Nombre d'écritures réussies
+    """
+    calls = [
+        (write['label'], write['method'], write['path'],
+         {'json': write['json']} if write['json'] is not None else {})
+        for write in writes
+    ]
+
+    def on_result(index, result):
+        write = writes[index]
+        done = result.ok or (write['method'] == 'DELETE' and result.status == 404)
+        write['status'] = 'done' if done else 'failed'
+        if journal:
+            journal.mark(week, write['seq'], write['status'])
+
+    written = 0
+
+    for write, result in zip(writes, get_mealie_client().run_batch(calls, on_result=on_result)):
+        if write['status'] == 'done':
+            log(f"   ✅ {result.key}")
+            written += 1
+        elif result.status is not None:
+            log(f"   ⚠️  {result.key} : {result.error}")
+        else:
+            log(f"   ❌ {result.key} : {result.error[:50]}")
+
+    return written
+
+def plan_week_writes(recipe_ids, start_date, end_date):
+    """
+    Calculer toutes les écritures d'une semaine avant d'en faire une seule
+
+    Returns:
+        (écritures, nombre de recettes planifiées, entrées (date, id de recette) visées)
+    """
+    if MEALPLAN_SYNC == "replace":
+        try:
+            existing_plans = get_week_mealplans(start_date, end_date)
+        except Exception as e:
+            log(f"   ⚠️  Erreur suppression: {str(e)}")
+            existing_plans = []
+
+        creates = create_writes(recipe_ids, start_date)
+        entries = sorted((write['json']['date'], write['json']['recipeId']) for write in creates)
+        return delete_writes(existing_plans) + creates, len(creates), entries
+
+    log("📅 Synchronisation du meal plan...")
+    changes = plan_week_changes(get_week_mealplans(start_date, end_date), recipe_ids, start_date)
+    log_week_changes(changes)
+
+    entries = planned_entries(changes)
+    return change_writes(changes), len(entries), entries
+
+def week_fingerprint(hf_recipes, mealie_recipes, week_offset):
+    """
+    Empreinte d'une semaine à planifier : menu HelloFresh, version du
+    catalogue Mealie et réglages qui changent le planning
+
+    Deux runs avec la même empreinte produisent le même planning (à l'ordre
+    des jours près) : le second n'a rien à écrire.
+    """
+    target_monday_date, _ = mealie_week_dates(week_offset)
+    payload = {
+        'week': target_monday_date.strftime('%Y-%m-%d'),
+        'titles': sorted(normalize_title(title) for title in hf_recipes),
+        'catalog': mealie_recipes.version(),
+        'settings': [MEALIE_URL, ENTRY_TYPE, DAYS_TO_PLAN, MEALPLAN_SYNC, MATCHING_THRESHOLD,
+                     MATCHING_MODE, MATCHING_ASSIGNMENT, MATCH_OVERRIDES, IMPORT_UNMATCHED],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+class RunJournal:
+    """
+    Journal local des exécutions, par semaine planifiée
+
+    Pour chaque semaine : empreinte du run (week_fingerprint), entrées
+    visées, nombre de recettes planifiées, et chaque écriture Mealie avec
+    son statut (pending, done, failed). Une semaine passe à "writing" dès
+    que ses écritures sont enregistrées, puis à "done" (ou "failed" si une
+    écriture a échoué) quand le lot est terminé : une semaine restée à
+    "writing" a été interrompue et peut être reprise.
+
+    Stocké dans le même fichier SQLite que le cache du catalogue. Les
+    statuts sont écrits depuis les threads de run_batch.
+    """
+
+    def __init__(self, path):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS run_weeks ("
+            "week TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, status TEXT NOT NULL, "
+            "planned INTEGER NOT NULL, entries TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS run_writes ("
+            "week TEXT NOT NULL, seq INTEGER NOT NULL, phase TEXT NOT NULL, label TEXT NOT NULL, "
+            "method TEXT NOT NULL, path TEXT NOT NULL, body TEXT, status TEXT NOT NULL, "
+            "PRIMARY KEY (week, seq))"
+        )
+        self.db.commit()
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+    def get(self, week):
+        """État journalisé d'une semaine (dictionnaire, écritures comprises) ou None"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT fingerprint, status, planned, entries FROM run_weeks WHERE week = ?", (week,)
+            ).fetchone()
+            if not row:
+                return None
+            writes = self.db.execute(
+                "SELECT seq, phase, label, method, path, body, status FROM run_writes "
+                "WHERE week = ? ORDER BY seq", (week,)
+            ).fetchall()
+
+        fingerprint, status, planned, entries = row
+        return {
+            'fingerprint': fingerprint,
+            'status': status,
+            'planned': planned,
+            'entries': [tuple(entry) for entry in json.loads(entries)],
+            'writes': [
+                {'phase': phase, 'label': label, 'method': method, 'path': path,
+                 'json': json.loads(body) if body else None, 'status': write_status, 'seq': seq}
+                for seq, phase, label, method, path, body, write_status in writes
+            ],
+        }
+
+    def begin(self, week, fingerprint, writes, planned, entries):
+        """Enregistrer les écritures planifiées d'une semaine avant de les faire"""
+        for seq, write in enumerate(writes):
+            write['seq'] = seq
+
+        with self.lock:
+            self.db.execute("DELETE FROM run_weeks WHERE week = ? OR updated_at < ?",
+                            (week, time.time() - RUN_JOURNAL_KEEP_DAYS * 86400))
+            self.db.execute("DELETE FROM run_writes WHERE week NOT IN (SELECT week FROM run_weeks)")
+            self.db.execute(
+                "INSERT INTO run_weeks (week, fingerprint, status, planned, entries, updated_at) "
+                "VALUES (?, ?, 'writing', ?, ?, ?)",
+                (week, fingerprint, planned, json.dumps(entries), time.time())
+            )
+            self.db.executemany(
+                "INSERT INTO run_writes (week, seq, phase, label, method, path, body, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(week, write['seq'], write['phase'], write['label'], write['method'], write['path'],
+                  json.dumps(write['json']) if write['json'] is not None else None, write['status'])
+                 for write in writes]
+            )
+            self.db.commit()
+
+    def mark(self, week, seq, status):
+        """Statut d'une écriture, enregistré aussitôt"""
+        with self.lock:
+            self.db.execute("UPDATE run_writes SET status = ? WHERE week = ? AND seq = ?", (status, week, seq))
+            self.db.commit()
+
+    def finish(self, week, status):
+        """Fin des écritures d'une semaine (statut "done" ou "failed")"""
+        with self.lock:
+            self.db.execute("UPDATE run_weeks SET status = ?, updated_at = ? WHERE week = ?",
+                            (status, time.time(), week))
+            self.db.commit()
+
+def open_run_journal():
+    """Journal d'exécution (None s'il est désactivé ou inutilisable)"""
+    if not RUN_JOURNAL:
+        return None
+    try:
+        return RunJournal(CATALOG_CACHE_PATH)
+    except sqlite3.Error as e:
+        log(f"   ⚠️  Journal d'exécution inutilisable ({e})", "error")
+        return None
+
+def journal_week_key(target_monday_date):
+    return f"{target_monday_date.strftime('%Y-%m-%d')} {ENTRY_TYPE}"
+
+def journaled_week(fingerprint, week_offset):
+    """
+    État journalisé d'une semaine qui peut se passer de matching
+
+    Soit la semaine a déjà été écrite avec la même empreinte et les entrées
+    visées sont toujours dans Mealie (rien à faire), soit son écriture a été
+    interrompue (reprise des écritures restantes).
+
+    Returns:
+        État du journal (RunJournal.get) ou None si la semaine est à planifier
+    """
+    journal = open_run_journal()
+    if not journal:
+        return None
+
+    target_monday_date, target_sunday = mealie_week_dates(week_offset)
+    try:
+        state = journal.get(journal_week_key(target_monday_date))
+    finally:
+        journal.close()
+
+    if not state or state['fingerprint'] != fingerprint or state['status'] not in ("done", "writing"):
+        return None
+
+    if state['status'] == "done":
+        # Planning modifié dans Mealie depuis le dernier run : le resynchroniser
+        try:
+            existing_plans = get_week_mealplans(target_monday_date, target_sunday)
+        except Exception as e:
+            log(f"   ⚠️  Lecture du planning impossible ({e})")
+            return None
+
+        present = {(plan.get('date'), plan.get('recipeId')) for plan in existing_plans
+                   if plan.get('entryType') == ENTRY_TYPE}
+        if not all(entry in present for entry in state['entries']):
+            log("   ℹ️  Planning modifié dans Mealie depuis le dernier run, resynchronisation")
+            return None
+
+    return state
+
+# =============================================================================
+# ENREGISTREMENT / REJEU (--record / --replay)
+# =============================================================================
+
+# Fichiers d'un dossier de fixtures
+FIXTURE_HAR = "hellofresh.har"
+FIXTURE_MEALIE = "mealie.jsonl"
+FIXTURE_MANIFEST = "manifest.json"
+
+# "record", "replay" ou None, dossier de fixtures et informations du run
+# enregistré (date, empreinte du magic link, session déjà authentifiée,
+# menus lus...)
+FIXTURE_MODE = None
+FIXTURE_DIR = None
+_fixture_manifest = {}
+
+# Enregistreur des échanges Mealie (--record) et serveur de rejeu (--replay)
+_mealie_recorder = None
+_mealie_replay = None
+
+def fixture_path(name):
+    return os.path.join(FIXTURE_DIR, name)
+
+def magic_link_digest(magic_link):
+    """Empreinte du magic link : manifest.json ne garde jamais le lien lui-même"""
+    return hashlib.sha256(magic_link.encode('utf-8')).hexdigest() if magic_link else None
+
+def recorded_magic_link(digest):
+    """
+    Retrouver dans le HAR le magic link enregistré à partir de son empreinte
+
+    Returns:
+        URL de la requête dont l'empreinte correspond, ou None
+    """
+    if not digest:
+        return None
+    try:
+        with open(fixture_path(FIXTURE_HAR), 'r', encoding='utf-8') as f:
+            entries = json.load(f).get('log', {}).get('entries', [])
+    except (OSError, ValueError):
+        return None
+    for entry in entries:
+        url = entry.get('request', {}).get('url')
+        if url and magic_link_digest(url) == digest:
+            return url
+    return None
+
+def request_key(method, path, body):
+    """Clé d'un échange Mealie : méthode, chemin avec paramètres, corps"""
+    if isinstance(body, bytes):
+        body = body.decode('utf-8', 'replace')
+    return f"{method} {path} {body or ''}"
+
+class MealieRecorder:
+    """Échanges HTTP Mealie enregistrés dans mealie.jsonl (une réponse par ligne)"""
+
+    def __init__(self, path):
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        self.file = os.fdopen(fd, 'w', encoding='utf-8')
+        self.lock = threading.Lock()
+        self.count = 0
+
+    def record(self, response, base_url):
+        request = response.request
+        body = request.body
+        if isinstance(body, bytes):
+            body = body.decode('utf-8', 'replace')
+        entry = {
+            'method': request.method,
+            'path': request.url[len(base_url):],
+            'body': body,
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', 'application/json'),
+            'content': response.text,
+        }
+        # Pas d'en-têtes : le token Mealie n'est jamais écrit
+        line = json.dumps(entry, ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.count += 1
+
+    def close(self):
+        self.file.close()
+
+class MealieReplayHandler:
+    """Réponses du serveur de rejeu (combiné à BaseHTTPRequestHandler)"""
+
+    replay = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length) if length else None
+        status, content_type, content = self.replay.response(self.command, self.path, body)
+
+        payload = content.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+class MealieReplayServer:
+    """
+    Faux Mealie local qui rejoue mealie.jsonl
+
+    Une même requête (méthode, chemin, corps) reçoit ses réponses dans
+    l'ordre de l'enregistrement, la dernière étant répétée. Une lecture
+    absente de l'enregistrement répond 404 ; une écriture absente (matching
+    modifié depuis l'enregistrement) est acceptée telle quelle, sans effet.
+    """
+
+    def __init__(self, path):
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+        self.exchanges = {}
+        self.lock = threading.Lock()
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    key = request_key(entry['method'], entry['path'], entry['body'])
+                    self.exchanges.setdefault(key, deque()).append(entry)
+
+        handler = type("Handler", (MealieReplayHandler, BaseHTTPRequestHandler), {"replay": self})
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def response(self, method, path, body):
+        """(status, content_type, contenu) enregistrés pour cette requête"""
+        with self.lock:
+            entries = self.exchanges.get(request_key(method, path, body))
+            entry = None
+            if entries:
+                entry = entries.popleft() if len(entries) > 1 else entries[0]
+
+        if entry:
+            return entry['status'], entry['content_type'], entry['content']
+
+        METRICS.count("replay_misses")
+        log(f"   ⚠️  Rejeu: {method} {path} absent de l'enregistrement")
+        if method == 'GET':
+            return 404, 'application/json', '{"detail": "absent de l\'enregistrement"}'
+        return (201 if method == 'POST' else 200), 'application/json', \
+            body.decode('utf-8', 'replace') if body else '{}'
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def start_fixtures(mode, directory):
+    """
+    Activer l'enregistrement (--record) ou le rejeu (--replay) d'un run
+
+    record : le trafic du navigateur est sauvegardé en HAR et les échanges
+    Mealie dans mealie.jsonl. replay : le navigateur est servi par le HAR,
+    Mealie par un serveur local, et la date est figée sur celle de
+    l'enregistrement ; aucune requête ne sort de la machine.
+
+    Dans les deux modes, caches catalogue et décisions et journal
+    d'exécution sont ignorés : le catalogue complet est enregistré puis
+    rejoué à l'identique, chaque semaine est réécrite.
+
+    Raises:
+        ConfigError: dossier de rejeu absent ou incomplet
+    """
+    global FIXTURE_MODE, FIXTURE_DIR, _fixture_manifest, _mealie_recorder, _mealie_replay
+    global _frozen_now, _mealie_client, CATALOG_CACHE, MATCH_CACHE, RUN_JOURNAL, AUTH_STATE
+    global MEALIE_URL, MEALIE_TOKEN, HELLOFRESH_MAGIC_LINK, SUBSCRIPTION_ID, SCRAPING_MODE
+
+    FIXTURE_DIR = os.path.abspath(directory)
+    CATALOG_CACHE = False
+    MATCH_CACHE = False
+    RUN_JOURNAL = False
+
+    if mode == "record":
+        # Le HAR contient cookies et magic link : dossier du seul utilisateur,
+        # comme la session sauvegardée
+        os.makedirs(FIXTURE_DIR, mode=0o700, exist_ok=True)
+        os.chmod(FIXTURE_DIR, 0o700)
+        _fixture_manifest = {
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'subscription_id': SUBSCRIPTION_ID,
+            'scraping_mode': SCRAPING_MODE,
+        }
+        _mealie_recorder = MealieRecorder(fixture_path(FIXTURE_MEALIE))
+        # Même répartition des recettes sur les jours au rejeu
+        random.seed(_fixture_manifest['recorded_at'])
+        FIXTURE_MODE = mode
+        log(f"⏺️  Enregistrement dans {FIXTURE_DIR}", "always")
+        return
+
+    try:
+        with open(fixture_path(FIXTURE_MANIFEST), 'r', encoding='utf-8') as f:
+            _fixture_manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ConfigError(f"Enregistrement illisible dans {FIXTURE_DIR}: {e}")
+    for name in (FIXTURE_HAR, FIXTURE_MEALIE):
+        if not os.path.exists(fixture_path(name)):
+            raise ConfigError(f"Enregistrement incomplet: {fixture_path(name)} manquant")
+
+    _mealie_replay = MealieReplayServer(fixture_path(FIXTURE_MEALIE))
+    _frozen_now = datetime.fromisoformat(_fixture_manifest['recorded_at'])
+    random.seed(_fixture_manifest['recorded_at'])
+    MEALIE_URL = _mealie_replay.url
+    MEALIE_TOKEN = "replay"
+    _mealie_client = None
+    HELLOFRESH_MAGIC_LINK = recorded_magic_link(_fixture_manifest.get('magic_link_sha256'))
+    SUBSCRIPTION_ID = _fixture_manifest.get('subscription_id', SUBSCRIPTION_ID)
+    SCRAPING_MODE = _fixture_manifest.get('scraping_mode', SCRAPING_MODE)
+    # La session rejouée ne doit pas écraser la session sauvegardée
+    AUTH_STATE = False
+    FIXTURE_MODE = mode
+    log(f"▶️  Rejeu de {FIXTURE_DIR} (enregistré le {_frozen_now:%d/%m/%Y %H:%M})", "always")
+
+def stop_fixtures():
+    """Terminer l'enregistrement (manifest.json) ou arrêter le serveur de rejeu"""
+    global _mealie_recorder, _mealie_replay
+
+    if _mealie_recorder:
+        _mealie_recorder.close()
+        _fixture_manifest['mealie_exchanges'] = _mealie_recorder.count
+        fd = os.open(fixture_path(FIXTURE_MANIFEST), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(_fixture_manifest, f, ensure_ascii=False, indent=2)
+        # HAR écrit par Playwright à la fermeture du contexte, avec l'umask par défaut
+        for name in (FIXTURE_HAR, FIXTURE_MEALIE, FIXTURE_MANIFEST):
+            if os.path.exists(fixture_path(name)):
+                os.chmod(fixture_path(name), 0o600)
+        log(f"⏺️  Enregistré: {_mealie_recorder.count} échanges Mealie, HAR {fixture_path(FIXTURE_HAR)}", "always")
+        _mealie_recorder = None
+
+    if _mealie_replay:
+        _mealie_replay.close()
+        _mealie_replay = None
+
+# =============================================================================
+# FONCTION PRINCIPALE
+# =============================================================================
+
+def resolve_magic_link(magic_link_arg=None):
+    """
+    Magic link à utiliser
+
+    Priorité 1: Argument de ligne de commande
+    Priorité 2: Config file
+
+    Returns:
+        (magic_link, ok) : ok est faux (avec un message d'aide) si aucun
+        magic link n'est fourni et qu'aucune session n'est sauvegardée
+    """
+    magic_link = magic_link_arg or HELLOFRESH_MAGIC_LINK
+
+    if not magic_link and not has_saved_auth_state():
+        print("❌ Erreur: Vous devez fournir un magic link")
+        print("\nUsage:")
+        print('  ./run.sh -m "https://click.bnlx.hellofresh.link/..." -w 1')
+        print('  OU')
+        print('  python3 hellofresh2mealiemenu.py -m "https://click.bnlx.hellofresh.link/..." -w 1')
+        print('\nOu ajoutez hellofresh_magic_link dans config.yaml')
+        return magic_link, False
+
+    return magic_link, True
+
+def match_week(hf_recipes, mealie_recipes):
+    """
+    Matcher les recettes HelloFresh d'une semaine
+
+    Returns:
+        Liste des IDs Mealie au-dessus du seuil
+    """
+    check_cancelled()
+    log("🔗 Matching des recettes...")
+    
+    matched_ids = []
+    unmatched = []
+    
+    for hf_title, match in match_titles(hf_recipes, mealie_recipes):
+        if match:
+            mealie_title, mealie_id, score = match
+            
+            if score >= MATCHING_THRESHOLD:
+                log(f"   ✅ {hf_title}")
+                log(f"      → {mealie_title} (score: {score:.2f})")
+                matched_ids.append(mealie_id)
+            else:
+                log(f"   ⚠️  {hf_title} (score: {score:.2f})")
+                unmatched.append(hf_title)
+        else:
+            log(f"   ⚠️  {hf_title} (aucun match)")
+            unmatched.append(hf_title)
+
+    # Recettes absentes de Mealie : importées puis planifiées dans la foulée.
+    # Une recette retrouvée par son nom, ou la même fiche pour deux titres,
+    # peut déjà être planifiée : pas de doublon en affectation conjointe
+    if unmatched and IMPORT_UNMATCHED:
+        planned = set(matched_ids)
+        for hf_title, (mealie_title, mealie_id) in import_unmatched_recipes(unmatched, mealie_recipes).items():
+            if MATCHING_ASSIGNMENT == "joint" and mealie_id in planned:
+                log(f"   ⚠️  {hf_title} → {mealie_title} (importée, déjà planifiée pour un autre titre)")
+                continue
+            planned.add(mealie_id)
+            log(f"   📥 {hf_title}")
+            log(f"      → {mealie_title} (importée)")
+            matched_ids.append(mealie_id)
+    
+    log("")
+    return matched_ids
+
+def mealie_week_dates(week_offset):
+    """
+    Lundi et dimanche de la semaine Mealie à planifier
+
+    HelloFresh livre en fin de semaine W, on mange pendant la semaine W+1
+    Donc: recettes HelloFresh W+offset → planning Mealie pour semaine W+offset+1
+    """
+    today = current_time()
+
+    # Calculer le prochain lundi (début de la semaine suivante)
+    days_until_next_monday = (7 - today.weekday()) % 7
+    if days_until_next_monday == 0:
+        days_until_next_monday = 7
+    next_monday = today + timedelta(days=days_until_next_monday)
+
+    # Ajouter le week_offset pour obtenir la semaine cible
+    target_monday_date = next_monday + timedelta(weeks=week_offset)
+    target_sunday = target_monday_date + timedelta(days=6)
+    return target_monday_date, target_sunday
+
+def write_week(matched_ids, week_offset, fingerprint=None, journaled=None):
+    """
+    Écrire le meal plan de la semaine dans Mealie
+
+    Toutes les écritures sont calculées avant la première ; avec le journal
+    (run_journal), elles y sont enregistrées puis marquées une à une.
+
+    Args:
+        matched_ids: IDs des recettes matchées (None si `journaled`)
+        fingerprint: Empreinte de la semaine (week_fingerprint), None sans journal
+        journaled: État renvoyé par journaled_week : semaine inchangée depuis
+                   le dernier run (aucune écriture) ou écriture interrompue
+                   (seules les écritures restantes sont faites)
+
+    Returns:
+        (nombre de recettes planifiées, lundi de la semaine)
+    """
+    check_cancelled()
+    target_monday_date, target_sunday = mealie_week_dates(week_offset)
+
+    log(f"📅 Planning semaine {target_monday_date.isocalendar()[1]} ({target_monday_date.strftime('%d/%m')} - {target_sunday.strftime('%d/%m')})\n", "always")
+
+    if journaled and journaled['status'] == "done":
+        log("⏭️  Menu et catalogue inchangés depuis le dernier run, aucune écriture\n", "always")
+        METRICS.count("unchanged_weeks")
+        METRICS.count("planned_recipes", journaled['planned'])
+        return journaled['planned'], target_monday_date
+
+    if journaled:
+        writes, planned = journaled['writes'], journaled['planned']
+        done = sum(1 for write in writes if write['status'] == 'done')
+        log(f"↩️  Reprise de l'exécution interrompue ({done}/{len(writes)} écritures déjà faites)\n", "always")
+        METRICS.count("resumed_weeks")
+    else:
+        writes, planned, entries = plan_week_writes(matched_ids, target_monday_date, target_sunday)
+
+    week = journal_week_key(target_monday_date)
+    journal = open_run_journal() if fingerprint else None
+
+    try:
+        if journal and not journaled:
+            journal.begin(week, fingerprint, writes, planned, entries)
+
+        for phase, header in WRITE_PHASES:
+            pending = [write for write in writes if write['phase'] == phase and write['status'] != 'done']
+            if not pending:
+                continue
+            with METRICS.phase(phase):
+                if header:
+                    log(header)
+                apply_week_writes(pending, journal, week)
+                log("")
+
+        if MEALPLAN_SYNC != "replace" and not writes:
+            log("   ℹ️  Planning déjà à jour, aucune écriture\n")
+
+        if journal:
+            failed = any(write['status'] != 'done' for write in writes)
+            journal.finish(week, "failed" if failed else "done")
+    finally:
+        if journal:
+            journal.close()
+
+    if MEALPLAN_SYNC == "replace":
+        # Recettes effectivement créées (les créations en échec ne comptent pas)
+        planned = sum(1 for write in writes if write['phase'] == 'create' and write['status'] == 'done')
+
+    METRICS.count("planned_recipes", planned)
+    return planned, target_monday_date
+
+def main(magic_link_arg=None, week_offset=0, refresh_catalog=False, hf_recipes=None):
+    """
+    Générer le meal plan d'une semaine
+
+    Args:
+        hf_recipes: Titres HelloFresh déjà récupérés (session partagée
+                    entre plusieurs semaines) ; sinon le menu est scrapé ici
+
+    Returns:
+        Nombre de recettes planifiées, ou None si la semaine n'a pas pu être planifiée
+    """
+    start_time = time.time()
+
+    if DEBUG_MODE:
+        print("="*80)
+        print("🍳 Génération automatique du meal plan Mealie")
+        print("="*80 + "\n")
+
+    # Récupérer les recettes HelloFresh
+    if hf_recipes is None:
+        magic_link, ok = resolve_magic_link(magic_link_arg)
+        if not ok:
+            return
+
+        hf_recipes = get_current_week_recipes_with_magic_link(magic_link, SUBSCRIPTION_ID, week_offset)
+    
+    if not hf_recipes:
+        print("❌ Aucune recette HelloFresh trouvée")
+        return
+    
+    if DEBUG_MODE:
+        print("📋 Recettes HelloFresh de la semaine:")
+        for i, title in enumerate(hf_recipes, 1):
+            print(f"   {i}. {title}")
+        print()
+    
+    # Récupérer toutes les recettes Mealie
+    check_cancelled()
+    mealie_recipes = get_all_mealie_recipes(force_refresh=refresh_catalog)
+    
+    if not mealie_recipes:
+        print("❌ Aucune recette Mealie trouvée")
+        return
+    
+    # Semaine déjà écrite avec le même menu et le même catalogue, ou
+    # écriture interrompue : le journal suffit, pas de matching
+    fingerprint = week_fingerprint(hf_recipes, mealie_recipes, week_offset) if RUN_JOURNAL else None
+    journaled = journaled_week(fingerprint, week_offset) if fingerprint else None
+    matched_ids = None
+    
+    # Matcher les recettes
+    if not journaled:
+        matched_ids = match_week(hf_recipes, mealie_recipes)
+        
+        if not matched_ids:
+            print("❌ Aucune recette matchée")
+            return
+
+        # Empreinte recalculée sur le catalogue après import_unmatched : le
+        # prochain run, qui chargera les recettes importées, la retrouvera
+        if fingerprint:
+            fingerprint = week_fingerprint(hf_recipes, mealie_recipes, week_offset)
+    
+    created, target_monday_date = write_week(matched_ids, week_offset, fingerprint, journaled)
+    
+    elapsed = time.time() - start_time
+    
+    if DEBUG_MODE:
+        print("="*80)
+        print(f"✅ TERMINÉ en {elapsed:.1f}s")
+        print("="*80)
+        print("⏱️  Phases :")
+        for phase, seconds in METRICS.as_dict()['phases'].items():
+            print(f"   {phase}: {seconds:.2f}s")
+        print(f"\n🌐 Vérifie ton planning: {MEALIE_URL}/g/home/mealplan\n")
+    else:
+        print(f"✅ Meal plan créé pour semaine {target_monday_date.isocalendar()[1]} ({created} recettes) en {elapsed:.1f}s")
+
+    return created
+
+# =============================================================================
+# PIPELINE MULTI-SEMAINES
+# =============================================================================
+
+def run_pipeline(magic_link, week_offsets, refresh_catalog=False, scraper=None):
+    """
+    Planifier plusieurs semaines en pipeline : scraping → matching → écriture
+
+    Les étapes tournent en parallèle, reliées par des files bornées : les
+    écritures Mealie d'une semaine se font pendant que le navigateur lit le
+    menu de la suivante. Le catalogue Mealie est chargé une seule fois, en
+    parallèle du scraping, et partagé par toutes les semaines.
+
+    Args:
+        scraper: Générateur de (week_offset, titres) à utiliser à la place
+                 du navigateur (titres déjà connus, tests, benchmarks)
+
+    Returns:
+        Dictionnaire {week_offset: nombre de recettes planifiées}
+    """
+    start_time = time.time()
+    scraped = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    matched = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    catalog = {}
+    catalog_ready = threading.Event()
+    summary = {week_offset: 0 for week_offset in week_offsets}
+
+    def load_catalog():
+        try:
+            catalog['recipes'] = get_all_mealie_recipes(force_refresh=refresh_catalog)
+        finally:
+            catalog_ready.set()
+
+    def match_stage():
+        try:
+            while True:
+                item = scraped.get()
+                if item is None:
+                    break
+                week_offset, hf_recipes = item
+
+                # Annulation : vider la file sans rien faire
+                if _cancel_requested.is_set():
+                    continue
+
+                if not hf_recipes:
+                    print(f"❌ Semaine {week_offset} : aucune recette HelloFresh trouvée")
+                    continue
+
+                catalog_ready.wait()
+                if not catalog.get('recipes'):
+                    print(f"❌ Semaine {week_offset} : aucune recette Mealie trouvée")
+                    continue
+
+                try:
+                    fingerprint = week_fingerprint(hf_recipes, catalog['recipes'], week_offset) if RUN_JOURNAL else None
+                    journaled = journaled_week(fingerprint, week_offset) if fingerprint else None
+                    if journaled:
+                        matched.put((week_offset, None, fingerprint, journaled))
+                        continue
+
+                    matched_ids = match_week(hf_recipes, catalog['recipes'])
+                    # Catalogue éventuellement complété par import_unmatched (voir main)
+                    if fingerprint:
+                        fingerprint = week_fingerprint(hf_recipes, catalog['recipes'], week_offset)
+                except Cancelled:
+                    continue
+                except Exception as e:
+                    print(f"❌ Semaine {week_offset} : erreur de matching ({e})")
+                    continue
+
+                if not matched_ids:
+                    print(f"❌ Semaine {week_offset} : aucune recette matchée")
+                    continue
+
+                matched.put((week_offset, matched_ids, fingerprint, None))
+        finally:
+            matched.put(None)
+
+    def write_stage():
+        while True:
+            item = matched.get()
+            if item is None:
+                break
+            week_offset, matched_ids, fingerprint, journaled = item
+
+            if _cancel_requested.is_set():
+                continue
+
+            try:
+                created, target_monday_date = write_week(matched_ids, week_offset, fingerprint, journaled)
+            except Cancelled:
+                continue
+            except Exception as e:
+                print(f"❌ Semaine {week_offset} : erreur Mealie ({e})")
+                continue
+
+            summary[week_offset] = created
+            elapsed = time.time() - start_time
+            print(f"✅ Meal plan créé pour semaine {target_monday_date.isocalendar()[1]} ({created} recettes) en {elapsed:.1f}s")
+
+    threads = [
+        threading.Thread(target=load_catalog, name="catalog", daemon=True),
+        threading.Thread(target=match_stage, name="match", daemon=True),
+        threading.Thread(target=write_stage, name="write", daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+
+    # Le scraping reste dans ce thread : l'API sync de Playwright y est liée
+    try:
+        if scraper is None:
+            scraper = iter_weeks_recipes_with_magic_link(magic_link, SUBSCRIPTION_ID, week_offsets)
+        with METRICS.phase("scrape"):
+            for week_offset, titles in scraper:
+                if DEBUG_MODE:
+                    print(f"📋 Recettes HelloFresh semaine {week_offset}:")
+                    for i, title in enumerate(titles, 1):
+                        print(f"   {i}. {title}")
+                    print()
+                scraped.put((week_offset, titles))
+    finally:
+        scraped.put(None)
+        for thread in threads:
+            thread.join()
+
+    check_cancelled()
+    return summary
+
+def plan_weeks(magic_link_arg, week_offsets, refresh_catalog=False, sequential=False):
+    """
+    Planifier plusieurs semaines (--weeks) avec une seule session navigateur
+
+    Returns:
+        Code de sortie (0 si tout s'est déroulé normalement)
+    """
+    print(f"📅 Planification de {len(week_offsets)} semaine(s) : {', '.join(map(str, week_offsets))}\n")
+
+    magic_link, ok = resolve_magic_link(magic_link_arg)
+    if not ok:
+        return 1
+
+    if not sequential:
+        # Scraping, matching et écritures Mealie en parallèle
+        run_pipeline(magic_link, week_offsets, refresh_catalog=refresh_catalog)
+        return 0
+
+    # Une seule session navigateur pour toutes les semaines
+    weekly_recipes = get_weeks_recipes_with_magic_link(magic_link, SUBSCRIPTION_ID, week_offsets)
+
+    for i, week_offset in enumerate(week_offsets, 1):
+        if i > 1:
+            print("\n" + "="*80 + "\n")
+        print(f"📌 Semaine {week_offset} ({i}/{len(week_offsets)})")
+        # Le cache n'est rechargé entièrement qu'une fois par exécution
+        main(magic_link_arg=magic_link, week_offset=week_offset,
+             refresh_catalog=refresh_catalog and i == 1,
+             hf_recipes=weekly_recipes.get(week_offset, []))
+
+    return 0
+
+# =============================================================================
+# MODE DÉMON
+# =============================================================================
+
+# Dernière ligne envoyée au client : code de sortie de la demande
+DAEMON_EXIT_MARKER = "@@exit "
+
+class DaemonOutput:
+    """Sortie standard d'une demande : chaque ligne complète part vers le client"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.buffer = ""
+        self.lock = threading.Lock()
+
+    def write(self, text):
+        with self.lock:
+            self.buffer += text
+            while "\n" in self.buffer:
+                line, self.buffer = self.buffer.split("\n", 1)
+                self.lines.put(line)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        with self.lock:
+            if self.buffer:
+                self.lines.put(self.buffer)
+                self.buffer = ""
+
+class DaemonHandler:
+    """
+    API locale du démon (combiné à BaseHTTPRequestHandler par run_daemon)
+
+    GET  /health : le démon répond
+    POST /plan   : {"magic_link", "weeks", "refresh_catalog", "sequential",
+                   "progress"} ; la réponse est le log de l'exécution, ligne
+                   par ligne
+    POST /cancel : annuler la demande en cours (à la prochaine étape)
+    """
+
+    jobs = None
+
+    def log_message(self, format, *args):
+        if DEBUG_MODE:
+            sys.__stderr__.write(f"🛰️  {self.address_string()} {format % args}\n")
+
+    def _send_text(self, status, text):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_text(200, "ok\n")
+        else:
+            self._send_text(404, "not found\n")
+
+    def do_POST(self):
+        if self.path == "/cancel":
+            _cancel_requested.set()
+            self._send_text(200, "ok\n")
+            return
+        if self.path != "/plan":
+            self._send_text(404, "not found\n")
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            week_offsets = [int(w) for w in request.get('weeks') or [0]]
+        except (ValueError, TypeError) as e:
+            self._send_text(400, f"requête invalide: {e}\n")
+            return
+        request['weeks'] = week_offsets
+
+        # Les demandes sont exécutées une par une dans le thread du navigateur
+        lines = queue.Queue()
+        self.jobs.put((request, lines))
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.end_headers()
+
+        connected = True
+        while True:
+            line = lines.get()
+            if line is None:
+                break
+            if not connected:
+                continue
+            try:
+                self.wfile.write((line + "\n").encode('utf-8'))
+                self.wfile.flush()
+            except OSError:
+                # Client parti : la demande va quand même jusqu'au bout
+                connected = False
+
+def run_daemon_request(request, lines):
+    """
+    Exécuter une demande du démon, sa sortie redirigée vers le client
+
+    Returns:
+        Code de sortie de la demande
+    """
+    global METRICS
+    METRICS = RunMetrics(progress=bool(request.get('progress')))
+    _cancel_requested.clear()
+    # Fiches, imports et requêtes de la demande précédente : inutiles
+    # désormais, et les recettes importées ont pu être supprimées de Mealie
+    _recipe_sources.clear()
+    _imported_urls.clear()
+    _unsized_requests.clear()
+
+    output = DaemonOutput(lines)
+    code = 0
+    try:
+        with redirect_stdout(output):
+            week_offsets = request['weeks']
+            if len(week_offsets) == 1:
+                main(magic_link_arg=request.get('magic_link'), week_offset=week_offsets[0],
+                     refresh_catalog=bool(request.get('refresh_catalog')))
+            else:
+                code = plan_weeks(request.get('magic_link'), week_offsets,
+                                  refresh_catalog=bool(request.get('refresh_catalog')),
+                                  sequential=bool(request.get('sequential')))
+    except Cancelled:
+        code = 130
+        output.close()
+        lines.put("⚠️  Annulé")
+    except Exception as e:
+        code = 1
+        output.close()
+        lines.put(f"❌ Erreur: {e}")
+    finally:
+        output.close()
+        try:
+            METRICS.write()
+        except OSError as e:
+            log(f"⚠️  Métriques non écrites: {e}", "error")
+        lines.put(f"{DAEMON_EXIT_MARKER}{code}")
+        lines.put(None)
+
+    return code
+
+def start_warm_session():
+    """Lancer (ou relancer) le navigateur gardé ouvert entre les demandes"""
+    global _warm_session
+    if _warm_session is not None:
+        _warm_session.close()
+        _warm_session = None
+
+    session = HelloFreshSession(HELLOFRESH_MAGIC_LINK, SUBSCRIPTION_ID)
+    try:
+        session.__enter__()
+    except Exception as e:
+        log(f"⚠️  Navigateur indisponible ({e}), un navigateur sera lancé à chaque demande", "always")
+        return
+    _warm_session = session
+
+def warm_up_catalog():
+    """Charger le catalogue et construire l'index de matching avant la première demande"""
+    mealie_recipes = get_all_mealie_recipes()
+    if mealie_recipes:
+        make_matcher(mealie_recipes).prepare()
+
+def check_daemon_host():
+    """
+    Le démon n'a pas d'authentification : refuser toute adresse d'écoute
+    joignable depuis une autre machine
+
+    Raises:
+        ConfigError: daemon_host n'est pas une adresse de bouclage
+    """
+    if DAEMON_HOST == 'localhost':
+        return
+    try:
+        loopback = ipaddress.ip_address(DAEMON_HOST).is_loopback
+    except ValueError:
+        loopback = False
+    if not loopback:
+        raise ConfigError(f"daemon_host '{DAEMON_HOST}' refusé : le démon n'écoute que sur une adresse locale (127.0.0.1, ::1)")
+
+def run_daemon():
+    """
+    Mode démon : navigateur, session HelloFresh, catalogue et index gardés en mémoire
+
+    Les demandes de planning arrivent en HTTP sur DAEMON_HOST:DAEMON_PORT
+    (voir hellofresh2mealie_client.py). Le serveur HTTP tourne dans un
+    thread ; les demandes sont exécutées une par une dans le thread
+    principal, auquel l'API sync de Playwright est liée.
+    """
+    import socket
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    jobs = queue.Queue()
+    handler = type("Handler", (DaemonHandler, BaseHTTPRequestHandler), {"jobs": jobs})
+    # ThreadingHTTPServer n'écoute qu'en IPv4 : famille IPv6 pour ::1
+    ipv6 = ':' in DAEMON_HOST
+    server_class = type("Server", (ThreadingHTTPServer,), {"address_family": socket.AF_INET6}) if ipv6 \
+        else ThreadingHTTPServer
+    server = server_class((DAEMON_HOST, DAEMON_PORT), handler)
+    server.daemon_threads = True
+
+    print("🔥 Préchauffage (navigateur, catalogue Mealie, index)...")
+    start_warm_session()
+    try:
+        warm_up_catalog()
+    except Exception as e:
+        log(f"⚠️  Catalogue non préchargé: {e}", "always")
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host = f"[{DAEMON_HOST}]" if ipv6 else DAEMON_HOST
+    print(f"🟢 Démon prêt sur http://{host}:{DAEMON_PORT} (Ctrl+C pour arrêter)")
+
+    try:
+        while True:
+            request, lines = jobs.get()
+
+            # Navigateur fermé ou planté depuis la dernière demande
+            if _warm_session is not None and not _warm_session.browser.is_connected():
+                start_warm_session()
+
+            start_time = time.time()
+            code = run_daemon_request(request, lines)
+            print(f"{'✅' if code == 0 else '❌'} Demande semaines {request['weeks']} "
+                  f"traitée en {time.time() - start_time:.1f}s")
+    except KeyboardInterrupt:
+        print("\n⚠️  Arrêt du démon")
+    finally:
+        server.shutdown()
+        if _warm_session is not None:
+            _warm_session.close()
 
 # =============================================================================
-# FONCTIONS HELLOFRESH
+# MODE BATCH (PLUSIEURS FOYERS)
 # =============================================================================
 
-def get_current_week_recipes_with_magic_link(magic_link, sub_id, week_offset=0):
-    """
-    Récupérer les recettes de la commande HelloFresh
-    en utilisant un lien magique (magic link) reçu par email
+# Fichiers propres à chaque foyer : suffixés par le nom du profil s'ils ne
+# sont pas fixés dans le profil (valeur None = fonctionnalité désactivée)
+PROFILE_FILE_KEYS = {
+    'catalog_cache_path': 'mealie_catalog.sqlite',
+    'auth_state_path': 'hellofresh_auth.json',
+    'metrics_prometheus_file': None,
+}
 
-    Args:
-        magic_link: URL du magic link HelloFresh
-        sub_id: ID de souscription
-        week_offset: Décalage en semaines (0=semaine actuelle, 1=semaine prochaine, -1=semaine dernière)
+def load_profiles():
     """
-    log("🔐 Connexion à HelloFresh via magic link...", "always")
-
-    with sync_playwright() as p:
-        # Lancer le navigateur (headless sauf si DEBUG)
-        browser = p.chromium.launch(headless=not DEBUG_MODE)
-        context = browser.new_context(
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
-        page = context.new_page()
-
-        try:
-            # Aller directement sur le lien magique
-            log("   Navigation vers le lien magique...")
-            page.goto(magic_link, wait_until="domcontentloaded", timeout=60000)
-            time.sleep(3)
+    Profils du mode batch : config.yaml de base + surcharges de chaque foyer
 
-            # Screenshot 1: Après clic sur magic link
-            screenshot_path = os.path.join(SCRIPT_DIR, "debug_step1_after_magic_link.png")
-            page.screenshot(path=screenshot_path, full_page=True)
-            log(f"   Screenshot 1 sauvegardé: {screenshot_path}", "always")
-            log(f"   URL après magic link: {page.url}", "always")
+    Chaque entrée de `profiles` peut redéfinir n'importe quelle clé
+    (abonnement, magic link, instance Mealie, jours, type de repas...).
 
-            # Le lien magique devrait nous authentifier et rediriger vers le menu
-            log("   Authentification en cours...")
+    Returns:
+        Liste de (nom, config complète du foyer)
 
-            # Attendre d'être sur la page du compte
-            try:
-                page.wait_for_url("**/my-account/**", timeout=15000)
-                log("   ✅ Authentification réussie")
+    Raises:
+        ConfigError: aucun profil, ou clé obligatoire manquante dans un profil
+    """
+    profiles = _raw_config.get('profiles') or []
+    if not profiles:
+        raise ConfigError("Aucun profil dans config.yaml (clé 'profiles')")
 
-                # Screenshot 2: Après authentification
-                screenshot_path = os.path.join(SCRIPT_DIR, "debug_step2_after_auth.png")
-                page.screenshot(path=screenshot_path, full_page=True)
-                log(f"   Screenshot 2 sauvegardé: {screenshot_path}", "always")
-            except:
-                # Vérifier si on est déjà sur la bonne page
-                if '/my-account/' not in page.url:
-                    log("   ⚠️  Redirection inattendue, tentative de navigation vers le menu...", "always")
-                    screenshot_path = os.path.join(SCRIPT_DIR, "debug_step2_redirect_issue.png")
-                    page.screenshot(path=screenshot_path, full_page=True)
-                    log(f"   Screenshot 2 (erreur) sauvegardé: {screenshot_path}", "always")
+    base = {key: value for key, value in _raw_config.items() if key != 'profiles'}
+    result = []
 
-            # Calculer la semaine cible (actuelle + offset)
-            target_date = datetime.now() + timedelta(weeks=week_offset)
-            year = target_date.isocalendar()[0]
-            week_num = target_date.isocalendar()[1]
-            week = f"{year}-W{week_num:02d}"
+    for i, profile in enumerate(profiles, 1):
+        name = str(profile.get('name') or f"profil{i}")
+        suffix = re.sub(r'[^A-Za-z0-9_-]+', '_', name)
 
-            week_label = "actuelle" if week_offset == 0 else f"{'prochaine' if week_offset == 1 else f'+{week_offset}'}" if week_offset > 0 else f"{week_offset}"
-            log(f"📋 Récupération des recettes semaine {week_label} ({week})...", "always")
+        config = dict(base, **profile)
+        for key, default in PROFILE_FILE_KEYS.items():
+            if key in profile:
+                continue
+            value = base.get(key, default)
+            if value:
+                root, ext = os.path.splitext(value)
+                config[key] = f"{root}.{suffix}{ext}"
 
-            # Aller sur le menu
-            menu_url = f"https://www.hellofresh.fr/my-account/deliveries/menu?week={week}&subscriptionId={sub_id}&locale=fr-FR"
-            log(f"   Navigation vers: {menu_url}", "always")
-            page.goto(menu_url, wait_until="domcontentloaded", timeout=60000)
-            time.sleep(3)
+        missing = missing_config_keys(config)
+        if missing:
+            raise ConfigError(f"Profil {name}: clé manquante '{missing[0]}'")
+        try:
+            parse_config(config)
+        except ConfigError as e:
+            raise ConfigError(f"Profil {name}: {e}")
+        if any(name == other for other, _ in result):
+            raise ConfigError(f"Profil {name} défini deux fois")
 
-            # Screenshot 3: Page du menu
-            screenshot_path = os.path.join(SCRIPT_DIR, "debug_step3_menu_page.png")
-            page.screenshot(path=screenshot_path, full_page=True)
-            log(f"   Screenshot 3 sauvegardé: {screenshot_path}", "always")
-            log(f"   URL actuelle: {page.url}", "always")
-
-            # Extraire les titres des recettes
-            titles = []
-            weekly_menu_section = page.query_selector("#weekly-menu")
-
-            if not weekly_menu_section:
-                log("❌ Section #weekly-menu non trouvée", "error")
-                # Prendre un screenshot pour debug
-                screenshot_path = os.path.join(SCRIPT_DIR, "hellofresh_debug.png")
-                page.screenshot(path=screenshot_path, full_page=True)
-                log(f"   Screenshot sauvegardé: {screenshot_path}", "error")
-                log(f"   URL actuelle: {page.url}", "error")
-                return []
+        result.append((name, config))
 
-            recipe_cards = weekly_menu_section.query_selector_all("[data-recipe-id]")
-            log(f"   Trouvé {len(recipe_cards)} recettes")
+    return result
 
-            for card in recipe_cards:
-                try:
-                    # Ignorer les recettes offertes
-                    is_free = card.query_selector("span:has-text('Offert')")
-                    if is_free:
-                        continue
+def apply_profile_config(config):
+    """Remplacer la configuration du processus par celle d'un foyer"""
+    global _mealie_client, _loaded_catalog, _last_matcher
 
-                    # Récupérer le titre principal
-                    title_elem = card.query_selector("[data-test-id='product-name']")
-                    if not title_elem:
-                        continue
+    set_config(parse_config(config))
+    _mealie_client = None
+    _loaded_catalog = None
+    _last_matcher = None
+    _tfidf_catalogs.clear()
+    _imported_urls.clear()
 
-                    title = title_elem.inner_text().strip()
+def run_profile(name, config, week_offsets, weekly_recipes, refresh_catalog=False, recipe_sources=None):
+    """
+    Planifier les semaines d'un foyer (dans un processus du pool batch)
 
-                    # Récupérer le sous-titre
-                    subtitle_elem = card.query_selector("[data-test-id='product-headline-screen-reader-text']")
-                    if subtitle_elem:
-                        subtitle = subtitle_elem.inner_text().strip()
-                        full_title = f"{title} {subtitle}"
-                    else:
-                        full_title = title
+    `recipe_sources` transmet les liens des fiches lus par le processus
+    principal (import_unmatched).
 
-                    if full_title:
-                        titles.append(full_title)
-                except:
-                    continue
+    Returns:
+        {'profile', 'weeks': {week_offset: recettes planifiées ou None},
+         'error', 'output', 'seconds'}
+    """
+    global METRICS
 
-            log(f"✅ {len(titles)} recettes trouvées\n")
+    start_time = time.time()
+    apply_profile_config(config)
+    METRICS = RunMetrics(profile=name)
+    _recipe_sources.update(recipe_sources or {})
 
-            return titles
+    output = io.StringIO()
+    weeks = {}
+    error = None
 
+    with redirect_stdout(output):
+        try:
+            for i, week_offset in enumerate(week_offsets):
+                # Le catalogue n'est rechargé entièrement qu'une fois par foyer
+                weeks[week_offset] = main(week_offset=week_offset,
+                                          refresh_catalog=refresh_catalog and i == 0,
+                                          hf_recipes=weekly_recipes.get(week_offset, []))
         except Exception as e:
-            log(f"❌ Erreur: {e}", "error")
-            try:
-                screenshot_path = os.path.join(SCRIPT_DIR, "hellofresh_error.png")
-                page.screenshot(path=screenshot_path)
-                log(f"   Screenshot sauvegardé: {screenshot_path}", "error")
-            except:
-                pass
-            return []
-        finally:
-            browser.close()
+            error = str(e)
+            print(f"❌ Erreur: {e}")
 
+        try:
+            METRICS.write()
+        except OSError as e:
+            log(f"⚠️  Métriques non écrites: {e}", "error")
 
-# =============================================================================
-# FONCTIONS MEALIE
-# =============================================================================
+    return {'profile': name, 'weeks': weeks, 'error': error,
+            'output': output.getvalue(), 'seconds': time.time() - start_time}
 
-def get_all_mealie_recipes():
-    """
-    Récupérer toutes les recettes de Mealie
+def scrape_profiles(profiles, week_offsets, browser):
     """
-    log("📚 Chargement des recettes Mealie...")
-    
-    url = f"{MEALIE_URL}/api/recipes"
-    headers = {'Authorization': f'Bearer {MEALIE_TOKEN}'}
-    
-    try:
-        all_recipes = {}
-        page = 1
-        per_page = 100
-        
-        while True:
-            params = {'page': page, 'perPage': per_page}
-            response = requests.get(url, headers=headers, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            if 'items' in data:
-                recipes = data['items']
-                
-                for recipe in recipes:
-                    all_recipes[recipe['name'].lower()] = recipe['id']
-                
-                if len(recipes) < per_page:
-                    break
-                
-                page += 1
-            else:
-                break
-        
-        log(f"✅ {len(all_recipes)} recettes dans Mealie\n")
-        return all_recipes
-        
-    except Exception as e:
-        log(f"❌ Erreur Mealie: {e}", "error")
-        return {}
+    Récupérer les menus de tous les foyers avec un seul Chromium
 
-def delete_week_mealplans(start_date, end_date):
-    """
-    Supprimer tous les meal plans d'une semaine dans Mealie
+    Chaque foyer a son propre contexte navigateur (cookies, session
+    sauvegardée). Les onglets de tous les foyers sont ouverts avant d'en
+    lire un : le navigateur les charge en même temps.
+
+    Yields:
+        (nom, {week_offset: [titres]}) au fur et à mesure
     """
-    log(f"🗑️  Suppression des meal plans ({start_date.strftime('%d/%m')} - {end_date.strftime('%d/%m')})...")
-    
-    url = f"{MEALIE_URL}/api/households/mealplans"
-    headers = {'Authorization': f'Bearer {MEALIE_TOKEN}'}
-    
-    params = {
-        'start_date': start_date.strftime('%Y-%m-%d'),
-        'end_date': end_date.strftime('%Y-%m-%d'),
-        'perPage': 100
-    }
-    
+    opened = []
     try:
-        response = requests.get(url, headers=headers, params=params, timeout=30)
-        response.raise_for_status()
-        
-        meal_plans = response.json()
-        
-        if isinstance(meal_plans, dict) and 'items' in meal_plans:
-            meal_plans = meal_plans['items']
-        
-        if isinstance(meal_plans, list) and len(meal_plans) > 0:
-            deleted_count = 0
-            for plan in meal_plans:
-                plan_id = plan.get('id')
-                if plan_id:
-                    delete_url = f"{MEALIE_URL}/api/households/mealplans/{plan_id}"
-                    del_response = requests.delete(delete_url, headers=headers, timeout=30)
-                    if del_response.status_code in [200, 204]:
-                        log(f"   ✅ Supprimé: {plan.get('date', 'unknown')}")
-                        deleted_count += 1
-            
-            log(f"   ✅ {deleted_count} meal plans supprimés\n")
-        else:
-            log("   ℹ️  Aucun meal plan à supprimer\n")
-    
-    except Exception as e:
-        log(f"   ⚠️  Erreur suppression: {str(e)}\n")
+        for name, config in profiles:
+            log(f"🏠 {name}", "always")
+            # Configuration du foyer, pas celle de base du processus principal
+            settings = parse_config(config)
+            session = HelloFreshSession(settings['HELLOFRESH_MAGIC_LINK'], settings['SUBSCRIPTION_ID'],
+                                        browser=browser, settings=settings, name=name)
+            try:
+                session.__enter__()
+                opened.append((name, session, session.open_weeks(week_offsets)))
+            except Exception as e:
+                log(f"❌ {name} : {e}", "error")
+                session.close()
+                opened.append((name, None, None))
 
-def similarity(a, b):
-    """Calculer la similarité entre deux chaînes"""
-    return SequenceMatcher(None, a.lower(), b.lower()).ratio()
+        for name, session, pages in opened:
+            if session is None:
+                yield name, {}
+                continue
+            try:
+                yield name, dict(session.read_weeks(week_offsets, pages))
+            except Exception as e:
+                log(f"❌ {name} : {e}", "error")
+                yield name, {}
+            finally:
+                session.close()
+    finally:
+        for _, session, _ in opened:
+            if session is not None:
+                session.close()
 
-def match_recipe(hf_title, mealie_recipes):
-    """
-    Trouver la recette Mealie correspondante
-    """
-    best_match = None
-    best_score = 0
-    
-    for mealie_title, mealie_id in mealie_recipes.items():
-        score = similarity(hf_title, mealie_title)
-        
-        if score > best_score:
-            best_score = score
-            best_match = (mealie_title, mealie_id, score)
-    
-    if best_match and best_match[2] >= MATCHING_THRESHOLD:
-        return best_match
-    
-    return best_match if best_match else None
+def print_batch_summary(results):
+    """Afficher le résultat de chaque foyer"""
+    print("\n" + "="*80)
+    print("📊 Résumé par foyer")
+    print("="*80)
+    for result in results:
+        weeks = ", ".join(
+            f"S{week_offset}: {created if created is not None else '❌'}"
+            for week_offset, created in sorted(result['weeks'].items())
+        )
+        if result['error']:
+            print(f"   ❌ {result['profile']} : {result['error']} ({result['seconds']:.1f}s)")
+        else:
+            ok = all(created is not None for created in result['weeks'].values())
+            print(f"   {'✅' if ok else '⚠️ '} {result['profile']} : {weeks} ({result['seconds']:.1f}s)")
 
-def create_meal_plan(recipe_ids, start_date):
-    """
-    Créer un meal plan dans Mealie (ordre randomisé)
+def run_batch(week_offsets, refresh_catalog=False):
     """
-    log("📅 Création du meal plan...")
-    
-    # Randomiser l'ordre des recettes
-    random.shuffle(recipe_ids)
-    
-    url = f"{MEALIE_URL}/api/households/mealplans"
-    headers = {
-        'Authorization': f'Bearer {MEALIE_TOKEN}',
-        'Content-Type': 'application/json',
-    }
-    
-    current_date = start_date
-    created = 0
-    
-    for day_name in DAYS_TO_PLAN:
-        if not recipe_ids:
-            break
-        
-        recipe_id = recipe_ids.pop(0)
-        
-        meal_plan_data = {
-            'date': current_date.strftime('%Y-%m-%d'),
-            'entryType': ENTRY_TYPE,
-            'recipeId': recipe_id
-        }
-        
-        try:
-            response = requests.post(url, headers=headers, json=meal_plan_data, timeout=30)
-            
-            if response.status_code in [200, 201]:
-                log(f"   ✅ {day_name.capitalize()}")
-                created += 1
-            else:
-                log(f"   ⚠️  {day_name.capitalize()} : Erreur {response.status_code}")
-        
-        except Exception as e:
-            log(f"   ❌ {day_name.capitalize()} : {str(e)[:50]}")
-        
-        current_date += timedelta(days=1)
-    
-    log("")
-    return created
-
-# =============================================================================
-# FONCTION PRINCIPALE
-# =============================================================================
+    Planifier les semaines de tous les foyers de `profiles`
 
-def main(magic_link_arg=None, week_offset=0):
-    start_time = time.time()
+    Le processus principal garde un seul Chromium (un contexte isolé par
+    foyer) ; dès qu'un foyer est scrapé, son matching et ses écritures
+    Mealie partent dans un pool de `batch_workers` processus. Chaque
+    processus a sa propre configuration, la config du script étant faite
+    de variables globales.
 
-    if DEBUG_MODE:
-        print("="*80)
-        print("🍳 Génération automatique du meal plan Mealie")
-        print("="*80 + "\n")
+    Returns:
+        Code de sortie (0 si tous les foyers ont été planifiés)
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, as_completed
 
-    # Récupérer les recettes HelloFresh
-    # Priorité 1: Argument de ligne de commande
-    # Priorité 2: Config file
-    magic_link = magic_link_arg or HELLOFRESH_MAGIC_LINK
+    profiles = load_profiles()
+    print(f"🏘️  Batch : {len(profiles)} foyer(s), semaines {', '.join(map(str, week_offsets))}\n")
 
-    if not magic_link:
-        print("❌ Erreur: Vous devez fournir un magic link")
-        print("\nUsage:")
-        print('  ./run.sh -m "https://click.bnlx.hellofresh.link/..." -w 1')
-        print('  OU')
-        print('  python3 hellofresh2mealiemenu.py -m "https://click.bnlx.hellofresh.link/..." -w 1')
-        print('\nOu ajoutez hellofresh_magic_link dans config.yaml')
-        return
+    # spawn : les processus ne doivent pas hériter du driver Playwright
+    context = multiprocessing.get_context("spawn")
+    workers = max(1, min(BATCH_WORKERS, len(profiles)))
+    configs = dict(profiles)
+    results = []
 
-    hf_recipes = get_current_week_recipes_with_magic_link(magic_link, SUBSCRIPTION_ID, week_offset)
-    
-    if not hf_recipes:
-        print("❌ Aucune recette HelloFresh trouvée")
-        return
-    
-    if DEBUG_MODE:
-        print("📋 Recettes HelloFresh de la semaine:")
-        for i, title in enumerate(hf_recipes, 1):
-            print(f"   {i}. {title}")
-        print()
-    
-    # Récupérer toutes les recettes Mealie
-    mealie_recipes = get_all_mealie_recipes()
-    
-    if not mealie_recipes:
-        print("❌ Aucune recette Mealie trouvée")
-        return
-    
-    # Matcher les recettes
-    log("🔗 Matching des recettes...")
-    
-    matched_ids = []
-    
-    for hf_title in hf_recipes:
-        match = match_recipe(hf_title, mealie_recipes)
-        
-        if match:
-            mealie_title, mealie_id, score = match
-            
-            if score >= MATCHING_THRESHOLD:
-                log(f"   ✅ {hf_title}")
-                log(f"      → {mealie_title} (score: {score:.2f})")
-                matched_ids.append(mealie_id)
-            else:
-                log(f"   ⚠️  {hf_title} (score: {score:.2f})")
-        else:
-            log(f"   ⚠️  {hf_title} (aucun match)")
-    
-    log("")
-    
-    if not matched_ids:
-        print("❌ Aucune recette matchée")
-        return
-    
-    # Calculer la semaine cible pour Mealie
-    # HelloFresh livre en fin de semaine W, on mange pendant la semaine W+1
-    # Donc: recettes HelloFresh W+offset → planning Mealie pour semaine W+offset+1
-    today = datetime.now()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        try:
+            futures = {}
+            try:
+                with METRICS.phase("browser_launch"):
+                    playwright, browser = launch_browser()
+            except Exception as e:
+                log(f"❌ Navigateur indisponible: {e}", "error")
+                playwright = browser = None
 
-    # Calculer le prochain lundi (début de la semaine suivante)
-    days_until_next_monday = (7 - today.weekday()) % 7
-    if days_until_next_monday == 0:
-        days_until_next_monday = 7
-    next_monday = today + timedelta(days=days_until_next_monday)
+            try:
+                scraped = scrape_profiles(profiles, week_offsets, browser) if browser else \
+                    ((name, {}) for name, _ in profiles)
+                with METRICS.phase("scrape"):
+                    for name, weekly_recipes in scraped:
+                        future = pool.submit(run_profile, name, configs[name], week_offsets,
+                                             weekly_recipes, refresh_catalog, dict(_recipe_sources))
+                        futures[future] = name
+            finally:
+                if browser:
+                    browser.close()
+                    playwright.stop()
 
-    # Ajouter le week_offset pour obtenir la semaine cible
-    target_monday_date = next_monday + timedelta(weeks=week_offset)
-    target_sunday = target_monday_date + timedelta(days=6)
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'profile': name, 'weeks': {}, 'error': str(e), 'output': "", 'seconds': 0.0}
+                print(f"\n🏠 {name}")
+                print(result['output'].rstrip())
+                results.append(result)
+        except Cancelled:
+            # Foyers pas encore démarrés abandonnés ; ceux en cours finissent
+            # leurs écritures (journalisées, reprises au prochain run)
+            pool.shutdown(wait=True, cancel_futures=True)
+            raise
 
-    log(f"📅 Planning semaine {target_monday_date.isocalendar()[1]} ({target_monday_date.strftime('%d/%m')} - {target_sunday.strftime('%d/%m')})\n", "always")
-    
-    # Supprimer les meal plans existants
-    delete_week_mealplans(target_monday_date, target_sunday)
+    results.sort(key=lambda result: list(configs).index(result['profile']))
+    print_batch_summary(results)
 
-    # Créer le nouveau meal plan
-    created = create_meal_plan(matched_ids, target_monday_date)
-    
-    elapsed = time.time() - start_time
-    
-    if DEBUG_MODE:
-        print("="*80)
-        print("✅ TERMINÉ")
-        print("="*80)
-        print(f"\n🌐 Vérifie ton planning: {MEALIE_URL}/g/home/mealplan\n")
-    else:
-        print(f"✅ Meal plan créé pour semaine {target_monday_date.isocalendar()[1]} ({created} recettes) en {elapsed:.1f}s")
+    failed = any(result['error'] or any(created is None for created in result['weeks'].values())
+                 for result in results)
+    return 1 if failed else 0
 
 if __name__ == "__main__":
     # Gestion des arguments de ligne de commande
@@ -481,6 +4417,16 @@ Exemples:
 
   # Utiliser le magic link du fichier config.yaml
   ./run.sh
+
+  # Garder navigateur et catalogue en mémoire (voir hellofresh2mealie_client.py)
+  ./run.sh --daemon
+
+  # Tous les foyers de la liste profiles de config.yaml
+  ./run.sh --batch --weeks 0,1
+
+  # Enregistrer un run, puis le rejouer sans réseau (profilage, benchmarks)
+  ./run.sh -w 1 --record fixtures/semaine
+  ./run.sh -w 1 --replay fixtures/semaine
         '''
     )
 
@@ -503,26 +4449,113 @@ Exemples:
         help='Liste de semaines à planifier séparées par des virgules (ex: 0,1,2)'
     )
 
+    parser.add_argument(
+        '--sequential',
+        action='store_true',
+        help='Avec --weeks : traiter les semaines une par une au lieu du pipeline'
+    )
+
+    parser.add_argument(
+        '--refresh-catalog',
+        action='store_true',
+        help='Forcer le rechargement complet du catalogue Mealie (ignore le cache local)'
+    )
+
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Planifier tous les foyers de la liste profiles de config.yaml'
+    )
+
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Rester lancé et traiter les demandes de hellofresh2mealie_client.py'
+    )
+
+    parser.add_argument(
+        '--progress',
+        action='store_true',
+        help='Afficher le début et la fin de chaque étape (lignes @@stage, pour gui_mac.py)'
+    )
+
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument(
+        '--record',
+        metavar='DOSSIER',
+        help='Enregistrer le trafic HelloFresh (HAR) et Mealie dans DOSSIER'
+    )
+    fixtures.add_argument(
+        '--replay',
+        metavar='DOSSIER',
+        help='Rejouer un enregistrement de --record, sans réseau'
+    )
+
     args = parser.parse_args()
 
     try:
+        load_config()
+        if (args.record or args.replay) and (args.batch or args.daemon):
+            raise ConfigError("--record/--replay : un seul run à la fois (sans --batch ni --daemon)")
+        if args.daemon:
+            check_daemon_host()
+        if args.batch:
+            # Foyers vérifiés avant de lancer quoi que ce soit
+            load_profiles()
+        missing = [] if args.batch else missing_config_keys(_raw_config)
+        if missing:
+            raise ConfigError(f"Clé manquante dans config.yaml: '{missing[0]}' (ou utiliser --batch)")
+        if args.record:
+            start_fixtures("record", args.record)
+        elif args.replay:
+            start_fixtures("replay", args.replay)
+    except ConfigError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    if args.daemon:
+        run_daemon()
+        sys.exit(0)
+
+    METRICS.progress = args.progress
+
+    # SIGTERM (bouton Annuler de gui_mac.py) : s'arrêter proprement, navigateur fermé
+    def cancel_run(signum, frame):
+        _cancel_requested.set()
+        raise Cancelled()
+    signal.signal(signal.SIGTERM, cancel_run)
+
+    try:
+        if args.batch:
+            # Semaines de --weeks, sinon celle de -w, pour chaque foyer
+            week_offsets = [int(w.strip()) for w in args.weeks.split(',')] if args.weeks else [args.week]
+            code = run_batch(week_offsets, refresh_catalog=args.refresh_catalog)
+            if code:
+                sys.exit(code)
         # Si --weeks est fourni, planifier plusieurs semaines
-        if args.weeks:
+        elif args.weeks:
             week_offsets = [int(w.strip()) for w in args.weeks.split(',')]
-            print(f"📅 Planification de {len(week_offsets)} semaine(s) : {', '.join(map(str, week_offsets))}\n")
-
-            for i, week_offset in enumerate(week_offsets, 1):
-                if i > 1:
-                    print("\n" + "="*80 + "\n")
-                print(f"📌 Semaine {week_offset} ({i}/{len(week_offsets)})")
-                main(magic_link_arg=args.magic_link, week_offset=week_offset)
+            code = plan_weeks(args.magic_link, week_offsets,
+                              refresh_catalog=args.refresh_catalog, sequential=args.sequential)
+            if code:
+                sys.exit(code)
         else:
             # Comportement classique avec -w
-            main(magic_link_arg=args.magic_link, week_offset=args.week)
+            main(magic_link_arg=args.magic_link, week_offset=args.week,
+                 refresh_catalog=args.refresh_catalog)
+    except Cancelled:
+        print("\n⚠️  Annulé")
+        sys.exit(130)
     except KeyboardInterrupt:
         print("\n⚠️  Interrompu")
     except Exception as e:
         print(f"❌ Erreur: {e}")
         if DEBUG_MODE:
             import traceback
-            traceback.print_exc()
\ No newline at end of file
+            traceback.print_exc()
+    finally:
+        stop_fixtures()
+        try:
+            METRICS.write()
+        except OSError as e:
+            log(f"⚠️  Métriques non écrites: {e}", "error")
\ No newline at end of file
@@ -15,10 +15,15 @@ fi
 source "$VENV_DIR/bin/activate"
 
 # Installer les dépendances si nécessaire
-if ! python3 -c "import playwright" 2>/dev/null; then
+# Fichier témoin écrit après une installation réussie : vérifier sa présence
+# ne coûte rien, là où lancer Python pour tester l'import prenait du temps
+DEPENDENCIES="playwright requests pyyaml"
+DEPS_STAMP="$VENV_DIR/.deps-installed"
+if [ ! -f "$DEPS_STAMP" ] || [ "$(cat "$DEPS_STAMP")" != "$DEPENDENCIES" ]; then
     echo "📦 Installation des dépendances..."
-    pip3 install -q playwright requests pyyaml
-    python3 -m playwright install chromium
+    pip3 install -q $DEPENDENCIES && \
+        python3 -m playwright install chromium && \
+        echo "$DEPENDENCIES" > "$DEPS_STAMP"
 fi
 
 # Lancer le script avec tous les arguments passés
@@ -0,0 +1,67 @@
+import itertools
+import random
+
+import pytest
+
+import hellofresh2mealiemenu as hfm
+
+class FakeMatcher:
+    """top_candidates lu dans un dictionnaire {titre: [match, ...]}"""
+
+    def __init__(self, candidates):
+        self.candidates = candidates
+
+    def top_candidates(self, title, k):
+        return self.candidates.get(title, [])[:k]
+
+@pytest.fixture(autouse=True)
+def threshold(monkeypatch):
+    monkeypatch.setattr(hfm, "MATCHING_THRESHOLD", 0.6)
+    monkeypatch.setattr(hfm, "ASSIGNMENT_CANDIDATES", 5)
+
+def test_hungarian_matches_brute_force():
+    rng = random.Random(7)
+    for _ in range(300):
+        n = rng.randint(1, 4)
+        m = rng.randint(n, 6)
+        cost = [[rng.choice([1.0, 0.0, -rng.random()]) for _ in range(m)] for _ in range(n)]
+        best = min(sum(cost[i][j] for i, j in enumerate(columns))
+                   for columns in itertools.permutations(range(m), n))
+        assignment = hfm.hungarian(cost)
+        assert len(set(assignment)) == n
+        assert sum(cost[i][j] for i, j in enumerate(assignment)) == pytest.approx(best)
+
+def test_runner_up_gets_its_second_choice():
+    assignment = hfm.assign_recipes({
+        "poulet basquaise": [("poulet basquaise", "A", 0.95)],
+        "poulet à la basquaise, riz": [("poulet basquaise", "A", 0.9), ("riz au poulet", "B", 0.8)],
+    })
+    assert assignment == {
+        "poulet basquaise": ("poulet basquaise", "A", 0.95),
+        "poulet à la basquaise, riz": ("riz au poulet", "B", 0.8),
+    }
+
+def test_no_other_recipe_above_threshold_leaves_title_unmatched():
+    matches = {"t1": ("recette a", "A", 0.95), "t2": ("recette a", "A", 0.9)}
+    matcher = FakeMatcher({
+        "t1": [("recette a", "A", 0.95)],
+        "t2": [("recette a", "A", 0.9), ("recette b", "B", 0.4)],
+    })
+
+    assert hfm.resolve_conflicts(matches, set(), matcher) == 1
+    assert matches == {"t1": ("recette a", "A", 0.95), "t2": None}
+
+def test_fixed_titles_never_reassigned():
+    # "import" : recette imposée (override, import) au score plus faible
+    matches = {"import": ("recette a", "A", 0.7), "t2": ("recette a", "A", 0.95)}
+    matcher = FakeMatcher({
+        "import": [("recette c", "C", 0.99)],
+        "t2": [("recette a", "A", 0.95), ("recette b", "B", 0.8)],
+    })
+
+    hfm.resolve_conflicts(matches, {"import"}, matcher)
+    assert matches == {"import": ("recette a", "A", 0.7), "t2": ("recette b", "B", 0.8)}
+
+def test_independent_choices_kept_when_one_to_one():
+    matches = {"t1": ("recette a", "A", 0.9), "t2": ("recette b", "B", 0.8)}
+    assert hfm.resolve_conflicts(dict(matches), set(), FakeMatcher({})) == 0
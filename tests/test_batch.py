@@ -0,0 +1,31 @@
+import os
+
+import hellofresh2mealiemenu as hfm
+
+def test_session_uses_profile_settings_not_module_globals(monkeypatch):
+    monkeypatch.setattr(hfm, "SCRAPING_MODE", "lean")
+    settings = hfm.parse_config({
+        'hellofresh_url': 'https://www.hellofresh.be/',
+        'scraping_mode': 'full',
+        'auth_state': False,
+        'auth_state_path': 'hellofresh_auth.maison.json',
+        'latency_budgets': {'menu': 90},
+        'debug_artifacts': 'none',
+        'debug_artifacts_dir': 'debug_maison',
+    })
+    session = hfm.HelloFreshSession(None, "sub", settings=settings, name="maison")
+
+    assert session.settings['HELLOFRESH_URL'] == 'https://www.hellofresh.be'
+    assert session.settings['SCRAPING_MODE'] == 'full'
+    assert session.auth_state_path == os.path.join(hfm.SCRIPT_DIR, 'hellofresh_auth.maison.json')
+    assert session.artifacts.level == 'none'
+    assert session.artifacts.base_dir == os.path.join(hfm.SCRIPT_DIR, 'debug_maison')
+    assert hfm.LatencyBudget("menu", budgets=session.settings['LATENCY_BUDGETS']).seconds == 90
+
+def test_debug_run_dirs_distinct_per_household(tmp_path):
+    dirs = {
+        hfm.DebugArtifacts("full", 5, str(tmp_path), label=name)._ensure_run_dir()
+        for name in ("Maison", "Chalet d'été")
+    }
+    assert len(dirs) == 2
+    assert all(os.path.isdir(path) for path in dirs)
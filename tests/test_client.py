@@ -0,0 +1,28 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import hellofresh2mealie_client as client
+
+def test_daemon_url_brackets_ipv6():
+    assert client.daemon_url("127.0.0.1", 8765, "/plan") == "http://127.0.0.1:8765/plan"
+    assert client.daemon_url("::1", 8765, "/plan") == "http://[::1]:8765/plan"
+    assert client.daemon_url("localhost", 8765, "/health") == "http://localhost:8765/health"
+
+def test_daemon_ready_only_when_health_answers():
+    class Health(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200 if self.path == "/health" else 404)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Health)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        assert client.daemon_ready("127.0.0.1", port)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not client.daemon_ready("127.0.0.1", port, timeout=0.5)
@@ -0,0 +1,23 @@
+import ast
+import inspect
+
+import pytest
+
+import hellofresh2mealiemenu as hfm
+
+def test_every_config_variable_is_declared():
+    """Chaque clé de parse_config a sa ligne `NOM = _defaults['NOM']` au niveau du module"""
+    tree = ast.parse(inspect.getsource(hfm))
+    declared = {
+        target.id
+        for node in tree.body if isinstance(node, ast.Assign)
+        for target in node.targets if isinstance(target, ast.Name)
+    }
+    assert set(hfm.parse_config({})) <= declared
+
+def test_set_config_rejects_unknown_names(monkeypatch):
+    monkeypatch.setattr(hfm, "DAYS_TO_PLAN", hfm.DAYS_TO_PLAN)
+    hfm.set_config({"DAYS_TO_PLAN": ["monday"]})
+    assert hfm.DAYS_TO_PLAN == ["monday"]
+    with pytest.raises(ValueError):
+        hfm.set_config({"DAYS_TO_PLANN": ["monday"]})
@@ -0,0 +1,35 @@
+import pytest
+
+import hellofresh2mealiemenu as hfm
+
+@pytest.mark.parametrize("host", ["127.0.0.1", "::1", "localhost"])
+def test_loopback_hosts_accepted(monkeypatch, host):
+    monkeypatch.setattr(hfm, "DAEMON_HOST", host)
+    hfm.check_daemon_host()
+
+@pytest.mark.parametrize("host", ["0.0.0.0", "192.168.1.10", "mealie.local"])
+def test_other_hosts_refused(monkeypatch, host):
+    monkeypatch.setattr(hfm, "DAEMON_HOST", host)
+    with pytest.raises(hfm.ConfigError):
+        hfm.check_daemon_host()
+
+def test_catalog_kept_in_memory_without_catalog_cache(monkeypatch):
+    monkeypatch.setattr(hfm, "CATALOG_CACHE", False)
+    monkeypatch.setattr(hfm, "_loaded_catalog", None)
+    version = [(2, "2026-01-01T00:00:00")]
+    downloads = []
+
+    def iter_recipes():
+        downloads.append(1)
+        yield from [("id-0", "Poulet rôti", None, None), ("id-1", "Boeuf bourguignon", None, None)]
+
+    monkeypatch.setattr(hfm, "iter_mealie_recipes", iter_recipes)
+    monkeypatch.setattr(hfm, "remote_catalog_version", lambda: version[0])
+
+    first = hfm.get_all_mealie_recipes()
+    assert hfm.get_all_mealie_recipes() is first
+    assert len(downloads) == 1
+
+    version[0] = (2, "2026-01-02T00:00:00")
+    assert hfm.get_all_mealie_recipes() is not first
+    assert len(downloads) == 2
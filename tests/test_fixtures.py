@@ -0,0 +1,42 @@
+import json
+import random
+
+import hellofresh2mealiemenu as hfm
+
+LINK = "https://click.bnlx.hellofresh.link/?qs=secret"
+
+def test_manifest_keeps_only_magic_link_digest(tmp_path, monkeypatch):
+    monkeypatch.setattr(hfm, "FIXTURE_DIR", str(tmp_path))
+    (tmp_path / hfm.FIXTURE_HAR).write_text(json.dumps({'log': {'entries': [
+        {'request': {'url': "https://www.hellofresh.fr/"}},
+        {'request': {'url': LINK}},
+    ]}}))
+    digest = hfm.magic_link_digest(LINK)
+    assert LINK not in digest
+    assert hfm.recorded_magic_link(digest) == LINK
+    assert hfm.recorded_magic_link(hfm.magic_link_digest("https://autre")) is None
+
+def test_retry_jitter_leaves_global_random_untouched():
+    client = hfm.MealieClient("http://mealie.invalid", "token")
+    random.seed("2026-10-16T10:00:00")
+    expected = random.random()
+    random.seed("2026-10-16T10:00:00")
+    client._backoff(1)
+    assert random.random() == expected
+
+def test_recording_readable_by_owner_only(tmp_path, monkeypatch):
+    directory = tmp_path / "fixtures"
+    # start_fixtures modifie ces variables du module : restaurées après le test
+    for name in ("FIXTURE_MODE", "FIXTURE_DIR", "_fixture_manifest", "CATALOG_CACHE", "MATCH_CACHE", "RUN_JOURNAL"):
+        monkeypatch.setattr(hfm, name, getattr(hfm, name))
+    old_umask = hfm.os.umask(0o022)
+    try:
+        hfm.start_fixtures("record", str(directory))
+        (directory / hfm.FIXTURE_HAR).write_text("{}")
+        hfm.stop_fixtures()
+    finally:
+        hfm.os.umask(old_umask)
+
+    assert directory.stat().st_mode & 0o777 == 0o700
+    for name in (hfm.FIXTURE_HAR, hfm.FIXTURE_MEALIE, hfm.FIXTURE_MANIFEST):
+        assert (directory / name).stat().st_mode & 0o777 == 0o600
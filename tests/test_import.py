@@ -0,0 +1,92 @@
+import hellofresh2mealiemenu as hfm
+
+def test_imported_recipe_already_planned_is_not_planned_twice(monkeypatch):
+    monkeypatch.setattr(hfm, "MATCH_CACHE", False)
+    monkeypatch.setattr(hfm, "IMPORT_UNMATCHED", True)
+    monkeypatch.setattr(hfm, "MATCHING_ASSIGNMENT", "joint")
+    recipes = hfm.MealieCatalog([("poulet rôti aux herbes", "id-0"), ("boeuf bourguignon", "id-1")])
+    # Deux titres sans correspondance qui renvoient à une recette déjà
+    # planifiée (nom au catalogue) et à une même fiche importée
+    monkeypatch.setattr(hfm, "import_unmatched_recipes", lambda titles, catalog: {
+        "Tajine d'agneau": ("boeuf bourguignon", "id-1"),
+        "Curry de lentilles": ("curry de lentilles", "id-2"),
+        "Curry de lentilles corail": ("curry de lentilles", "id-2"),
+    })
+
+    planned = hfm.match_week(["Boeuf bourguignon", "Tajine d'agneau", "Curry de lentilles",
+                              "Curry de lentilles corail"], recipes)
+    assert planned == ["id-1", "id-2"]
+
+def test_fingerprint_stored_after_import_matches_next_run(monkeypatch):
+    monkeypatch.setattr(hfm, "MATCH_CACHE", False)
+    monkeypatch.setattr(hfm, "IMPORT_UNMATCHED", True)
+    monkeypatch.setattr(hfm, "RUN_JOURNAL", True)
+    monkeypatch.setattr(hfm, "journaled_week", lambda fingerprint, week_offset: None)
+    titles = ["Boeuf bourguignon", "Tajine d'agneau aux abricots"]
+    recipes = hfm.MealieCatalog([("boeuf bourguignon", "id-0")])
+    monkeypatch.setattr(hfm, "get_all_mealie_recipes", lambda force_refresh=False: recipes)
+
+    def import_recipes(unmatched, catalog):
+        hfm.add_catalog_recipes(catalog, [("tajine d'agneau aux abricots", "id-1")])
+        return {unmatched[0]: ("tajine d'agneau aux abricots", "id-1")}
+    monkeypatch.setattr(hfm, "import_unmatched_recipes", import_recipes)
+
+    written = {}
+    def write_week(matched_ids, week_offset, fingerprint=None, journaled=None):
+        written['fingerprint'] = fingerprint
+        return len(matched_ids), hfm.mealie_week_dates(week_offset)[0]
+    monkeypatch.setattr(hfm, "write_week", write_week)
+
+    hfm.main(week_offset=1, hf_recipes=titles)
+
+    # Run suivant : le catalogue chargé contient la recette importée
+    reloaded = hfm.MealieCatalog([("boeuf bourguignon", "id-0"), ("tajine d'agneau aux abricots", "id-1")])
+    assert written['fingerprint'] == hfm.week_fingerprint(titles, reloaded, 1)
+
+URL = "https://www.hellofresh.fr/recipes/tajine-d-agneau"
+
+class FakeImportClient:
+    """Mealie factice : chaque import crée la recette `created`"""
+
+    def __init__(self, created):
+        self.created = created
+        self.posted = []
+
+    def run_batch(self, calls, parallelism=None):
+        results = []
+        for key, method, path, kwargs in calls:
+            if method == 'POST':
+                self.posted.append(key)
+                results.append(hfm.MealieResult(key, True, 201, "tajine", None))
+            else:
+                results.append(hfm.MealieResult(key, True, 200, dict(self.created), None))
+        return results
+
+def test_imported_url_not_reused_once_deleted_from_catalog(monkeypatch):
+    monkeypatch.setattr(hfm, "_imported_urls", {URL: ("tajine d'agneau", "id-deleted")})
+    monkeypatch.setattr(hfm, "_recipe_sources", {"Tajine d'agneau": ("Tajine", URL)})
+    client = FakeImportClient({'name': "Tajine", 'id': "id-new"})
+    monkeypatch.setattr(hfm, "get_mealie_client", lambda: client)
+
+    found = hfm.import_unmatched_recipes(["Tajine d'agneau"], hfm.MealieCatalog([("boeuf", "id-0")]))
+
+    assert found == {"Tajine d'agneau": ("tajine", "id-new")}
+    assert client.posted == [URL]
+
+def test_daemon_requests_do_not_share_imports(tmp_path, monkeypatch):
+    monkeypatch.setattr(hfm, "METRICS_FILE", str(tmp_path / "metrics.jsonl"))
+    monkeypatch.setattr(hfm, "METRICS_PROMETHEUS_FILE", None)
+    monkeypatch.setattr(hfm, "_imported_urls", {})
+    monkeypatch.setattr(hfm, "METRICS", hfm.METRICS)
+    seen = []
+
+    def fake_main(magic_link_arg=None, week_offset=0, refresh_catalog=False):
+        seen.append(dict(hfm._imported_urls))
+        hfm._imported_urls[URL] = ("tajine d'agneau", f"id-{week_offset}")
+
+    monkeypatch.setattr(hfm, "main", fake_main)
+    for week in (0, 1):
+        lines = hfm.queue.Queue()
+        assert hfm.run_daemon_request({'weeks': [week]}, lines) == 0
+
+    assert seen == [{}, {}]
@@ -0,0 +1,30 @@
+import hellofresh2mealiemenu as hfm
+
+def catalog(*names):
+    return hfm.MealieCatalog((name, f"id-{i}") for i, name in enumerate(names))
+
+def test_cache_sees_recipes_added_without_catalog_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(hfm, "CATALOG_CACHE", False)
+    monkeypatch.setattr(hfm, "MATCH_CACHE", True)
+    monkeypatch.setattr(hfm, "CATALOG_CACHE_PATH", str(tmp_path / "catalog.sqlite"))
+    title = "Poulet rôti aux herbes et frites"
+
+    first = hfm.match_titles([title], catalog("Poulet rôti aux herbes", "Boeuf bourguignon"))
+    assert first[0][1][0] == "poulet rôti aux herbes"
+
+    updated = catalog("Poulet rôti aux herbes", "Boeuf bourguignon", "Poulet rôti aux herbes et frites")
+    second = hfm.match_titles([title], updated)
+    assert second[0][1] == ("poulet rôti aux herbes et frites", "id-2", 1.0)
+
+def test_cache_hit_on_unchanged_catalog(tmp_path, monkeypatch):
+    monkeypatch.setattr(hfm, "MATCH_CACHE", True)
+    monkeypatch.setattr(hfm, "CATALOG_CACHE_PATH", str(tmp_path / "catalog.sqlite"))
+    recipes = catalog("Poulet rôti aux herbes", "Boeuf bourguignon")
+    hfm.match_titles(["Boeuf bourguignon"], recipes)
+
+    cache = hfm.MatchCache(str(tmp_path / "catalog.sqlite"))
+    try:
+        assert cache.get("boeuf  BOURGUIGNON", recipes.version()) == ("boeuf bourguignon", "id-1", 1.0)
+        assert cache.get("boeuf bourguignon", catalog("Boeuf bourguignon").version()) is None
+    finally:
+        cache.close()
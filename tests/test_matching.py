@@ -0,0 +1,68 @@
+import random
+
+import hellofresh2mealiemenu as hfm
+
+WORDS = [
+    "poulet", "rôti", "aux", "herbes", "boeuf", "sauce", "crémeuse", "champignons",
+    "riz", "basmati", "curry", "coco", "légumes", "croquants", "gratin", "pommes",
+    "de", "terre", "saumon", "citron", "aneth", "pâtes", "pesto", "tomates",
+    "séchées", "burger", "frites", "patate", "douce", "falafels", "houmous", "porc",
+    "caramélisé", "nouilles", "sésame", "risotto", "lardons", "épinards", "chèvre", "miel",
+]
+
+def make_catalog(size, seed):
+    rng = random.Random(seed)
+    catalog = hfm.MealieCatalog()
+    for i in range(size):
+        name = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 7)))
+        catalog.append(name, f"id{i}")
+    return catalog
+
+def make_titles(catalog, count, seed):
+    """Titres HelloFresh difficiles : mots mélangés, casse changée, mots en plus ou en moins"""
+    rng = random.Random(seed)
+    titles = []
+    for _ in range(count):
+        words = rng.choice(catalog.names).split()
+        rng.shuffle(words)
+        if rng.random() < 0.5:
+            words.append(rng.choice(WORDS))
+        if len(words) > 2 and rng.random() < 0.5:
+            words.pop(rng.randrange(len(words)))
+        titles.append(" ".join(word.upper() if rng.random() < 0.3 else word for word in words))
+    return titles
+
+def test_index_matches_exhaustive():
+    catalog = make_catalog(400, seed=1)
+    matcher = hfm.RecipeMatcher(catalog, mode="index", candidates=5)
+
+    for title in make_titles(catalog, 60, seed=2):
+        expected = hfm.match_recipe(title, catalog)
+        match = matcher.match(title)
+        if expected[2] >= hfm.MATCHING_THRESHOLD:
+            assert match == expected, title
+        else:
+            # Sous le seuil : même décision (aucune recette planifiée)
+            assert match[2] < hfm.MATCHING_THRESHOLD, title
+
+def test_index_top_candidates_match_exhaustive():
+    catalog = make_catalog(400, seed=3)
+    index = hfm.RecipeMatcher(catalog, mode="index", candidates=3)
+    exhaustive = hfm.RecipeMatcher(catalog, mode="exhaustive")
+
+    def accepted(candidates):
+        return [candidate for candidate in candidates if candidate[2] >= hfm.MATCHING_THRESHOLD]
+
+    for title in make_titles(catalog, 30, seed=4):
+        expected = accepted(exhaustive.top_candidates(title, 5))
+        assert accepted(index.top_candidates(title, 5)) == expected, title
+
+def test_index_sees_recipes_added_after_build():
+    catalog = make_catalog(200, seed=5)
+    matcher = hfm.RecipeMatcher(catalog, mode="index", candidates=5)
+    matcher.prepare()
+
+    catalog.append("Tartiflette au reblochon", "new")
+    matcher.extend()
+
+    assert matcher.match("tartiflette au reblochon") == ("tartiflette au reblochon", "new", 1.0)
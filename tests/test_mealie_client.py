@@ -0,0 +1,52 @@
+import pytest
+import requests
+import urllib3
+
+import hellofresh2mealiemenu as hfm
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.content = b""
+        self.headers = {}
+
+def fake_client(monkeypatch, outcomes):
+    """Client dont chaque envoi consomme le résultat suivant de `outcomes` (réponse ou exception)"""
+    monkeypatch.setattr(hfm.time, "sleep", lambda seconds: None)
+    client = hfm.MealieClient("http://mealie.invalid", "token", max_retries=3)
+    sent = []
+
+    def request(method, url, **kwargs):
+        sent.append(method)
+        outcome = outcomes[min(len(sent), len(outcomes)) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+    monkeypatch.setattr(client.session, "request", request)
+    return client, sent
+
+def test_post_not_resent_after_gateway_error(monkeypatch):
+    client, sent = fake_client(monkeypatch, [502, 201])
+    assert client.request('POST', '/api/households/mealplans', json={}).status_code == 502
+    assert sent == ['POST']
+
+def test_post_not_resent_after_read_timeout(monkeypatch):
+    client, sent = fake_client(monkeypatch, [requests.exceptions.ReadTimeout(), 201])
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.request('POST', hfm.IMPORT_URL_PATH, json={})
+    assert sent == ['POST']
+
+def test_post_retried_when_never_sent(monkeypatch):
+    refused = requests.exceptions.ConnectionError(
+        urllib3.exceptions.MaxRetryError(None, "/", urllib3.exceptions.NewConnectionError(None, "refusée")))
+    client, sent = fake_client(monkeypatch, [refused, 429, 201])
+    assert client.request('POST', '/api/households/mealplans', json={}).status_code == 201
+    assert sent == ['POST'] * 3
+
+def test_idempotent_and_unsafe_opt_in_retried(monkeypatch):
+    client, sent = fake_client(monkeypatch, [503, 200])
+    assert client.request('PUT', '/api/households/mealplans/1', json={}).status_code == 200
+    client, sent = fake_client(monkeypatch, [504, 201])
+    assert client.request('POST', '/api/x', json={}, retry_unsafe=True).status_code == 201
+    assert sent == ['POST'] * 2
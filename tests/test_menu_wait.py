@@ -0,0 +1,37 @@
+import hellofresh2mealiemenu as hfm
+
+class FakePage:
+    """Onglet dont #weekly-menu affiche successivement les cartes de `renders`"""
+    url = "https://www.hellofresh.fr/my-account/deliveries/menu"
+
+    def __init__(self, renders):
+        self.renders = renders
+        self.polls = 0
+
+    def evaluate(self, script):
+        ids = self.renders[min(self.polls, len(self.renders) - 1)]
+        self.polls += 1
+        return ids
+
+    def wait_for_timeout(self, ms):
+        pass
+
+def test_json_ready_cards_still_wait_for_stable_count(monkeypatch):
+    # JSON de toutes les cartes déjà reçu : seules les cartes affichées comptent
+    monkeypatch.setattr(hfm, "read_menu_responses", lambda responses, records: records.update(
+        (recipe_id, {'name': recipe_id}) for recipe_id in "abcd"))
+    page = FakePage([["a", "b"], ["a", "b", "c"], ["a", "b", "c", "d"]])
+
+    records = hfm.wait_for_menu(page, hfm.LatencyBudget("menu", budgets={'menu': 60}))
+
+    assert set(records) == set("abcd")
+    assert page.polls == 2 + hfm.MENU_STABLE_POLLS
+
+def test_empty_menu_is_stable_without_exhausting_budget(monkeypatch):
+    monkeypatch.setattr(hfm, "read_menu_responses", lambda responses, records: None)
+    page = FakePage([[]])
+    # Budget déjà épuisé : une semaine sans livraison ne doit pas lever BudgetExceeded
+    budget = hfm.LatencyBudget("menu", budgets={'menu': 0})
+
+    assert hfm.wait_for_menu(page, budget) == {}
+    assert page.polls == hfm.MENU_STABLE_POLLS
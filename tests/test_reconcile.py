@@ -0,0 +1,74 @@
+from datetime import datetime
+
+import pytest
+
+import hellofresh2mealiemenu as hfm
+
+MONDAY = datetime(2026, 10, 19)
+DAYS = ["monday", "tuesday", "wednesday"]
+DATES = ["2026-10-19", "2026-10-20", "2026-10-21"]
+
+@pytest.fixture(autouse=True)
+def week_settings(monkeypatch):
+    monkeypatch.setattr(hfm, "DAYS_TO_PLAN", DAYS)
+    monkeypatch.setattr(hfm, "ENTRY_TYPE", "dinner")
+
+def dinner(plan_id, date, recipe_id):
+    return {'id': plan_id, 'date': date, 'entryType': 'dinner', 'recipeId': recipe_id}
+
+def test_unchanged_week_has_no_writes():
+    existing = [dinner(1, DATES[0], "a"), dinner(2, DATES[1], "b"), dinner(3, DATES[2], "c")]
+    changes = hfm.plan_week_changes(existing, ["c", "a", "b"], MONDAY)
+
+    assert hfm.change_writes(changes) == []
+    assert len(changes['keep']) == 3
+    assert hfm.planned_entries(changes) == [(DATES[0], "a"), (DATES[1], "b"), (DATES[2], "c")]
+
+def test_changed_recipe_updates_only_its_day():
+    existing = [dinner(1, DATES[0], "a"), dinner(2, DATES[1], "b"), dinner(3, DATES[2], "c")]
+    changes = hfm.plan_week_changes(existing, ["a", "x", "c"], MONDAY)
+
+    writes = hfm.change_writes(changes)
+    assert [(write['method'], write['path']) for write in writes] == [('PUT', "/api/households/mealplans/2")]
+    assert writes[0]['json']['recipeId'] == "x"
+    assert writes[0]['json']['date'] == DATES[1]
+
+def test_shrinking_week_deletes_only_dinners():
+    existing = [dinner(1, DATES[0], "a"), dinner(2, DATES[1], "b"), dinner(3, DATES[2], "c"),
+                {'id': 4, 'date': DATES[2], 'entryType': 'lunch', 'recipeId': "l"}]
+    changes = hfm.plan_week_changes(existing, ["a", "b"], MONDAY)
+
+    assert [(write['method'], write['path']) for write in hfm.change_writes(changes)] == \
+        [('DELETE', "/api/households/mealplans/3")]
+
+def test_notes_and_other_meal_types_untouched():
+    existing = [
+        {'id': 5, 'date': DATES[0], 'entryType': 'dinner', 'title': "Resto", 'recipeId': None},
+        {'id': 6, 'date': DATES[1], 'entryType': 'lunch', 'recipeId': "l"},
+        dinner(7, DATES[1], "b"),
+        dinner(8, "2026-10-25", "z"),
+    ]
+    changes = hfm.plan_week_changes(existing, ["a", "b", "c"], MONDAY)
+
+    writes = hfm.change_writes(changes)
+    assert all(write['method'] == 'POST' for write in writes)
+    assert sorted(write['json']['date'] for write in writes) == [DATES[0], DATES[2]]
+    assert (DATES[1], "b") in hfm.planned_entries(changes)
+
+def test_non_consecutive_days_land_on_their_weekday(monkeypatch):
+    monkeypatch.setattr(hfm, "DAYS_TO_PLAN", ["monday", "wednesday", "friday"])
+    changes = hfm.plan_week_changes([], ["a", "b", "c"], MONDAY)
+
+    assert sorted((data['date'], day_name) for day_name, data in changes['insert']) == \
+        [("2026-10-19", "monday"), ("2026-10-21", "wednesday"), ("2026-10-23", "friday")]
+    assert sorted(write['json']['date'] for write in hfm.create_writes(["a", "b", "c"], MONDAY)) == \
+        ["2026-10-19", "2026-10-21", "2026-10-23"]
+
+def test_sunday_is_the_end_of_the_planned_week(monkeypatch):
+    monkeypatch.setattr(hfm, "DAYS_TO_PLAN", ["sunday", "monday"])
+    assert hfm.plan_dates(MONDAY) == [("sunday", "2026-10-25"), ("monday", "2026-10-19")]
+
+@pytest.mark.parametrize("days", [["monday", "lundi"], ["monday", "Monday"]])
+def test_invalid_days_to_plan_rejected(days):
+    with pytest.raises(hfm.ConfigError):
+        hfm.parse_config({'days_to_plan': days})